@@ -14,6 +14,15 @@ const firebaseConfig = {
 firebase.initializeApp(firebaseConfig);
 const database = firebase.database();
 
+// Fleet mode: open the dashboard with ?bot=<bot_id> to follow one bot,
+// whose state lives under bots/<bot_id>/ (without it, the root paths are used)
+const botId = new URLSearchParams(window.location.search).get('bot');
+
+// Reference to a path in the selected bot's state
+function botRef(path) {
+    return database.ref(botId ? `bots/${botId}/${path}` : path);
+}
+
 // References to HTML elements
 const currentLocationElem = document.getElementById('current-location');
 const lastUpdateElem = document.getElementById('last-update');
@@ -33,6 +42,17 @@ const locationIndicators = {
 // Chart instances
 let materialsChart;
 let distributionChart;
+let locationChart;
+
+// Material keys in chart order, with their labels and colors
+const materialKeys = ['dispatchReady', 'damaged', 'eWaste', 'rawMaterials'];
+const materialLabels = ['Dispatch Ready', 'Damaged Items', 'eWaste', 'Raw Materials'];
+const materialColors = [
+    'rgba(72, 187, 120, 0.7)',
+    'rgba(237, 100, 100, 0.7)',
+    'rgba(159, 122, 234, 0.7)',
+    'rgba(66, 153, 225, 0.7)'
+];
 
 // Initialize data
 const materialData = {
@@ -174,6 +194,45 @@ function initCharts() {
             maintainAspectRatio: false
         }
     });
+    
+    // Per-location totals (stacked bar chart) from history/rollups/locations
+    const locationCtx = document.getElementById('location-chart').getContext('2d');
+    locationChart = new Chart(locationCtx, {
+        type: 'bar',
+        data: {
+            labels: [],
+            datasets: materialKeys.map((key, i) => ({
+                label: materialLabels[i],
+                data: [],
+                backgroundColor: materialColors[i]
+            }))
+        },
+        options: {
+            scales: {
+                x: { stacked: true },
+                y: {
+                    stacked: true,
+                    beginAtZero: true,
+                    ticks: {
+                        precision: 0
+                    }
+                }
+            },
+            responsive: true,
+            maintainAspectRatio: false
+        }
+    });
+}
+
+// Function to update the per-location chart from the rollup node
+function updateLocationChart(rollups) {
+    if (!locationChart) return;
+    const locations = Object.keys(rollups).sort();
+    locationChart.data.labels = locations;
+    materialKeys.forEach((key, i) => {
+        locationChart.data.datasets[i].data = locations.map(location => rollups[location][key] || 0);
+    });
+    locationChart.update();
 }
 
 // Function to update charts
@@ -202,18 +261,18 @@ function updateCharts() {
 // Initialize Firebase listeners
 function initFirebaseListeners() {
     // Listen for location updates
-    database.ref('currentLocation').on('value', (snapshot) => {
+    botRef('currentLocation').on('value', (snapshot) => {
         const location = snapshot.val() || 'Start';
         updateLocationDisplay(location);
     });
     
     // Listen for timestamp updates
-    database.ref('lastUpdate').on('value', (snapshot) => {
+    botRef('lastUpdate').on('value', (snapshot) => {
         lastUpdateElem.textContent = formatTimestamp(snapshot.val());
     });
     
     // Listen for material count updates
-    database.ref('detectedMaterials').on('value', (snapshot) => {
+    botRef('detectedMaterials').on('value', (snapshot) => {
         const data = snapshot.val() || {
             dispatchReady: 0,
             damaged: 0,
@@ -222,29 +281,34 @@ function initFirebaseListeners() {
         };
         updateMaterialCounts(data);
     });
+    
+    // Listen for per-location totals (a small precomputed rollup, not raw events)
+    botRef('history/rollups/locations').on('value', (snapshot) => {
+        updateLocationChart(snapshot.val() || {});
+    });
 }
 
 // Setup test controls
 function setupTestControls() {
     // Location buttons
     document.getElementById('loc-start').addEventListener('click', () => {
-        database.ref('currentLocation').set('Start');
-        database.ref('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
+        botRef('currentLocation').set('Start');
+        botRef('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
     });
     
     document.getElementById('loc-a').addEventListener('click', () => {
-        database.ref('currentLocation').set('Building A');
-        database.ref('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
+        botRef('currentLocation').set('Building A');
+        botRef('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
     });
     
     document.getElementById('loc-b').addEventListener('click', () => {
-        database.ref('currentLocation').set('Building B');
-        database.ref('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
+        botRef('currentLocation').set('Building B');
+        botRef('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
     });
     
     document.getElementById('loc-c').addEventListener('click', () => {
-        database.ref('currentLocation').set('Building C');
-        database.ref('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
+        botRef('currentLocation').set('Building C');
+        botRef('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
     });
     
     // Materials update button
@@ -254,14 +318,14 @@ function setupTestControls() {
         const ewasteValue = parseInt(document.getElementById('test-ewaste').value) || 0;
         const rawValue = parseInt(document.getElementById('test-raw').value) || 0;
         
-        database.ref('detectedMaterials').set({
+        botRef('detectedMaterials').set({
             dispatchReady: dispatchValue,
             damaged: damagedValue,
             eWaste: ewasteValue,
             rawMaterials: rawValue
         });
         
-        database.ref('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
+        botRef('lastUpdate').set(firebase.database.ServerValue.TIMESTAMP);
     });
 }
 
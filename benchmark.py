@@ -0,0 +1,373 @@
+"""
+Detection benchmark suite for Smart Logistics Bot.
+
+Generates synthetic 640x480 scenes with known numbers of red circles,
+triangles, squares and X marks under several conditions (sensor noise,
+blur, dim and uneven lighting, clutter), runs each detector over them and
+reports speed (FPS, ms per frame, broken down by blob count) next to
+accuracy. Results are saved as JSON; compare them with a saved baseline to
+catch changes that make detection faster but less accurate.
+
+Usage:
+    python benchmark.py                                  # run, write benchmark_results.json
+    python benchmark.py --output baseline.json           # save a baseline
+    python benchmark.py --baseline baseline.json         # compare, exit 1 on regressions
+    python benchmark.py --scenes 26 --conditions clean,noise --detectors coarse_to_fine
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from hardware import SCENE_SYMBOLS, draw_symbol, scene_layout
+from symbol_detection import DEFAULT_ROI, detect_symbols, detect_symbols_coarse_to_fine
+
+# Most symbols that fit in one scene (grid cells inside the ROI)
+MAX_SYMBOLS = 12
+
+# Scene conditions: keyword arguments for generate_scene()
+CONDITIONS = {
+    "clean": {},
+    "noise": {"noise": 12.0},
+    "blur": {"blur": 7},
+    "dim": {"lighting": 0.6},
+    "uneven_light": {"lighting": 0.9, "gradient": 0.4},
+    "clutter": {"clutter": 8},
+    "combined": {"noise": 8.0, "blur": 5, "lighting": 0.8, "gradient": 0.2, "clutter": 5},
+}
+
+# Non-red distractors (BGR): grays, white, yellow and brown
+CLUTTER_COLORS = [(60, 60, 60), (120, 120, 120), (245, 245, 245), (0, 220, 220), (40, 80, 120)]
+
+# Default regression thresholds for compare()
+MAX_SLOWDOWN = 0.25       # Relative increase in ms per frame
+MAX_ACCURACY_DROP = 0.02  # Absolute drop in exact-match rate
+
+
+# ===== SCENE GENERATION =====
+def generate_scene(counts, noise=0.0, blur=0, lighting=1.0, gradient=0.0, clutter=0,
+                   background=200, size=(640, 480), roi=DEFAULT_ROI, rng=None):
+    """
+    Draw a synthetic checkpoint scene with known symbol counts.
+
+    Args:
+        counts (dict): Symbol name (Circle, Square, Triangle, X) -> number to draw
+        noise (float): Standard deviation of Gaussian sensor noise (gray levels)
+        blur (int): Gaussian blur kernel size (0 = sharp), e.g. motion or focus blur
+        lighting (float): Overall brightness gain
+        gradient (float): Brightness falloff from left to right (0 = even light)
+        clutter (int): Non-red objects plus tiny red specks that must be ignored
+        background (int): Gray level of the background
+        size (tuple): Frame (width, height)
+        roi (tuple): (x, y, w, h) the symbols are drawn inside
+        rng (np.random.Generator): Source of randomness
+
+    Returns:
+        np.ndarray: BGR frame
+    """
+    rng = rng or np.random.default_rng()
+    width, height = size
+    frame = np.full((height, width, 3), background, np.uint8)
+    layout = scene_layout(counts, roi, rng)
+
+    # Distractors go underneath the symbols
+    for _ in range(clutter):
+        color = CLUTTER_COLORS[int(rng.integers(len(CLUTTER_COLORS)))]
+        x, y = int(rng.integers(width)), int(rng.integers(height))
+        r = int(rng.integers(10, 40))
+        if rng.random() < 0.5:
+            cv2.circle(frame, (x, y), r, color, -1)
+        else:
+            cv2.rectangle(frame, (x - r, y - r // 2), (x + r, y + r // 2), color, -1)
+    for _ in range(clutter):
+        # Red specks well below the minimum symbol size, away from the symbols
+        for _ in range(20):
+            x, y = int(rng.integers(width)), int(rng.integers(height))
+            if all((x - cx) ** 2 + (y - cy) ** 2 > (r + 10) ** 2 for _, (cx, cy), r in layout):
+                cv2.circle(frame, (x, y), int(rng.integers(1, 4)), (0, 0, 255), -1)
+                break
+
+    for name, center, r in layout:
+        # Printed symbols aren't all the same red. Keeping blue at or below
+        # green holds the hue at 0-8 (OpenCV scale), inside the "damaged"
+        # band of HSV_RANGES, so the material detectors can be scored too
+        green = int(rng.integers(0, 40))
+        color = (int(rng.integers(0, green + 1)), green, int(rng.integers(200, 256)))
+        draw_symbol(frame, name, center, r, color)
+
+    image = frame.astype(np.float32)
+    if lighting != 1.0 or gradient:
+        falloff = 1.0 - gradient * np.linspace(0.0, 1.0, width, dtype=np.float32)
+        image *= lighting * falloff[np.newaxis, :, np.newaxis]
+    if blur:
+        image = cv2.GaussianBlur(image, (blur | 1, blur | 1), 0)
+    if noise:
+        image += rng.normal(0.0, noise, image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def random_counts(total, rng):
+    """Split total symbols randomly over the four shapes."""
+    shapes = rng.integers(len(SCENE_SYMBOLS), size=total)
+    return {name: int(np.sum(shapes == i)) for i, name in enumerate(SCENE_SYMBOLS)}
+
+
+def generate_scenes(condition, scenes=52, seed=0):
+    """
+    Generate scenes for one condition, covering 0..MAX_SYMBOLS blobs evenly.
+
+    The same seed gives the same symbol counts and layouts for every
+    condition, so conditions differ only in image quality.
+
+    Returns:
+        list: (frame, counts) pairs
+    """
+    settings = CONDITIONS[condition]
+    rng = np.random.default_rng(seed)
+    result = []
+    for i in range(scenes):
+        counts = random_counts(i % (MAX_SYMBOLS + 1), rng)
+        # The layout is drawn first from each scene's own generator
+        scene_rng = np.random.default_rng(int(rng.integers(2 ** 31)))
+        result.append((generate_scene(counts, rng=scene_rng, **settings), counts))
+    return result
+
+
+# ===== DETECTORS =====
+def _materials_truth(counts):
+    """Expected detect_materials() output: every red symbol counts as damaged."""
+    return {"dispatchReady": 0, "damaged": sum(counts.values()), "eWaste": 0, "rawMaterials": 0}
+
+
+def _detect_materials(mode):
+    import raspberry_pi_integration as rpi
+
+    def detect(frame):
+        previous, rpi.MATERIAL_LABELING_MODE = rpi.MATERIAL_LABELING_MODE, mode
+        try:
+            return rpi.detect_materials(frame)
+        finally:
+            rpi.MATERIAL_LABELING_MODE = previous
+    return detect
+
+
+def _symbols_truth(counts):
+    return dict(counts)
+
+
+# Detector name -> (function(frame) -> counts, function(true counts) -> expected output)
+DETECTORS = {
+    "detect_symbols": (lambda frame: detect_symbols(frame)["counts"], _symbols_truth),
+    "coarse_to_fine": (lambda frame: detect_symbols_coarse_to_fine(frame)["counts"], _symbols_truth),
+    "detect_materials": (_detect_materials("components"), _materials_truth),
+    "detect_materials_contours": (_detect_materials("contours"), _materials_truth),
+}
+
+
+# ===== MEASUREMENT =====
+def _accuracy(pairs):
+    """Exact-match rate, mean absolute count error, precision and recall."""
+    exact = errors = hits = predicted = expected = 0
+    for output, truth in pairs:
+        exact += output == truth
+        for key, true_count in truth.items():
+            count = output.get(key, 0)
+            errors += abs(count - true_count)
+            hits += min(count, true_count)
+            predicted += count
+            expected += true_count
+    n = max(len(pairs), 1)
+    return {
+        "exact": exact / n,
+        "mae": errors / n,
+        "precision": hits / predicted if predicted else 1.0,
+        "recall": hits / expected if expected else 1.0,
+    }
+
+
+def measure(detector, scenes, repeat=1):
+    """
+    Time one detector over prepared scenes and score its output.
+
+    Args:
+        detector (str): Name in DETECTORS
+        scenes (list): (frame, counts) pairs from generate_scenes()
+        repeat (int): Passes over the scenes; the fastest time per frame is kept
+
+    Returns:
+        dict: fps, ms_per_frame, p50_ms, p95_ms, accuracy and a by_blobs breakdown
+    """
+    detect, expected = DETECTORS[detector]
+    detect(scenes[0][0])  # Warm up (lookup tables, lazy imports)
+
+    times = [float("inf")] * len(scenes)
+    outputs = [None] * len(scenes)
+    for _ in range(repeat):
+        for i, (frame, _) in enumerate(scenes):
+            start = time.perf_counter()
+            outputs[i] = detect(frame)
+            times[i] = min(times[i], time.perf_counter() - start)
+
+    pairs = [(output, expected(counts)) for output, (_, counts) in zip(outputs, scenes)]
+    by_blobs = {}
+    for seconds, pair, (_, counts) in zip(times, pairs, scenes):
+        by_blobs.setdefault(sum(counts.values()), []).append((seconds, pair))
+
+    ms = np.array(times) * 1000
+    return {
+        "frames": len(scenes),
+        "fps": len(scenes) / (ms.sum() / 1000),
+        "ms_per_frame": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        **_accuracy(pairs),
+        "by_blobs": {
+            str(blobs): {
+                "frames": len(entries),
+                "ms_per_frame": float(np.mean([seconds for seconds, _ in entries]) * 1000),
+                "exact": _accuracy([pair for _, pair in entries])["exact"],
+            }
+            for blobs, entries in sorted(by_blobs.items())
+        },
+    }
+
+
+def run_benchmark(detectors=None, conditions=None, scenes=52, seed=0, repeat=3):
+    """
+    Benchmark detectors over every condition.
+
+    Args:
+        detectors (list): Names in DETECTORS (default: all)
+        conditions (list): Names in CONDITIONS (default: all)
+        scenes (int): Scenes per condition
+        seed (int): Seed for scene generation
+        repeat (int): Timing passes (fastest kept)
+
+    Returns:
+        dict: Results, JSON-serialisable (see save_results)
+    """
+    detectors = detectors or list(DETECTORS)
+    conditions = conditions or list(CONDITIONS)
+    for name in detectors:
+        if name not in DETECTORS:
+            raise ValueError(f"Unknown detector: {name}")
+    for name in conditions:
+        if name not in CONDITIONS:
+            raise ValueError(f"Unknown condition: {name}")
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "settings": {"scenes": scenes, "seed": seed, "repeat": repeat},
+        "detectors": {name: {} for name in detectors},
+    }
+    for condition in conditions:
+        prepared = generate_scenes(condition, scenes, seed)
+        for name in detectors:
+            results["detectors"][name][condition] = measure(name, prepared, repeat)
+    return results
+
+
+# ===== BASELINES =====
+def save_results(results, path):
+    """Write results to a JSON file."""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    """Read results written by save_results()."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, max_slowdown=MAX_SLOWDOWN, max_accuracy_drop=MAX_ACCURACY_DROP):
+    """
+    Find regressions against a baseline.
+
+    Only detector/condition pairs present in both are compared.
+
+    Args:
+        results (dict): New results
+        baseline (dict): Baseline results
+        max_slowdown (float): Allowed relative increase in ms per frame
+        max_accuracy_drop (float): Allowed absolute drop in exact-match rate
+
+    Returns:
+        list: Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for detector, conditions in results["detectors"].items():
+        for condition, new in conditions.items():
+            old = baseline.get("detectors", {}).get(detector, {}).get(condition)
+            if old is None:
+                continue
+            label = f"{detector}/{condition}"
+            if new["ms_per_frame"] > old["ms_per_frame"] * (1 + max_slowdown):
+                regressions.append(f"{label}: {old['ms_per_frame']:.2f} -> "
+                                   f"{new['ms_per_frame']:.2f} ms/frame")
+            if new["exact"] < old["exact"] - max_accuracy_drop:
+                regressions.append(f"{label}: exact matches {old['exact']:.1%} -> {new['exact']:.1%}")
+    return regressions
+
+
+def format_results(results):
+    """Return results as a human-readable table."""
+    lines = [f"{'detector':<27}{'condition':<14}{'FPS':>8}{'ms/frame':>10}{'p95 ms':>9}"
+             f"{'exact':>8}{'MAE':>7}{'prec':>7}{'recall':>8}"]
+    for detector, conditions in results["detectors"].items():
+        for condition, r in conditions.items():
+            lines.append(f"{detector:<27}{condition:<14}{r['fps']:>8.1f}{r['ms_per_frame']:>10.2f}"
+                         f"{r['p95_ms']:>9.2f}{r['exact']:>8.1%}{r['mae']:>7.2f}"
+                         f"{r['precision']:>7.1%}{r['recall']:>8.1%}")
+    lines.append("")
+    lines.append("ms/frame by blob count (clean scenes):")
+    for detector, conditions in results["detectors"].items():
+        by_blobs = conditions.get("clean", next(iter(conditions.values()), {})).get("by_blobs", {})
+        cells = "  ".join(f"{blobs}:{r['ms_per_frame']:.2f}" for blobs, r in by_blobs.items())
+        lines.append(f"  {detector:<27}{cells}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark symbol and material detection")
+    parser.add_argument("--scenes", type=int, default=52, help="Scenes per condition")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timing passes (fastest kept)")
+    parser.add_argument("--detectors", help="Comma-separated names (default: all)")
+    parser.add_argument("--conditions", help="Comma-separated names (default: all)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    args = parser.parse_args(argv)
+
+    split = lambda value: [name.strip() for name in value.split(",")] if value else None
+    results = run_benchmark(split(args.detectors), split(args.conditions), args.scenes,
+                            args.seed, args.repeat)
+    print(format_results(results))
+    save_results(results, args.output)
+    print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,265 +1,258 @@
 """
 Smart Logistics Bot with Firebase Integration
-- Moves between buildings in a rectangular path
+- Plans the cheapest route through the buildings that need a visit (site_graph.json)
+- Drives the route unattended for the configured laps (mission.json)
 - Captures images and detects symbols
 - Updates Firebase with location and material counts
 - Connects to web dashboard
 """
-import RPi.GPIO as GPIO
-from time import sleep
-import cv2
-import numpy as np
-from picamera2 import Picamera2
 import time
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-# Import Firebase connector
-from firebase_integration import FirebaseConnector
+from startup import StartupOrchestrator
+from metrics import REGISTRY, MetricsServer, collect, merge, timed
+from hardware import SIMULATED, VirtualClock, hardware_backend, load_gpio, run_mission
+from motor_controller import MotorController
+from mission_runner import MissionRunner, load_mission
+from route_planner import RoutePlanner, describe_plan
 
-# --- Create directories for saving images ---
-os.makedirs("captured_images", exist_ok=True)
+# OpenCV, picamera2 and firebase_admin are slow to import on a Pi. They are
+# imported inside the startup phases below, which run concurrently.
 
-# --- Location Tracking ---
-locations = ["Start", "Building A", "Building B", "Building C"]
-current_location_index = 0
+# --- Hardware ---
+# HARDWARE=sim runs the whole mission against simulated motors and camera
+# on a virtual clock, much faster than real time (see hardware.py)
+HARDWARE = hardware_backend()
+clock = VirtualClock() if HARDWARE == SIMULATED else None
+GPIO = load_gpio(HARDWARE, clock)
 
-# --- GPIO Motor Setup ---
-GPIO.setwarnings(False)
-# Right Motor
-in1 = 17
-in2 = 27
-en_a = 4
-# Left Motor
-in3 = 5
-in4 = 6
-en_b = 13
+# --- Route Planning ---
+# Site graph (nodes, edges with headings and travel times, turn durations)
+planner = RoutePlanner.from_file(os.environ.get("SITE_GRAPH", "site_graph.json"))
+current_location = planner.start
 
-GPIO.setmode(GPIO.BCM)
-for pin in [in1, in2, en_a, in3, in4, en_b]:
-    GPIO.setup(pin, GPIO.OUT)
+# Route and lap count for this run (see mission_runner.py)
+mission = load_mission(os.environ.get("MISSION", "mission.json"))
 
-# Initialize PWM with moderate speed
-pwm_a = GPIO.PWM(en_a, 100)
-pwm_b = GPIO.PWM(en_b, 100)
-pwm_a.start(75)
-pwm_b.start(75)
+# Buildings to visit this run, e.g. VISIT="Building A,Building C" (default: the mission's)
+VISIT = [name.strip() for name in os.environ.get("VISIT", "").split(",") if name.strip()] or mission["visit"]
 
-# --- Initialize Firebase ---
-print("Initializing Firebase connection...")
-firebase = FirebaseConnector()
-if firebase.connected:
-    firebase.initialize_data()
-    print("Firebase connected and initialized")
-else:
-    print("Firebase connection failed. Will log data locally only.")
+# Times to drive the route, e.g. LAPS=3 (default: the mission's)
+LAPS = int(os.environ.get("LAPS", mission["laps"]))
 
-# --- Motor Control Functions ---
-def stop_car():
-    """Stop the car by setting all motor control pins to LOW."""
-    GPIO.output(in1, GPIO.LOW)
-    GPIO.output(in2, GPIO.LOW)
-    GPIO.output(in3, GPIO.LOW)
-    GPIO.output(in4, GPIO.LOW)
-    print("Car stopped")
-    # Short pause to ensure the bot is completely stopped
-    sleep(0.3)
+# Region of interest (x, y, w, h) for symbol detection - adjust as needed
+DETECTION_ROI = (100, 100, 440, 280)
 
-def move_car(duration=3):
-    """Move forward for a set duration then stop."""
-    # Forward motion configuration
-    GPIO.output(in1, GPIO.HIGH)  # Right motor forward
-    GPIO.output(in2, GPIO.LOW)
-    GPIO.output(in4, GPIO.HIGH)  # Left motor forward
-    GPIO.output(in3, GPIO.LOW)
-    
-    print("Moving forward...")
-    sleep(duration)
-    stop_car()
+# Frames captured back-to-back at each checkpoint; counts are fused across them
+BURST_FRAMES = 5
 
-def turn_right(duration=1.5):
-    """
-    Turn right by activating only one set of wheels.
-    Based on the provided snippet.
-    """
-    # First come to a complete stop
-    stop_car()
+# --- GPIO Motor Setup ---
+MOTOR_PINS = {
+    "in1": 17, "in2": 27, "en_a": 4,   # Right motor
+    "in3": 5, "in4": 6, "en_b": 13,    # Left motor
+}
+
+# --- Startup Phases ---
+def init_gpio():
+    """Configure the motor pins and start PWM with moderate speed."""
+    motors = MotorController(GPIO, MOTOR_PINS, speed=75)
+    motors.setup()
+    return motors
+
+def init_camera():
+    """Open the camera and wait until its exposure has settled."""
+    from frame_source import open_source
+    
+    # FRAME_SOURCE can point at recorded data instead, e.g. "dir:captured_images"
+    default_source = "sim" if HARDWARE == SIMULATED else "picamera2"
+    source = open_source(os.environ.get("FRAME_SOURCE", default_source))
+    if not source.open():
+        raise RuntimeError("Could not open camera")
+    return source
+
+def init_detection_worker():
+    """Load the detection code and its color lookup table in a pool worker."""
+    from symbol_detection import get_red_classifier
+    get_red_classifier()
+
+def init_vision():
+    """Load the detection code and start the image writer."""
+    from symbol_detection import RoiCache
+    from image_persistence import ImageWriter
     
-    # Right turn configuration from your snippet
-    GPIO.output(in1, GPIO.LOW)   # Right motor backward
-    GPIO.output(in2, GPIO.HIGH)
-    GPIO.output(in3, GPIO.LOW)   # Left motor stopped
-    GPIO.output(in4, GPIO.LOW)
+    # Images are encoded and written in the background so the bot doesn't wait on the SD card
+    writer = ImageWriter(max_queue=8, workers=1, policy="block", fsync_every=4)
     
-    print("Turning right...")
-    sleep(duration)
+    # Per-location ROIs learned from previous detections (starts from DETECTION_ROI)
+    cache = RoiCache("roi_cache.json", default_roi=DETECTION_ROI)
+    return writer, cache
+
+def init_preview():
+    """Start the live preview (headless: view at http://<bot-ip>:8080/)."""
+    from preview_server import PreviewServer
     
-    # Return to stop state
-    stop_car()
+    server = PreviewServer(port=8080)
+    server.start()
+    return server
+
+def init_firebase():
+    """Connect to Firebase (the connector also checks the database structure)."""
+    from firebase_integration import FirebaseConnector
+    from telemetry_publisher import TelemetryPublisher
+    from material_history import MaterialHistory
+    
+    # FIREBASE_EMULATOR runs against an in-process database instead,
+    # e.g. "latency=0.2,failure_rate=0.1" (see rtdb_emulator.py). Simulated
+    # runs always use it, with partitions scheduled in simulated time.
+    database = None
+    if os.environ.get("FIREBASE_EMULATOR") or clock:
+        from rtdb_emulator import emulator_from_spec
+        database = emulator_from_spec(os.environ.get("FIREBASE_EMULATOR", "on"),
+                                      **({"clock": clock.now} if clock else {}))
+    
+    # BOT_ID enables fleet mode: state goes under bots/<BOT_ID>/
+    connector = FirebaseConnector(database=database, bot_id=os.environ.get("BOT_ID"))
+    if connector.connected:
+        print("Firebase connected and initialized")
+    else:
+        print("Firebase connection failed. Will log data locally only.")
+    
+    # Firebase writes go through a background publisher so the bot never waits on the network
+    publisher = TelemetryPublisher(connector)
+    
+    # Per-location, per-run history; older runs beyond the last 10 are pruned
+    run_history = MaterialHistory(recent_runs=connector.read("history/rollups/recentRuns"))
+    publisher.update(run_history.start_run())
+    return connector, publisher, run_history
+
+# Detection runs on all four Pi cores. "fork" keeps workers from re-running
+# this script's hardware setup, they only need symbol_detection. The workers
+# are forked here, while this is still the only thread: a fork after the
+# startup phases have started the writer, preview, publisher and health
+# threads could copy a lock one of them holds and deadlock the worker.
+detection_pool = ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context("fork"),
+                                     initializer=init_detection_worker)
+# A fork pool starts every worker on its first submit; they load OpenCV and
+# the color lookup table while the startup phases run
+detection_pool.submit(os.getpid)
+
+# Camera warm-up, Firebase connection and detection setup overlap instead of
+# running one after another
+print("Starting up...")
+startup = StartupOrchestrator()
+startup.add_phase("gpio", init_gpio)
+startup.add_phase("camera", init_camera)
+startup.add_phase("vision", init_vision)
+# Only a debugging aid: if the port is taken the mission runs without it
+startup.add_phase("preview", init_preview, required=False)
+startup.add_phase("firebase", init_firebase)
+try:
+    phases = startup.run()
+except RuntimeError as e:
+    print(startup.report())
+    GPIO.cleanup()
+    detection_pool.shutdown()
+    raise SystemExit(f"Error: Startup failed ({e})")
+print(startup.report())
 
-# --- Initialize Camera ---
-print("Initializing camera...")
-picam2 = Picamera2()
-picam2.preview_configuration.main.size = (640, 480)
-picam2.preview_configuration.main.format = "RGB888"
-picam2.configure("preview")
-picam2.start()
-time.sleep(2)  # Camera warm-up time
-print("Camera initialized")
+motors = phases["gpio"]
+camera = phases["camera"]
+image_writer, roi_cache = phases["vision"]
+preview = phases["preview"]
+firebase, telemetry, history = phases["firebase"]
 
 # --- Image Processing Functions ---
-def capture_and_process_image():
-    """Capture a single image and process it to detect symbols."""
-    global current_location_index
-    location = locations[current_location_index]
+@timed("checkpoint_capture")
+def capture_checkpoint(location, burst=BURST_FRAMES):
+    """
+    Capture a burst of images at a checkpoint and start detecting them.
+    
+    Only the camera reads happen here, so the bot can drive on as soon as
+    this returns. Each frame is handed to the process pool as it arrives;
+    candidates are found on a downscaled image and only small crops are
+    classified at full resolution.
     
-    print(f"\nProcessing image at {location}...")
+    Args:
+        location (str): Checkpoint the frames are taken at
+        burst (int): Number of frames to capture (1 = single frame)
     
-    # Capture a single frame
-    frame = picam2.capture_array()
+    Returns:
+        dict: Frames, detection futures, ROI and capture time (ms)
+    """
+    from symbol_detection import detect_symbols_coarse_to_fine
+    
+    # Search only the window where symbols have been seen at this location
+    roi = roi_cache.get(location)
+    
+    frames, futures = [], []
+    for _ in range(burst):
+        ok, frame = camera.read()
+        if not ok:
+            raise RuntimeError("Failed to capture frame")
+        frames.append(frame)
+        # Spans recorded in the worker process come back with the result
+        futures.append(detection_pool.submit(collect, detect_symbols_coarse_to_fine, frame, roi))
+    print(f"Captured {burst} frame(s) at {location}")
+    return {"frames": frames, "futures": futures, "roi": roi,
+            "timestamp": int(time.time() * 1000)}
+
+@timed("checkpoint_process")
+def process_checkpoint(location, captured):
+    """
+    Finish a checkpoint: fuse the detections, save the images and upload.
+    
+    Runs in the background while the bot drives to the next stop. The
+    frames of a burst are fused, so a single blurred or badly lit frame
+    doesn't decide the published numbers.
+    
+    Args:
+        location (str): Checkpoint the frames were taken at
+        captured (dict): Result of capture_checkpoint()
+    
+    Returns:
+        dict: Material counts
+    """
+    import cv2
+    from symbol_detection import fuse_results, annotate_frame, to_material_counts
+    
+    frames, roi, captured_at = captured["frames"], captured["roi"], captured["timestamp"]
+    
+    # Fuse the per-frame counts
+    results = []
+    for future in captured["futures"]:
+        result, samples = future.result()
+        merge(samples)
+        results.append(result)
+    fused = fuse_results(results)
+    symbol_counts = fused["counts"]
+    print(f"\nFused {len(frames)} frame(s) from {location}, confidence {fused['confidence']:.0%}")
+    
+    # Keep the frame that best matches the fused counts
+    frame = frames[fused["frame_index"]]
+    result = {"counts": symbol_counts, "symbols": results[fused["frame_index"]]["symbols"]}
+    roi_cache.update(location, result, roi)
     
     # Save original image
-    timestamp = int(time.time())
+    timestamp = captured_at // 1000
     filename = f"captured_images/{location.replace(' ', '_')}_{timestamp}.jpg"
-    cv2.imwrite(filename, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-    print(f"Image saved as {filename}")
-    
-    # Define ROI - adjust these values as needed
-    roi_x, roi_y, roi_w, roi_h = 100, 100, 440, 280
-    
-    # Draw the ROI rectangle on the full frame
-    cv2.rectangle(frame, (roi_x, roi_y), (roi_x + roi_w, roi_y + roi_h), (0, 255, 0), 2)
-    
-    # Extract the ROI for symbol detection
-    roi = frame[roi_y:roi_y + roi_h, roi_x:roi_x + roi_w]
-    
-    # Convert ROI to HSV color space to segment red symbols
-    hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-    
-    # Define two red ranges in HSV (red wraps around the hue boundaries)
-    lower_red1 = np.array([0, 100, 100])
-    upper_red1 = np.array([10, 255, 255])
-    lower_red2 = np.array([160, 100, 100])
-    upper_red2 = np.array([179, 255, 255])
-    
-    mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-    mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-    red_mask = cv2.bitwise_or(mask1, mask2)
-    
-    # Use morphological operations to reduce noise
-    kernel = np.ones((5, 5), np.uint8)
-    red_mask = cv2.morphologyEx(red_mask, cv2.MORPH_OPEN, kernel)
-    
-    # Find contours on the masked image
-    contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Map symbols to material categories
-    symbol_counts = {
-        "Circle": 0,  # dispatchReady
-        "Triangle": 0,  # eWaste
-        "Square": 0,  # damaged
-        "X": 0        # rawMaterials
-    }
-    
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if area < 300:  # Filter out small noise
-            continue
-        
-        # Calculate perimeter and approximate the contour shape
-        peri = cv2.arcLength(cnt, True)
-        approx = cv2.approxPolyDP(cnt, 0.04 * peri, True)
-        shape_name = None
-
-        # Shape classification using contour approximation
-        if len(approx) == 3:
-            shape_name = "Triangle"
-        elif len(approx) == 4:
-            # Determine if the quadrilateral is a square (check aspect ratio)
-            x, y, w, h = cv2.boundingRect(approx)
-            ratio = float(w) / h
-            if 0.9 <= ratio <= 1.1:
-                shape_name = "Square"
-            else:
-                shape_name = "Square"  # For this prototype, treat all quadrilaterals as squares
-        elif len(approx) > 4:
-            # Use circularity measure
-            circularity = 4 * np.pi * area / (peri * peri)
-            if circularity > 0.75:
-                shape_name = "Circle"
-            else:
-                # Try to detect "X" by checking for crossing lines
-                x, y, w, h = cv2.boundingRect(cnt)
-                symbol_roi = red_mask[y:y+h, x:x+w]
-                
-                # Edge detection on the symbol ROI
-                edges = cv2.Canny(symbol_roi, 50, 150)
-                lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=20, 
-                                       minLineLength=0.5 * min(w, h), maxLineGap=10)
-                if lines is not None and len(lines) >= 2:
-                    # Calculate angles of detected lines (in degrees)
-                    angles = []
-                    for line in lines:
-                        x1, y1, x2, y2 = line[0]
-                        angle = np.degrees(np.arctan2(y2 - y1, x2 - x1))
-                        angles.append(angle)
-                    # Look for two lines with a significant angle difference
-                    found_x = False
-                    for i in range(len(angles)):
-                        for j in range(i + 1, len(angles)):
-                            diff = abs(angles[i] - angles[j])
-                            if 40 < diff < 140:
-                                found_x = True
-                                break
-                        if found_x:
-                            break
-                    if found_x:
-                        shape_name = "X"
-                    else:
-                        shape_name = "Circle"  # Fallback classification
-                else:
-                    shape_name = "Circle"
-        
-        # Update the count if the shape is classified
-        if shape_name:
-            symbol_counts[shape_name] += 1
-            # Draw the contour and label on the ROI for visualization
-            cv2.drawContours(roi, [approx], -1, (0, 255, 0), 2)
-            # Get the centroid for better label positioning
-            M = cv2.moments(cnt)
-            if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-                # Position the label near the centroid
-                cv2.putText(roi, shape_name, (cx - 30, cy), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-    # Display the counts on the frame
-    y0, dy = 30, 30
-    for i, (shape, count) in enumerate(symbol_counts.items()):
-        text = f"{shape}: {count}"
-        cv2.putText(frame, text, (10, y0 + i * dy), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+    image_writer.submit(filename, frame)
+    print(f"Image queued as {filename}")
     
-    # Add location text to the image
-    cv2.putText(frame, f"Location: {location}", (10, 150), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+    # Draw the detection results
+    annotate_frame(frame, result, location, roi)
     
     # Save the annotated image
     annotated_filename = f"captured_images/{location.replace(' ', '_')}_{timestamp}_annotated.jpg"
-    cv2.imwrite(annotated_filename, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    image_writer.submit(annotated_filename, frame)
     
-    # Display the image with a 3-second pause
-    cv2.imshow("Material Detection", frame)
-    cv2.waitKey(3000)
-    cv2.destroyAllWindows()
+    # Publish the annotated image to the live preview (doesn't wait for viewers)
+    if preview:
+        preview.publish(frame, cv2.COLOR_RGB2BGR)
     
     # Convert symbol counts to material categories for Firebase integration
-    material_counts = {
-        "dispatchReady": symbol_counts["Circle"],
-        "damaged": symbol_counts["Square"],
-        "eWaste": symbol_counts["Triangle"],
-        "rawMaterials": symbol_counts["X"]
-    }
+    material_counts = to_material_counts(symbol_counts)
     
     # Log the results
     print(f"\nDetection Results at {location}:")
@@ -269,108 +262,81 @@ def capture_and_process_image():
     print(f"  - Raw Materials (X): {material_counts['rawMaterials']}")
     
     # Update Firebase with material counts
-    update_firebase_data(location, material_counts)
+    update_firebase_data(location, material_counts, captured_at)
     
     return material_counts
 
-def update_firebase_data(location, material_counts):
-    """Update Firebase with location and material data."""
-    if not firebase.connected:
-        # Log locally if Firebase connection failed
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"{timestamp} - {location}: {material_counts}\n"
-        with open("material_logs.txt", "a") as log_file:
-            log_file.write(log_entry)
-        print("Data logged locally only (Firebase not connected)")
-        return
-    
-    # Update Firebase
-    firebase.update_location(location)
-    firebase.update_materials(material_counts)
-    print("Data sent to Firebase dashboard")
-
-def navigate_to_next_checkpoint():
+def update_firebase_data(location, material_counts, captured_at=None):
     """
-    Navigate from current location to the next, following the rectangular path in the diagram.
-    Path: Start → Building A → Building B → Building C → Start
+    Update Firebase with the material data of a checkpoint.
+    
+    The bot has usually moved on by the time a checkpoint is uploaded, so
+    the current location is left to the arrival updates; the checkpoint is
+    recorded under its own location and capture time.
     """
-    global current_location_index
-    
-    # Get current location and determine next location
-    current = locations[current_location_index]
-    next_index = (current_location_index + 1) % len(locations)
-    next_location = locations[next_index]
-    
-    print(f"\nNavigating from {current} to {next_location}...")
-    
-    # Following the rectangular path shown in the diagram
-    if current == "Start" and next_location == "Building A":
-        # Start → Building A: Move forward
-        print("Path: Start → Building A (moving forward)")
-        move_car(3)
-    
-    elif current == "Building A" and next_location == "Building B":
-        # Building A → Building B: Move right
-        print("Path: Building A → Building B (turning right, then moving forward)")
-        turn_right(1.5)  # Using your turning logic
-        move_car(3)
-    
-    elif current == "Building B" and next_location == "Building C":
-        # Building B → Building C: Move down
-        print("Path: Building B → Building C (turning right, then moving forward)")
-        turn_right(1.5)  # Using your turning logic
-        move_car(3)
-    
-    elif current == "Building C" and next_location == "Start":
-        # Building C → Start: Move left
-        print("Path: Building C → Start (turning right, then moving forward)")
-        turn_right(1.5)  # Using your turning logic
-        move_car(3)
-    
-    # Update the current location
-    current_location_index = next_index
-    print(f"Arrived at {next_location}")
-    
-    # Update Firebase with new location immediately
+    # Materials, checkpoint and timestamp in one request. Every write goes into
+    # the telemetry log first, so it is uploaded later if Firebase is offline.
+    # The per-location history and its rollups go out in the same update.
+    captured_at = captured_at or int(time.time() * 1000)
+    updates = history.checkpoint(location, material_counts, captured_at)
+    updates.update({
+        'lastCheckpoint': location,
+        'detectedMaterials': material_counts,
+        'lastUpdate': captured_at
+    })
+    telemetry.update(updates)
     if firebase.connected:
-        firebase.update_location(next_location)
-    
-    sleep(1)  # Pause briefly at the new location
+        print("Data queued for Firebase dashboard")
+    else:
+        print("Data logged locally (will upload when Firebase is connected)")
+
+def arrive(location):
+    """Publish the bot's new location as soon as it arrives."""
+    global current_location
+    current_location = location
+    if firebase.connected:
+        telemetry.update_location(location)
 
 # --- Main Execution Logic ---
+# Per-stage latency histograms for Prometheus (http://<bot-ip>:9110/metrics)
+metrics_server = MetricsServer(port=int(os.environ.get("METRICS_PORT", 9110)))
+metrics_server.start()
+
 try:
     print("\n==== Smart Logistics Bot with Firebase Integration Started ====")
-    print(f"Current location: {locations[current_location_index]}")
+    print(f"Current location: {current_location}")
     
     # Update Firebase with initial location
     if firebase.connected:
-        firebase.update_location(locations[current_location_index])
+        telemetry.update_location(current_location)
+    
+    # Cheapest tour through the buildings that need a visit, and back to the start
+    plan, estimate = planner.motion_plan(VISIT)
+    stops = [step["location"] for step in plan if step["action"] == "arrive" and step["visit"]]
+    print(f"Route: {' → '.join([planner.start] + stops + [planner.start])} "
+          f"(about {estimate:.1f} s of driving)")
+    for line in describe_plan(plan):
+        print(f"  {line}")
     
     print("Press Ctrl+C to stop the program at any time")
     
-    # Ask user to confirm before starting movement
-    input("Press Enter to begin the route...")
-    
-    # Navigate through the full rectangular path
-    # We need 4 moves to complete the full circuit: Start→A→B→C→Start
-    for i in range(4):  # 4 segments in the rectangular path
-        current = locations[current_location_index]
-        
-        # Process at each location except Start
-        if current != "Start":
-            capture_and_process_image()
-        else:
-            print("\nAt Start location - no processing needed")
-        
-        # Optional: Uncomment to require user confirmation between movements
-        # input(f"Press Enter to move from {current} to next location...")
-        
-        # Move to next location (skip after completing the full circuit)
-        if i < 3:  # Stop after returning to Start
-            navigate_to_next_checkpoint()
-    
-    print("\n==== Full route completed! ====")
-    print("The bot has returned to the Start position")
+    # Each stop is only captured there; detection and uploads finish in the
+    # background while the bot drives on
+    runner = MissionRunner(motors, plan, capture_checkpoint, process_checkpoint,
+                           laps=LAPS, capture_delay=mission["capture_delay"],
+                           max_pending=mission["max_pending"], on_arrive=arrive)
+    report = run_mission(runner.run(), clock)
+    
+    print("\n==== Mission completed! ====")
+    print(f"The bot has returned to the {planner.start} position")
+    print(f"Laps: {report['laps']}, lap times: "
+          f"{', '.join(f'{seconds:.1f} s' for seconds in report['lap_times'])}")
+    print(f"Checkpoints processed: {report['checkpoints']} ({report['errors']} failed), "
+          f"waited {report['backlog_waits']:.1f} s for processing")
+    if clock:
+        timing = clock.report()
+        print(f"Simulated {timing['simulated']:.1f} s in {timing['wall']:.1f} s real time "
+              f"({timing['cpu']:.1f} s CPU, {timing['speedup']:.0f}x faster than real time)")
 
 except KeyboardInterrupt:
     print("\n\nProgram interrupted by user")
@@ -380,7 +346,19 @@ except Exception as e:
 
 finally:
     # Clean up
-    stop_car()
+    motors.stop_now()
     GPIO.cleanup()
-    cv2.destroyAllWindows()
+    image_writer.close(timeout=10)
+    telemetry.close(timeout=10)
+    firebase.close()
+    detection_pool.shutdown()
+    camera.close()
+    if preview:
+        preview.stop()
+    metrics_server.stop()
+    
+    # Where the time went, also kept in a file for later comparison
+    print("\nStage latencies:")
+    print(REGISTRY.format_summary())
+    REGISTRY.dump(os.environ.get("METRICS_DUMP", "metrics.prom"))
     print("\n==== Resources cleaned up, program exited ====") 
\ No newline at end of file
@@ -0,0 +1,325 @@
+"""
+Producer/consumer capture pipeline for Smart Logistics Bot.
+
+A capture thread keeps reading the camera so the driver buffer never fills
+with stale frames, and only the freshest frame is kept. Processing stages
+(detection, telemetry, ...) run on their own threads connected by bounded
+queues, so a slow Firebase call can't stall capture or detection.
+
+Each stage records backpressure metrics: items processed and dropped,
+queue depth, time producers spent blocked on it, and latency measured
+from the moment the frame was captured.
+"""
+
+import collections
+import queue
+import threading
+import time
+
+# What a StageQueue does when it is full
+LATEST_WINS = "latest_wins"  # Drop the oldest item, the newest one always gets in
+BLOCK = "block"              # Producer waits for space
+
+_STOP = object()
+
+
+class Packet:
+    """
+    A frame (or a result derived from it) moving through the pipeline.
+
+    Attributes:
+        seq (int): Capture sequence number
+        captured_at (float): time.monotonic() when the frame was read
+        frame: The captured frame
+        data: Stage-specific payload
+    """
+
+    __slots__ = ("seq", "captured_at", "frame", "data")
+
+    def __init__(self, seq, captured_at, frame=None, data=None):
+        self.seq = seq
+        self.captured_at = captured_at
+        self.frame = frame
+        self.data = data
+
+    def derive(self, data, keep_frame=False):
+        """Create a downstream packet that keeps this packet's capture time."""
+        return Packet(self.seq, self.captured_at, self.frame if keep_frame else None, data)
+
+
+class StageQueue:
+    """
+    Bounded queue between two stages with an explicit overflow policy.
+
+    Attributes:
+        dropped (int): Items discarded because the queue was full
+        max_depth (int): Deepest the queue has been
+        blocked_time (float): Seconds producers spent waiting for space
+    """
+
+    def __init__(self, maxsize=1, policy=LATEST_WINS):
+        """
+        Args:
+            maxsize (int): Maximum items held (1 = latest frame only)
+            policy (str): LATEST_WINS or BLOCK
+        """
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.max_depth = 0
+        self.blocked_time = 0.0
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Add an item, dropping the oldest or blocking as the policy says."""
+        with self._cond:
+            if len(self._items) >= self.maxsize and item is not _STOP:
+                if self.policy == LATEST_WINS:
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    start = time.monotonic()
+                    while len(self._items) >= self.maxsize:
+                        self._cond.wait()
+                    self.blocked_time += time.monotonic() - start
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, or raise queue.Empty on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def depth(self):
+        """Return the number of queued items."""
+        with self._cond:
+            return len(self._items)
+
+
+class StageMetrics:
+    """Counters and latency statistics for one pipeline stage."""
+
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+
+    def record(self, latency, busy):
+        self.processed += 1
+        self.busy_time += busy
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._latency_total += latency
+
+    @property
+    def mean_latency(self):
+        return self._latency_total / self.processed if self.processed else None
+
+
+class FrameGrabber:
+    """
+    Capture thread that always holds only the freshest frame.
+
+    Attributes:
+        captured (int): Frames read from the camera
+        failures (int): Consecutive failed reads
+        output (StageQueue): Single-slot latest-frame-wins queue
+    """
+
+    def __init__(self, read_frame, max_failures=10):
+        """
+        Args:
+            read_frame: Callable returning (ok, frame), e.g. cv2.VideoCapture.read
+            max_failures (int): Stop after this many consecutive failed reads
+        """
+        self.read_frame = read_frame
+        self.max_failures = max_failures
+        self.captured = 0
+        self.failures = 0
+        self.output = StageQueue(maxsize=1, policy=LATEST_WINS)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while self._running:
+            ok, frame = self.read_frame()
+            if not ok:
+                self.failures += 1
+                if self.failures >= self.max_failures:
+                    print("Error: Failed to capture frame, stopping capture")
+                    break
+                time.sleep(0.01)
+                continue
+            self.failures = 0
+            self.captured += 1
+            self.output.put(Packet(self.captured, time.monotonic(), frame))
+        self.output.put(_STOP)
+
+
+class Stage:
+    """
+    A processing stage running on its own thread.
+
+    The handler is called with each input Packet and may return a Packet
+    (or a list of them) for the next stage, or None.
+    """
+
+    def __init__(self, name, handler, input_queue, output_queue=None):
+        """
+        Args:
+            name (str): Stage name used in metrics
+            handler: Callable(packet) -> Packet, list of Packets or None
+            input_queue (StageQueue): Where packets come from
+            output_queue (StageQueue): Where results go, if any
+        """
+        self.name = name
+        self.handler = handler
+        self.input = input_queue
+        self.output = output_queue
+        self.metrics = StageMetrics()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            packet = self.input.get()
+            if packet is _STOP:
+                if self.output is not None:
+                    self.output.put(_STOP)
+                return
+
+            start = time.monotonic()
+            try:
+                results = self.handler(packet)
+            except Exception as e:
+                self.metrics.errors += 1
+                print(f"Error in {self.name} stage: {e}")
+                continue
+            end = time.monotonic()
+            self.metrics.record(end - packet.captured_at, end - start)
+
+            if results is None or self.output is None:
+                continue
+            if isinstance(results, Packet):
+                results = [results]
+            for result in results:
+                self.output.put(result)
+
+
+class CapturePipeline:
+    """
+    A FrameGrabber followed by a chain of stages.
+
+    Example:
+        pipeline = CapturePipeline(cap.read)
+        pipeline.add_stage("detection", detect)
+        pipeline.add_stage("telemetry", upload, maxsize=16, policy=BLOCK)
+        pipeline.start()
+    """
+
+    def __init__(self, read_frame):
+        self.grabber = FrameGrabber(read_frame)
+        self.stages = []
+
+    def add_stage(self, name, handler, maxsize=1, policy=LATEST_WINS):
+        """
+        Append a stage fed by a new queue.
+
+        The first stage reads the grabber's latest-frame slot; maxsize and
+        policy configure the queue between the previous stage and this one.
+        """
+        if self.stages:
+            input_queue = StageQueue(maxsize, policy)
+            self.stages[-1].output = input_queue
+        else:
+            input_queue = self.grabber.output
+        stage = Stage(name, handler, input_queue)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        self.grabber.start()
+
+    @property
+    def running(self):
+        return self.grabber.alive
+
+    def stop(self, timeout=5):
+        """Stop capture and let every stage drain its queue."""
+        self.grabber.stop()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def metrics(self):
+        """
+        Return a snapshot of per-stage backpressure metrics.
+
+        Returns:
+            dict: Stage name -> metrics dict (latencies in milliseconds)
+        """
+        grabber_queue = self.grabber.output
+        snapshot = {"capture": {
+            "captured": self.grabber.captured,
+            "dropped": grabber_queue.dropped,
+        }}
+        for stage in self.stages:
+            m = stage.metrics
+            snapshot[stage.name] = {
+                "processed": m.processed,
+                "errors": m.errors,
+                "input_dropped": stage.input.dropped,
+                "queue_depth": stage.input.depth(),
+                "max_queue_depth": stage.input.max_depth,
+                "producer_blocked_ms": stage.input.blocked_time * 1000,
+                "busy_ms": m.busy_time * 1000,
+                "last_latency_ms": None if m.last_latency is None else m.last_latency * 1000,
+                "mean_latency_ms": None if m.mean_latency is None else m.mean_latency * 1000,
+                "max_latency_ms": m.max_latency * 1000,
+            }
+        return snapshot
+
+    def format_metrics(self):
+        """Return the metrics as a short human-readable summary."""
+        snapshot = self.metrics()
+        lines = [f"capture: {snapshot['capture']['captured']} frames, "
+                 f"{snapshot['capture']['dropped']} superseded"]
+        for stage in self.stages:
+            m = snapshot[stage.name]
+            latency = m["mean_latency_ms"]
+            latency = "-" if latency is None else f"{latency:.1f} ms"
+            lines.append(f"{stage.name}: {m['processed']} processed, "
+                         f"{m['input_dropped']} dropped, depth {m['queue_depth']}"
+                         f"/{m['max_queue_depth']} max, latency {latency}")
+        return "\n".join(lines)
@@ -0,0 +1,236 @@
+"""
+Color classification lookup table for Smart Logistics Bot.
+
+Compiles a set of HSV threshold ranges into a quantized color -> class
+lookup table once, so per-frame segmentation is a single table lookup per
+pixel instead of a full-frame cvtColor plus one inRange per range. Tables
+are cached on disk and only rebuilt when the thresholds change.
+"""
+
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+from metrics import span, timed
+
+# Bits kept per color channel (6 bits -> 64 levels, 256 KB table)
+DEFAULT_BITS = 6
+
+# Where compiled tables are stored between runs
+DEFAULT_CACHE_DIR = ".color_lut_cache"
+
+# Label value for pixels that match no class
+BACKGROUND = 0
+
+# Bump when the table layout changes so old cache files are ignored
+LUT_VERSION = 1
+
+
+def _normalize_ranges(ranges):
+    """
+    Normalize class ranges to {name: [(lower, upper), ...]}.
+
+    Each class may be given as a single (lower, upper) pair, as used by
+    HSV_RANGES in raspberry_pi_integration.py, or as a list of pairs for
+    colors that wrap around the hue boundary (e.g. red).
+    """
+    normalized = {}
+    for name, bands in ranges.items():
+        bands = list(bands)
+        if np.isscalar(bands[0][0]):
+            bands = [bands]
+        normalized[name] = [(tuple(int(v) for v in lower), tuple(int(v) for v in upper))
+                            for lower, upper in bands]
+    return normalized
+
+
+class ColorClassifier:
+    """
+    Classify pixels into color classes with a precomputed lookup table.
+
+    Class labels are 1-based in the order the ranges are given; 0 means
+    background. Where ranges overlap, the first matching class wins.
+
+    Attributes:
+        classes (list): Class names, index i has label i + 1
+        bits (int): Bits kept per color channel
+        table (numpy.ndarray): Flat lookup table of class labels
+    """
+
+    def __init__(self, ranges, bits=DEFAULT_BITS, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Compile (or load from cache) the lookup table for the given ranges.
+
+        Args:
+            ranges (dict): Class name -> (lower, upper) HSV bounds, or a list of them
+            bits (int): Bits kept per color channel (1-8)
+            cache_dir (str): Directory for cached tables, or None to disable caching
+        """
+        self.ranges = _normalize_ranges(ranges)
+        self.classes = list(self.ranges)
+        self.bits = bits
+        self.cache_dir = cache_dir
+
+        self._shift = 8 - bits
+
+        self.table = self._load_or_build()
+        self._mask_tables = {}
+
+    def _cache_key(self):
+        """Hash of everything that affects the table contents."""
+        payload = json.dumps({"ranges": self.ranges, "bits": self.bits,
+                              "version": LUT_VERSION}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def _load_or_build(self):
+        """Load the table from the cache, building and saving it if needed."""
+        cache_path = None
+        if self.cache_dir:
+            cache_path = os.path.join(self.cache_dir, f"lut_{self._cache_key()}.npy")
+            if os.path.exists(cache_path):
+                try:
+                    table = np.load(cache_path)
+                    if table.shape == ((1 << self.bits) ** 3,):
+                        return table
+                except (OSError, ValueError):
+                    pass  # Corrupt cache file, rebuild below
+
+        table = self._build_table()
+
+        if cache_path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Per-process name: detection workers may build the table at the same time
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, table)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"Warning: could not cache color lookup table: {e}")
+        return table
+
+    def _build_table(self):
+        """Evaluate the HSV ranges at the center of every quantized color cell."""
+        n = 1 << self.bits
+        step = 256 // n
+        centers = (np.arange(n) * step + step // 2).astype(np.uint8)
+
+        # Every quantized color as one (n^3 x 1) image, in table index order
+        c0, c1, c2 = np.meshgrid(centers, centers, centers, indexing="ij")
+        colors = np.stack([c0.ravel(), c1.ravel(), c2.ravel()], axis=-1)[:, np.newaxis, :]
+        hsv = cv2.cvtColor(colors, cv2.COLOR_BGR2HSV)
+
+        table = np.full(n ** 3, BACKGROUND, dtype=np.uint8)
+        # Assign in reverse so the first matching class wins on overlaps
+        for label in range(len(self.classes), 0, -1):
+            for lower, upper in self.ranges[self.classes[label - 1]]:
+                hit = cv2.inRange(hsv, np.array(lower), np.array(upper)).ravel() > 0
+                table[hit] = label
+        return table
+
+    def _index(self, image):
+        """Compute the table index of every pixel (in-place ops keep this cheap)."""
+        quantized = image >> self._shift
+        index = quantized[..., 0].astype(np.uint32)
+        index <<= self.bits
+        index |= quantized[..., 1]
+        index <<= self.bits
+        index |= quantized[..., 2]
+        return index
+
+    def label_of(self, name):
+        """Return the integer label used for a class name."""
+        return self.classes.index(name) + 1
+
+    def classify(self, image):
+        """
+        Build a class label image.
+
+        Args:
+            image: H x W x 3 uint8 image in the same channel order the
+                ranges were written for (BGR, as passed to cv2.COLOR_BGR2HSV)
+
+        Returns:
+            numpy.ndarray: H x W uint8 label image (0 = background)
+        """
+        with span("color_classify"):
+            return self.table.take(self._index(image))
+
+    def mask(self, image, name=None):
+        """
+        Build a binary mask (0/255) for one class, or for any class if name is None.
+
+        Args:
+            image: H x W x 3 uint8 image
+            name (str): Class name to select
+
+        Returns:
+            numpy.ndarray: H x W uint8 mask
+        """
+        mask_table = self._mask_tables.get(name)
+        if mask_table is None:
+            if name is None:
+                hit = self.table != BACKGROUND
+            else:
+                hit = self.table == self.label_of(name)
+            mask_table = np.where(hit, 255, 0).astype(np.uint8)
+            self._mask_tables[name] = mask_table
+
+        with span("color_classify"):
+            return mask_table.take(self._index(image))
+
+
+@timed("label_components")
+def label_components(labels, num_classes, min_area=0):
+    """
+    Find connected blobs of every class in a label image with one pass.
+
+    Pixels where two different classes touch are cleared first so that
+    neighbouring blobs of different colors are not merged, then a single
+    8-connected connectedComponentsWithStats call labels all classes at once.
+
+    Args:
+        labels: H x W uint8 label image from ColorClassifier.classify()
+        num_classes (int): Number of classes (labels 1..num_classes)
+        min_area (int): Blobs with area <= min_area pixels are ignored
+
+    Returns:
+        tuple: (counts, blobs) where counts is an array of blob counts indexed
+            by class label (index 0 unused) and blobs is a list of dicts with
+            "label", "area", "bbox" (x, y, w, h) and "centroid" (x, y)
+    """
+    split = labels.copy()
+    fg = labels != BACKGROUND
+    # Clear pixels on the border between two different classes, in all
+    # four neighbour directions so 8-connectivity can't bridge them
+    for dst, src in (
+        ((slice(None), slice(1, None)), (slice(None), slice(None, -1))),
+        ((slice(1, None), slice(None)), (slice(None, -1), slice(None))),
+        ((slice(1, None), slice(1, None)), (slice(None, -1), slice(None, -1))),
+        ((slice(1, None), slice(None, -1)), (slice(None, -1), slice(1, None))),
+    ):
+        edge = (labels[dst] != labels[src]) & fg[dst] & fg[src]
+        split[dst][edge] = BACKGROUND
+
+    n, components, stats, centroids = cv2.connectedComponentsWithStats(
+        (split != BACKGROUND).view(np.uint8), connectivity=8)
+
+    keep = np.flatnonzero(stats[1:, cv2.CC_STAT_AREA] > min_area) + 1
+    counts = np.zeros(num_classes + 1, dtype=np.int64)
+    blobs = []
+    for i in keep:
+        x, y, w, h, area = stats[i]
+        # Each component is a single class after the split; its first pixel
+        # in raster order lies on the top row of its bounding box
+        row = components[y, x:x + w]
+        label = int(split[y, x + int(np.argmax(row == i))])
+        counts[label] += 1
+        blobs.append({
+            "label": label,
+            "area": int(area),
+            "bbox": (int(x), int(y), int(w), int(h)),
+            "centroid": (float(centroids[i][0]), float(centroids[i][1]))
+        })
+    return counts, blobs
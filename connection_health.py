@@ -0,0 +1,183 @@
+"""
+Connection health monitoring for Smart Logistics Bot.
+
+A CircuitBreaker tracks consecutive Firebase failures. Once it opens,
+writes skip the network and go straight to the local telemetry log, so a
+flaky link costs one timeout instead of one per write. A HealthMonitor
+thread probes the connection periodically and, while the breaker is open,
+retries with exponential backoff until Firebase answers again.
+"""
+
+import random
+import threading
+import time
+
+# Breaker states
+CLOSED = "closed"        # Healthy, requests go through
+OPEN = "open"            # Failing, requests short-circuit until the backoff expires
+HALF_OPEN = "half_open"  # One trial request allowed to test recovery
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with exponential backoff between recovery attempts.
+
+    Attributes:
+        state (str): CLOSED, OPEN or HALF_OPEN
+        failures (int): Consecutive failures recorded
+        trips (int): Outages, i.e. times the breaker opened from CLOSED
+    """
+
+    def __init__(self, failure_threshold=3, base_backoff=1.0, max_backoff=60.0, jitter=0.1):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker
+            base_backoff (float): Seconds to wait before the first recovery attempt
+            max_backoff (float): Upper limit on the wait between attempts
+            jitter (float): Random fraction added to each wait
+        """
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._backoff = base_backoff
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Return True if a request may be attempted now.
+
+        An open breaker lets exactly one trial request through (HALF_OPEN)
+        once its backoff has expired.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self._retry_at:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """Close the breaker and reset the backoff."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._backoff = self.base_backoff
+
+    def record_failure(self):
+        """Count a failure, opening the breaker at the threshold or after a failed trial."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self):
+        """Open the breaker immediately (e.g. the initial connection failed)."""
+        with self._lock:
+            self.failures = max(self.failures, self.failure_threshold)
+            self._open()
+
+    def retry_in(self):
+        """Return seconds until the next recovery attempt is allowed (0 if now)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self._retry_at - time.monotonic())
+
+    def _open(self):
+        """Open the breaker and schedule the next attempt (lock held)."""
+        if self.state == CLOSED:
+            self.trips += 1
+        delay = self._backoff * (1 + random.uniform(0, self.jitter))
+        self.state = OPEN
+        self._retry_at = time.monotonic() + delay
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+
+
+class HealthMonitor:
+    """
+    Background thread that keeps a connection's breaker up to date.
+
+    While the breaker is closed the probe runs every probe_interval seconds;
+    while it is open the probe runs as soon as the backoff allows.
+
+    Attributes:
+        probes (int): Probes run
+        recoveries (int): Times the connection came back after being down
+    """
+
+    def __init__(self, probe, breaker, probe_interval=15.0, on_recover=None, on_failure=None):
+        """
+        Args:
+            probe: Callable() -> bool, a cheap request that returns True if
+                the connection works (it may raise on failure)
+            breaker (CircuitBreaker): Breaker updated with the probe results
+            probe_interval (float): Seconds between probes while healthy
+            on_recover: Callable() run after a probe succeeds following an outage
+            on_failure: Callable() run when a probe fails
+        """
+        self.probe = probe
+        self.breaker = breaker
+        self.probe_interval = probe_interval
+        self.on_recover = on_recover
+        self.on_failure = on_failure
+        self.probes = 0
+        self.recoveries = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start probing in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="connection-health", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2):
+        """Stop the probe thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def check(self):
+        """
+        Run one probe now and update the breaker.
+
+        Returns:
+            bool: True if the connection is healthy
+        """
+        was_down = self.breaker.state != CLOSED
+        self.probes += 1
+        try:
+            ok = bool(self.probe())
+        except Exception:
+            ok = False
+
+        if ok:
+            self.breaker.record_success()
+            if was_down:
+                self.recoveries += 1
+                if self.on_recover is not None:
+                    self.on_recover()
+        else:
+            self.breaker.record_failure()
+            if self.on_failure is not None:
+                self.on_failure()
+        return ok
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.breaker.state == OPEN:
+                wait = self.breaker.retry_in()
+            else:
+                wait = self.probe_interval
+            if self._stop.wait(wait):
+                return
+            if self.breaker.allow():
+                self.check()
@@ -6,12 +6,50 @@ with Firebase Realtime Database and update bot location and material counts.
 """
 
 import os
+import copy
 import time
 import json
+import threading
 from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import db
+
+from telemetry_log import RecordRejected, TelemetryLog
+from connection_health import CircuitBreaker, HealthMonitor, CLOSED
+from metrics import count, span
+
+# Fleet mode: each bot's state lives under bots/<bot_id>/, and fleet/<bot_id>
+# mirrors its location and last update so the fleet can be listed cheaply
+BOTS_ROOT = "bots"
+FLEET_ROOT = "fleet"
+FLEET_INDEX_FIELDS = ("currentLocation", "lastUpdate")
+
+# Write-ahead telemetry log directory (see telemetry_log.py)
+DEFAULT_LOG_DIR = "telemetry_log"
+
+# telemetryLogs/<log id>/appliedSeq holds the last telemetry log record whose
+# counter increments reached the database (see FirebaseConnector._skip_applied)
+APPLIED_ROOT = "telemetryLogs"
+
+# Error codes for requests Firebase will never accept, however often they are retried
+REJECTED_CODES = ("INVALID_ARGUMENT",)
+
+# All connectors in a process share one firebase_admin app (and its
+# connection pool); this lock keeps concurrent connectors from racing to create it
+_app_lock = threading.Lock()
+
+# firebase_admin takes seconds to import on a Pi, so it is loaded on the
+# first connection attempt rather than when this module is imported
+firebase_admin = None
+credentials = None
+db = None
+
+def _load_firebase_admin():
+    """Import firebase_admin into this module's namespace on first use."""
+    global firebase_admin, credentials, db
+    if db is None:
+        import firebase_admin as admin
+        from firebase_admin import credentials as admin_credentials
+        from firebase_admin import db as admin_db
+        firebase_admin, credentials, db = admin, admin_credentials, admin_db
 
 class FirebaseConnector:
     """
@@ -19,79 +57,206 @@ class FirebaseConnector:
     
     Attributes:
         connected (bool): Status of Firebase connection
+        bot_id (str): Bot id in fleet mode, or None
+        breaker (CircuitBreaker): Tracks failures; open while Firebase is unreachable
+        health (HealthMonitor): Background prober that reconnects after outages
         service_account_path (str): Path to Firebase service account credentials
         database_url (str): Firebase Realtime Database URL
+        telemetry_log (TelemetryLog): Write-ahead log of every intended write
     """
     
-    def __init__(self, service_account_path="serviceAccountKey.json"):
+    def __init__(self, service_account_path="serviceAccountKey.json", log_dir=None,
+                 database_url=None, database=None, bot_id=None, init_schema=True,
+                 probe_interval=15.0, http_timeout=5, monitor=True,
+                 increment_flush_ticks=5, increment_flush_interval=5.0):
         """
         Initialize the Firebase connector with credentials.
         
         Args:
             service_account_path (str): Path to the service account key JSON file
+            log_dir (str): Directory of the write-ahead telemetry log
+                (default: telemetry_log, or telemetry_log/<bot_id> in fleet
+                mode so each bot in a process has its own)
+            database_url (str): Realtime Database URL (derived from the
+                project ID in the service account file if None)
+            database: Object with firebase_admin.db's reference() API to use
+                instead of Firebase, e.g. an RTDBEmulator (no credentials needed)
+            bot_id (str): Fleet mode: keep this bot's state under bots/<bot_id>/
+                and list it in the fleet/ index (None for the root paths)
+            init_schema (bool): Create the default location/material nodes on connect
+            probe_interval (float): Seconds between health probes while connected
+            http_timeout (float): Seconds before a Firebase request gives up
+            monitor (bool): Start the background health monitor, which
+                reconnects automatically after an outage
+            increment_flush_ticks (int): accumulate() calls gathered before
+                the summed deltas are sent
+            increment_flush_interval (float): Maximum seconds deltas are held
+                before being sent
         """
-        self.connected = False
+        if bot_id is not None:
+            check_key(bot_id)
+        self.bot_id = bot_id
+        self.init_schema = init_schema
         self.service_account_path = service_account_path
-        self.database_url = None
+        self.database_url = database_url
+        self._db = database
+        self.http_timeout = http_timeout
+        if log_dir is None:
+            log_dir = os.path.join(DEFAULT_LOG_DIR, bot_id) if bot_id else DEFAULT_LOG_DIR
+        self.telemetry_log = TelemetryLog(log_dir)
+        self._write_lock = threading.Lock()
+        self._app_ready = database is not None  # An emulator needs no app setup
+        self._initialized = False
+        
+        # Counter deltas summed locally between flushes (path -> amount)
+        self.increment_flush_ticks = increment_flush_ticks
+        self.increment_flush_interval = increment_flush_interval
+        self.server_increments = True
+        self._increments = {}
+        self._increment_ticks = 0
+        self._increments_since = None
+        self._increment_lock = threading.Lock()
+        self._outage_reported = False
+        # Records left over from an earlier run may have been applied just
+        # before it stopped, so check before replaying them
+        self._check_applied = self.telemetry_log.pending_count() > 0
+        
+        # Writes short-circuit to the telemetry log while the breaker is open
+        self.breaker = CircuitBreaker()
+        self.health = HealthMonitor(self._probe, self.breaker, probe_interval,
+                                    on_recover=self._on_recover,
+                                    on_failure=self._on_probe_failure)
         
         try:
-            # Attempt to initialize Firebase
-            if os.path.exists(service_account_path):
-                cred = credentials.Certificate(service_account_path)
-                
-                # Extract database URL from service account file
-                with open(service_account_path, 'r') as f:
-                    service_account = json.load(f)
-                    project_id = service_account.get('project_id')
-                    self.database_url = f"https://{project_id}-default-rtdb.firebaseio.com"
-                
-                # Initialize Firebase app
-                firebase_admin.initialize_app(cred, {
-                    'databaseURL': self.database_url
-                })
-                
-                print(f"[{self._get_timestamp()}] Firebase connection successful!")
-                self.connected = True
-                
-                # Initialize database structure if it doesn't exist
-                self._initialize_database()
-                
-            else:
-                print(f"[{self._get_timestamp()}] Error: Service account file not found at {service_account_path}")
-                print(f"[{self._get_timestamp()}] Will log data locally instead.")
-                
+            self._connect()
+            print(f"[{self._get_timestamp()}] Firebase connection successful!")
+            
+            # Upload anything recorded while offline
+            self.replay_log()
+            
         except Exception as e:
             print(f"[{self._get_timestamp()}] Firebase connection error: {str(e)}")
             print(f"[{self._get_timestamp()}] Will log data locally instead.")
+            self.breaker.trip()
+            self._outage_reported = True
+        
+        if monitor:
+            self.health.start()
+    
+    @property
+    def connected(self):
+        """bool: True if Firebase is reachable as far as the circuit breaker knows."""
+        return self._initialized and self.breaker.state == CLOSED
     
     def _get_timestamp(self):
         """Get current timestamp for logging."""
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    def _connect(self):
+        """
+        Initialize the Firebase app (once) and the database structure.
+        
+        Raises:
+            Exception: If the credentials are missing or Firebase can't be reached
+        """
+        if not self._app_ready:
+            if not os.path.exists(self.service_account_path):
+                raise FileNotFoundError(f"Service account file not found at {self.service_account_path}")
+            
+            _load_firebase_admin()
+            cred = credentials.Certificate(self.service_account_path)
+            
+            # Extract database URL from service account file
+            if self.database_url is None:
+                with open(self.service_account_path, 'r') as f:
+                    service_account = json.load(f)
+                    project_id = service_account.get('project_id')
+                    self.database_url = f"https://{project_id}-default-rtdb.firebaseio.com"
+            
+            # Initialize Firebase app once per process; a bounded timeout keeps
+            # a degraded link from stalling each request for the client default
+            with _app_lock:
+                try:
+                    firebase_admin.get_app()
+                except ValueError:
+                    firebase_admin.initialize_app(cred, {
+                        'databaseURL': self.database_url,
+                        'httpTimeout': self.http_timeout
+                    })
+            self._db = db
+            self._app_ready = True
+        
+        # Initialize database structure if it doesn't exist
+        with span("firebase_connect"):
+            self._initialize_database()
+        self._initialized = True
+        self.breaker.record_success()
+    
+    def _path(self, path):
+        """Return the database path of a bot-relative path."""
+        return bot_path(self.bot_id, path) if self.bot_id else path.strip('/')
+    
     def _initialize_database(self):
         """Initialize database structure if it doesn't exist."""
-        if self.connected:
-            # Check if database structure exists, if not create it
-            try:
-                # Set initial values if they don't exist
-                location_ref = db.reference('currentLocation')
-                if location_ref.get() is None:
-                    location_ref.set("Start")
-                
-                materials_ref = db.reference('detectedMaterials')
-                if materials_ref.get() is None:
-                    materials_ref.set({
-                        "dispatchReady": 0,  # circles
-                        "damaged": 0,        # squares
-                        "eWaste": 0,         # triangles
-                        "rawMaterials": 0    # X shapes
-                    })
-                
-                # Set last update time
-                db.reference('lastUpdate').set(int(time.time() * 1000))
-            except Exception as e:
-                print(f"[{self._get_timestamp()}] Error initializing database: {str(e)}")
-                self.connected = False
+        if not self.init_schema:
+            # Still make one request so connecting means Firebase answered
+            self._db.reference(self._path('lastUpdate')).get()
+            return
+        
+        # Set initial values if they don't exist
+        location_ref = self._db.reference(self._path('currentLocation'))
+        if location_ref.get() is None:
+            location_ref.set("Start")
+        
+        materials_ref = self._db.reference(self._path('detectedMaterials'))
+        if materials_ref.get() is None:
+            materials_ref.set({
+                "dispatchReady": 0,  # circles
+                "damaged": 0,        # squares
+                "eWaste": 0,         # triangles
+                "rawMaterials": 0    # X shapes
+            })
+        
+        # Set last update time
+        self._db.reference(self._path('lastUpdate')).set(int(time.time() * 1000))
+    
+    def _probe(self):
+        """Cheap health check: reconnect if needed, otherwise read one small value."""
+        if not self._initialized:
+            self._connect()
+        else:
+            with span("firebase_probe"):
+                self._db.reference(self._path('lastUpdate')).get()
+        return True
+    
+    def _on_probe_failure(self):
+        """Report an outage once, rather than on every failed probe."""
+        if self.breaker.state != CLOSED and not self._outage_reported:
+            self._outage_reported = True
+            print(f"[{self._get_timestamp()}] Firebase unreachable, logging locally "
+                  f"(retrying in {self.breaker.retry_in():.0f}s)")
+    
+    def _on_recover(self):
+        """Upload the backlog once the connection is back."""
+        self._outage_reported = False
+        print(f"[{self._get_timestamp()}] Firebase connection restored")
+        self.replay_log()
+    
+    def check_connection(self):
+        """
+        Probe Firebase now instead of waiting for the health monitor.
+        
+        Returns:
+            bool: True if Firebase is reachable
+        """
+        return self.health.check()
+    
+    def close(self):
+        """Send buffered increments, stop the health monitor and close the telemetry log."""
+        self.flush_increments()
+        self.health.stop()
+        with self._write_lock:
+            self.telemetry_log.close()
     
     def update_location(self, location):
         """
@@ -103,19 +268,14 @@ class FirebaseConnector:
         Returns:
             bool: True if update was successful, False otherwise
         """
-        if not self.connected:
-            self._log_local_data(f"Location: {location}")
-            return False
-        
-        try:
-            db.reference('currentLocation').set(location)
-            db.reference('lastUpdate').set(int(time.time() * 1000))
+        # Location and timestamp in one multi-path update (one round-trip)
+        if self._write({
+            'currentLocation': location,
+            'lastUpdate': int(time.time() * 1000)
+        }, f"Location: {location}"):
             print(f"[{self._get_timestamp()}] Updated location to: {location}")
             return True
-        except Exception as e:
-            print(f"[{self._get_timestamp()}] Error updating location: {str(e)}")
-            self._log_local_data(f"Location: {location}")
-            return False
+        return False
     
     def update_materials(self, materials_dict):
         """
@@ -133,33 +293,587 @@ class FirebaseConnector:
         Returns:
             bool: True if update was successful, False otherwise
         """
-        if not self.connected:
-            self._log_local_data(f"Materials: {materials_dict}")
-            return False
-        
-        try:
-            db.reference('detectedMaterials').set(materials_dict)
-            db.reference('lastUpdate').set(int(time.time() * 1000))
+        # Materials and timestamp in one multi-path update (one round-trip)
+        if self._write({
+            'detectedMaterials': materials_dict,
+            'lastUpdate': int(time.time() * 1000)
+        }, f"Materials: {materials_dict}"):
             print(f"[{self._get_timestamp()}] Updated materials: {materials_dict}")
             return True
+        return False
+    
+    def update_checkpoint(self, location, materials_dict):
+        """
+        Update location, material counts and timestamp in a single request.
+        
+        Args:
+            location (str): Current location of the bot
+            materials_dict (dict): Material counts (see update_materials)
+            
+        Returns:
+            bool: True if update was successful, False otherwise
+        """
+        return self.batch().location(location).materials(materials_dict).timestamp().commit()
+    
+    def read(self, path):
+        """
+        Read a value from Firebase.
+        
+        Args:
+            path (str): Database path (relative to bots/<bot_id>/ in fleet mode)
+            
+        Returns:
+            The stored value, or None if it doesn't exist or Firebase is unreachable
+        """
+        if not self.connected:
+            return None
+        try:
+            with span("firebase_read"):
+                return self._db.reference(self._path(path)).get()
         except Exception as e:
-            print(f"[{self._get_timestamp()}] Error updating materials: {str(e)}")
-            self._log_local_data(f"Materials: {materials_dict}")
+            print(f"[{self._get_timestamp()}] Error reading {path}: {str(e)}")
+            if is_rejection(e):
+                # Firebase answered, the request was bad: not a connectivity problem
+                count("firebase_rejected")
+            else:
+                self.breaker.record_failure()
+            return None
+    
+    def accumulate_materials(self, deltas):
+        """
+        Add newly detected material counts to the running totals in Firebase.
+        
+        Unlike update_materials(), which overwrites the totals, this is safe
+        when several bots or processes count into the same database.
+        
+        Args:
+            deltas (dict): Material name -> count to add (see update_materials)
+            
+        Returns:
+            bool: False if a flush was due and only reached the local log
+        """
+        return self.accumulate('detectedMaterials', deltas)
+    
+    def accumulate(self, path, deltas):
+        """
+        Add deltas to counters under path using server-side increments.
+        
+        Deltas are summed locally and sent together every
+        increment_flush_ticks calls (or increment_flush_interval seconds)
+        as one multi-path update of increment values, so concurrent writers
+        never overwrite each other's counts.
+        
+        Args:
+            path (str): Parent path of the counters, e.g. "detectedMaterials"
+            deltas (dict): Counter name -> amount to add
+            
+        Returns:
+            bool: False if a flush was due and only reached the local log
+        """
+        path = path.strip('/')
+        with self._increment_lock:
+            for key, amount in deltas.items():
+                if amount:
+                    counter = f"{path}/{key}"
+                    self._increments[counter] = self._increments.get(counter, 0) + amount
+            self._increment_ticks += 1
+            if self._increments_since is None:
+                self._increments_since = time.monotonic()
+            due = (self._increment_ticks >= self.increment_flush_ticks or
+                   time.monotonic() - self._increments_since >= self.increment_flush_interval)
+        if due:
+            return self.flush_increments()
+        return True
+    
+    def flush_increments(self):
+        """
+        Send the locally summed counter deltas now.
+        
+        Returns:
+            bool: True if there was nothing to send or the update reached Firebase
+        """
+        with self._increment_lock:
+            increments, self._increments = self._increments, {}
+            self._increment_ticks = 0
+            self._increments_since = None
+        if not increments:
+            return True
+        
+        updates = {counter: increment(amount) for counter, amount in increments.items()}
+        updates['lastUpdate'] = int(time.time() * 1000)
+        if self._write(updates, f"Increments: {increments}"):
+            print(f"[{self._get_timestamp()}] Added counts: {increments}")
+            return True
+        return False
+    
+    def batch(self):
+        """
+        Start a batch of writes that are sent together as one atomic update.
+        
+        Example:
+            firebase.batch().location("Building A").set("battery", 87).timestamp().commit()
+            
+        Returns:
+            TelemetryBatch: Builder bound to this connector
+        """
+        return TelemetryBatch(self)
+    
+    def commit_batch(self, updates):
+        """
+        Write several paths in one atomic multi-path update on the root reference.
+        
+        Args:
+            updates (dict): Path -> value, e.g. {"currentLocation": "Start", "lastUpdate": 0}
+            
+        Returns:
+            bool: True if update was successful, False otherwise
+        """
+        if not updates:
+            return True
+        
+        if self._write(updates, f"Batch: {updates}"):
+            print(f"[{self._get_timestamp()}] Updated {', '.join(updates)}")
+            return True
+        return False
+    
+    def _write(self, updates, description):
+        """
+        Record a multi-path update in the telemetry log, then send it.
+        
+        Writes are sent in log order, so anything still outstanding from an
+        offline period goes out before (and together with) the new update.
+        While the circuit breaker is open nothing is sent, so an outage
+        doesn't cost a network timeout per write.
+        
+        Args:
+            updates (dict): Path -> value pairs (relative to bots/<bot_id>/ in fleet mode)
+            description (str): Short description for the console
+            
+        Returns:
+            bool: True if the update reached Firebase, False if it is only
+                logged or was refused because of an invalid key
+        """
+        if self.bot_id:
+            updates = namespace_updates(self.bot_id, updates)
+        try:
+            check_updates(updates)
+        except ValueError as e:
+            # Firebase would refuse it on every attempt: don't log it at all
+            count("firebase_rejected")
+            print(f"[{self._get_timestamp()}] Refused {description}: {str(e)}")
             return False
+        with self._write_lock:
+            seq = self.telemetry_log.append(updates)
+            if not self.connected:
+                print(f"[{self._get_timestamp()}] Logged locally: {description}")
+                return False
+            return self._replay_locked() and seq not in self.telemetry_log.quarantined
     
-    def _log_local_data(self, data):
+    def replay_log(self, batch_size=50):
         """
-        Log data locally if Firebase connection is unavailable.
+        Upload outstanding telemetry log records to Firebase.
         
         Args:
-            data (str): Data to log
+            batch_size (int): Records merged into each multi-path update
+            
+        Returns:
+            bool: True if nothing is left outstanding
+        """
+        with self._write_lock:
+            return self._replay_locked(batch_size)
+    
+    def _replay_locked(self, batch_size=50):
+        """Replay the telemetry log (caller holds the write lock)."""
+        if not self.connected:
+            return False
+        if self._check_applied and not self._skip_applied():
+            return False
+        
+        backlog = self.telemetry_log.pending_count()
+        
+        def failed(e, applied):
+            print(f"[{self._get_timestamp()}] Error updating Firebase: {str(e)}")
+            if applied:
+                # The update may have been applied with only the reply lost
+                self._check_applied = True
+            self.breaker.record_failure()
+            if self.breaker.state != CLOSED:
+                self._on_probe_failure()
+            return False
+        
+        def send(records):
+            merged = {}
+            for record in records:
+                for path, value in record["updates"].items():
+                    merge_path_update(merged, path, value)
+            applied = {}
+            if _split_increments(merged)[1]:
+                # Written in the same atomic update as the increments, so a
+                # replay after a lost reply can tell they already landed
+                applied = {self._applied_path(): records[-1]["seq"]}
+            try:
+                # Records logged by an older version may still hold bad keys
+                check_updates(merged)
+                if self.server_increments:
+                    with span("firebase_update"):
+                        self._db.reference().update({**merged, **applied})
+                else:
+                    self._update_with_transactions(merged, applied)
+            except Exception as e:
+                if self.server_increments and getattr(e, 'code', None) == 'INVALID_ARGUMENT' \
+                        and applied:
+                    # Only blame the increments if one on its own is refused too;
+                    # otherwise the record itself is bad
+                    supported = self._probe_increments()
+                    if supported is None:
+                        return failed(e, applied)
+                    if not supported:
+                        print(f"[{self._get_timestamp()}] Server increments unavailable, "
+                              f"using transactions")
+                        self.server_increments = False
+                        return send(records)
+                if is_rejection(e):
+                    # Retrying can't help and the link is fine: the log sets
+                    # the record aside and the breaker isn't touched
+                    count("firebase_rejected")
+                    raise RecordRejected(str(e)) from e
+                return failed(e, applied)
+            self.breaker.record_success()
+            return True
+        
+        done = self.telemetry_log.replay(send, batch_size)
+        if done and backlog > 1:
+            print(f"[{self._get_timestamp()}] Uploaded {backlog} logged update(s)")
+        return done
+
+    def _probe_increments(self):
+        """
+        Check whether Firebase accepts increment server values.
+        
+        Sends an update holding nothing but a zero increment (under this
+        log's telemetryLogs/ node), so a rejection can only be caused by
+        the server value.
+        
+        Returns:
+            bool: True if accepted, False if rejected, None if the probe
+                itself failed (e.g. the connection dropped)
         """
+        path = f"{APPLIED_ROOT}/{self.telemetry_log.log_id}/incrementProbe"
         try:
-            with open("material_logs.txt", "a") as f:
-                f.write(f"[{self._get_timestamp()}] {data}\n")
-            print(f"[{self._get_timestamp()}] Logged locally: {data}")
+            with span("firebase_update"):
+                self._db.reference().update({path: increment(0)})
         except Exception as e:
-            print(f"[{self._get_timestamp()}] Error logging locally: {str(e)}")
+            if getattr(e, 'code', None) == 'INVALID_ARGUMENT':
+                return False
+            return None
+        return True
+    
+    def _applied_path(self):
+        """Database path recording the last applied record of this connector's log."""
+        return f"{APPLIED_ROOT}/{self.telemetry_log.log_id}/appliedSeq"
+    
+    def _skip_applied(self):
+        """
+        Acknowledge logged records whose update already reached Firebase.
+        
+        The log is at-least-once: when a send fails ambiguously (the update
+        landed but the reply was lost) or the bot stops between sending and
+        acknowledging, the records are still outstanding. Replaying their
+        increments would count them twice, so the applied marker written
+        with them is read first and everything up to it is acknowledged.
+        
+        Returns:
+            bool: False if Firebase couldn't be read
+        """
+        try:
+            with span("firebase_read"):
+                applied = self._db.reference(self._applied_path()).get()
+        except Exception as e:
+            print(f"[{self._get_timestamp()}] Error reading {self._applied_path()}: {str(e)}")
+            self.breaker.record_failure()
+            return False
+        self._check_applied = False
+        outstanding = self.telemetry_log.outstanding()
+        if _is_number(applied) and outstanding and applied >= outstanding[0]["seq"]:
+            seq = min(int(applied), outstanding[-1]["seq"])
+            self.telemetry_log.ack(seq)
+            skipped = sum(1 for record in outstanding if record["seq"] <= seq)
+            print(f"[{self._get_timestamp()}] Skipped {skipped} logged update(s) "
+                  f"Firebase had already applied")
+        return True
+    
+    def _update_with_transactions(self, updates, applied=None):
+        """
+        Apply a multi-path update without server increment values.
+        
+        Each counter's parent is incremented in a transaction, which
+        retries if another writer changed it in between. The plain values
+        and the applied marker go out as one update only once every
+        transaction has succeeded, so a failed transaction leaves no plain
+        write behind.
+        
+        Args:
+            updates (dict): Path -> value pairs, possibly with increments
+            applied (dict): Applied marker path -> seq to write with the plain values
+        """
+        plain, increments = _split_increments(updates)
+        by_parent = {}
+        for counter, amount in increments.items():
+            parent, _, key = counter.rpartition('/')
+            by_parent.setdefault(parent, {})[key] = amount
+        
+        for parent, deltas in by_parent.items():
+            def add(current, deltas=deltas):
+                current = current if isinstance(current, dict) else {}
+                for key, amount in deltas.items():
+                    value = current.get(key)
+                    current[key] = (value if _is_number(value) else 0) + amount
+                return current
+            with span("firebase_transaction"):
+                self._db.reference(parent or '/').transaction(add)
+        
+        plain = {**plain, **(applied or {})}
+        if plain:
+            with span("firebase_update"):
+                self._db.reference().update(plain)
+
+def is_rejection(error):
+    """
+    Check whether an error means Firebase refused the request itself.
+    
+    Invalid keys or values are refused by the server (INVALID_ARGUMENT) or
+    by the client library before sending (ValueError/TypeError); sending
+    them again fails the same way. Anything else (timeouts, connection
+    errors, UNAVAILABLE) is a transport error and worth retrying.
+    """
+    if getattr(error, 'code', None) is not None:
+        return error.code in REJECTED_CODES
+    return isinstance(error, (ValueError, TypeError))
+
+def check_key(key):
+    """
+    Check that key can be used as a single database key (e.g. a bot id).
+    
+    Raises:
+        ValueError: If the key is empty or contains . $ # [ ] /
+    """
+    if not key or any(char in key for char in ".$#[]/"):
+        raise ValueError(f"Invalid database key: {key!r}")
+    return key
+
+def check_updates(updates):
+    """
+    Check a multi-path update the way the database will when it is sent.
+    
+    Every path segment and every key of a nested value must be a valid
+    database key; server values must be ones the database supports.
+    
+    Args:
+        updates (dict): Path -> value pairs
+        
+    Returns:
+        dict: updates, unchanged
+        
+    Raises:
+        ValueError: If a path or nested key is empty or contains . $ # [ ] /,
+            or a server value is unsupported
+    """
+    for path, value in updates.items():
+        if not isinstance(path, str) or not path.strip('/'):
+            raise ValueError(f"Invalid database path: {path!r}")
+        for key in path.strip('/').split('/'):
+            check_key(key)
+        _check_value(value)
+    return updates
+
+def _check_value(value):
+    """Check the keys of a value to be written, recursing into nested objects."""
+    if isinstance(value, dict):
+        if ".sv" in value:
+            if value.get(".sv") == "timestamp" and len(value) == 1 or _increment_amount(value) is not None:
+                return
+            raise ValueError(f"Unsupported server value: {value!r}")
+        for key, child in value.items():
+            if not isinstance(key, str):
+                raise ValueError(f"Invalid database key: {key!r}")
+            check_key(key)
+            _check_value(child)
+    elif isinstance(value, (list, tuple)):
+        for child in value:
+            _check_value(child)
+
+def bot_path(bot_id, path):
+    """Return the path of a bot's state in fleet mode, e.g. bots/bot1/currentLocation."""
+    return f"{BOTS_ROOT}/{bot_id}/{path.strip('/')}"
+
+def namespace_updates(bot_id, updates):
+    """
+    Move a bot's multi-path update under bots/<bot_id>/ and update the fleet index.
+    
+    Args:
+        bot_id (str): Bot id
+        updates (dict): Bot-relative path -> value pairs
+        
+    Returns:
+        dict: Absolute path -> value pairs, including fleet/<bot_id>/ entries
+            for currentLocation and lastUpdate
+    """
+    namespaced = {bot_path(bot_id, path): value for path, value in updates.items()}
+    for field in FLEET_INDEX_FIELDS:
+        if field in updates:
+            namespaced[f"{FLEET_ROOT}/{bot_id}/{field}"] = updates[field]
+    return namespaced
+
+def increment(amount):
+    """
+    Return an RTDB server value that adds amount to the stored number.
+    
+    Args:
+        amount (int): Amount to add (may be negative)
+        
+    Returns:
+        dict: {".sv": {"increment": amount}}
+    """
+    return {".sv": {"increment": amount}}
+
+def _increment_amount(value):
+    """Return the amount of an increment server value, or None for other values."""
+    if isinstance(value, dict) and len(value) == 1 and isinstance(value.get(".sv"), dict):
+        amount = value[".sv"].get("increment")
+        if _is_number(amount):
+            return amount
+    return None
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _combine(old, new):
+    """Combine a pending value with a newer one; increments add up instead of replacing."""
+    amount = _increment_amount(new)
+    if amount is None:
+        return new
+    old_amount = _increment_amount(old)
+    if old_amount is not None:
+        return increment(old_amount + amount)
+    if _is_number(old):
+        return old + amount
+    return new
+
+def _split_increments(updates):
+    """
+    Separate increment server values from plain values.
+    
+    Returns:
+        tuple: (plain path -> value dict, counter path -> amount dict),
+            including increments nested inside plain values
+    """
+    plain, increments = {}, {}
+    
+    def strip(path, value):
+        amount = _increment_amount(value)
+        if amount is not None:
+            increments[path] = increments.get(path, 0) + amount
+            return None
+        if isinstance(value, dict):
+            kept = {}
+            for key, child in value.items():
+                child = strip(f"{path}/{key}", child)
+                if child is not None:
+                    kept[key] = child
+            return kept or None
+        return value
+    
+    for path, value in updates.items():
+        value = strip(path, value)
+        if value is not None:
+            plain[path] = value
+    return plain, increments
+
+def merge_path_update(updates, path, value):
+    """
+    Add path -> value to a multi-path update dict, newest value winning.
+    
+    A multi-path update can't contain both a path and one of its
+    descendants, so the new value replaces pending descendants and is
+    folded into a pending ancestor's value instead. Increment values
+    are added to a pending increment or number rather than replacing it.
+    
+    Args:
+        updates (dict): Path -> value pairs, modified in place
+        path (str): Path being written
+        value: New value
+        
+    Returns:
+        bool: True if an earlier pending value was superseded
+    """
+    path = path.strip('/')
+    superseded = False
+    for pending_path in list(updates):
+        if pending_path == path:
+            value = _combine(updates.pop(pending_path), value)
+            superseded = True
+        elif pending_path.startswith(path + '/'):
+            del updates[pending_path]
+            superseded = True
+        elif path.startswith(pending_path + '/'):
+            # Copy so the caller's dict isn't modified behind its back
+            parent = updates[pending_path]
+            parent = copy.deepcopy(parent) if isinstance(parent, dict) else {}
+            updates[pending_path] = parent
+            node = parent
+            keys = path[len(pending_path) + 1:].split('/')
+            for key in keys[:-1]:
+                child = node.get(key)
+                if not isinstance(child, dict):
+                    child = node[key] = {}
+                node = child
+            superseded = keys[-1] in node
+            node[keys[-1]] = _combine(node.get(keys[-1]), value)
+            return superseded
+    updates[path] = value
+    return superseded
+
+class TelemetryBatch:
+    """
+    Builder that groups field updates into one multi-path Firebase update.
+    
+    Attributes:
+        updates (dict): Path -> value pairs collected so far
+    """
+    
+    def __init__(self, connector):
+        """
+        Args:
+            connector (FirebaseConnector): Connector used to commit the batch
+        """
+        self.connector = connector
+        self.updates = {}
+    
+    def set(self, path, value):
+        """Add an arbitrary path (e.g. "bots/bot1/battery") to the batch."""
+        self.updates[path.strip('/')] = value
+        return self
+    
+    def location(self, location):
+        """Add the bot's current location."""
+        return self.set('currentLocation', location)
+    
+    def materials(self, materials_dict):
+        """Add the detected material counts."""
+        return self.set('detectedMaterials', materials_dict)
+    
+    def timestamp(self):
+        """Add the current time as lastUpdate (milliseconds)."""
+        return self.set('lastUpdate', int(time.time() * 1000))
+    
+    def commit(self):
+        """
+        Send every collected field in one request.
+        
+        Returns:
+            bool: True if update was successful, False otherwise
+        """
+        return self.connector.commit_batch(self.updates)
 
 # For testing purposes
 if __name__ == "__main__":
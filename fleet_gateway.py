@@ -0,0 +1,360 @@
+"""
+Fleet telemetry gateway for Smart Logistics Bot.
+
+One gateway process holds the only Firebase connection, telemetry log and
+publisher for a whole fleet. Each bot gets a lightweight BotChannel that
+namespaces its writes under bots/<bot_id>/ and keeps the fleet/<bot_id>
+index entry current. Updates from every bot are coalesced into one
+multi-path update per publish interval, so dozens of bots cost one request
+stream instead of one connection each.
+
+Bots on other machines can relay through the gateway's HTTP endpoint:
+    POST /bots/<bot_id>    JSON object of bot-relative path -> value
+    GET  /fleet            Gateway and per-bot statistics
+
+The endpoint listens on 127.0.0.1 unless told otherwise. On any other
+interface every request must carry the shared token in an X-Gateway-Token
+header.
+
+Run the gateway with:
+    python fleet_gateway.py [port]
+    GATEWAY_HOST=0.0.0.0 GATEWAY_TOKEN=<secret> python fleet_gateway.py [port]
+"""
+
+import hmac
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from firebase_integration import (FirebaseConnector, check_key, check_updates, increment,
+                                  merge_path_update, namespace_updates)
+from telemetry_log import RecordRejected, TelemetryLog
+from telemetry_publisher import TelemetryPublisher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8090
+
+# Header carrying the shared token (see FleetGateway.start_server)
+TOKEN_HEADER = "X-Gateway-Token"
+
+# Parent directory of the relay logs GatewayClient keeps per bot
+CLIENT_LOG_DIR = "gateway_client_log"
+
+
+def _is_loopback(host):
+    """Return True if host only accepts connections from this machine."""
+    return host in ("localhost", "::1") or host.startswith("127.")
+
+
+class BotChannel:
+    """
+    One bot's view of the gateway, with the TelemetryPublisher update API.
+
+    Attributes:
+        bot_id (str): Bot id
+        updates (int): Updates received from this bot
+        last_seen (float): time.time() of the last update, or None
+    """
+
+    def __init__(self, gateway, bot_id):
+        self.gateway = gateway
+        self.bot_id = check_key(bot_id)
+        self.updates = 0
+        self.last_seen = None
+
+    def update(self, updates):
+        """
+        Queue several bot-relative path -> value writes at once.
+        
+        Raises:
+            ValueError: If a path or key would be rejected by the database
+                (checked here, so one bad update can't fail a fleet batch)
+        """
+        check_updates(updates)
+        self.updates += 1
+        self.last_seen = time.time()
+        self.gateway.publisher.update(namespace_updates(self.bot_id, updates))
+
+    def set(self, path, value):
+        """Queue a write of value to a bot-relative path."""
+        self.update({path: value})
+
+    def update_location(self, location):
+        """Queue a location update."""
+        self.update({'currentLocation': location, 'lastUpdate': int(time.time() * 1000)})
+
+    def update_materials(self, materials_dict):
+        """Queue a material count update."""
+        self.update({'detectedMaterials': materials_dict, 'lastUpdate': int(time.time() * 1000)})
+
+    def update_checkpoint(self, location, materials_dict):
+        """Queue location and material counts together."""
+        self.update({
+            'currentLocation': location,
+            'detectedMaterials': materials_dict,
+            'lastUpdate': int(time.time() * 1000)
+        })
+
+    def accumulate(self, path, deltas):
+        """Queue server-side increments of counters under a bot-relative path."""
+        path = path.strip('/')
+        self.update({f"{path}/{key}": increment(amount) for key, amount in deltas.items() if amount})
+
+
+class FleetGateway:
+    """
+    Shared Firebase connection and publisher for many bots.
+
+    Attributes:
+        connector (FirebaseConnector): The one connection (root paths, no schema)
+        publisher (TelemetryPublisher): Coalesces every bot's updates
+        bots (dict): Bot id -> BotChannel
+    """
+
+    def __init__(self, service_account_path="serviceAccountKey.json", log_dir="gateway_telemetry_log",
+                 database=None, min_interval=0.1, **kwargs):
+        """
+        Args:
+            service_account_path (str): Path to the service account key JSON file
+            log_dir (str): Directory of the gateway's write-ahead telemetry log
+            database: Optional RTDBEmulator (see FirebaseConnector)
+            min_interval (float): Minimum seconds between batches sent to Firebase
+            **kwargs: Passed on to FirebaseConnector
+        """
+        self.connector = FirebaseConnector(service_account_path, log_dir=log_dir, database=database,
+                                           init_schema=False, **kwargs)
+        self.publisher = TelemetryPublisher(self.connector, min_interval)
+        self.bots = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def bot(self, bot_id):
+        """
+        Return the channel for a bot, creating it on first use.
+
+        Args:
+            bot_id (str): Bot id (a valid database key)
+
+        Returns:
+            BotChannel: The bot's channel
+        """
+        with self._lock:
+            channel = self.bots.get(bot_id)
+            if channel is None:
+                channel = self.bots[bot_id] = BotChannel(self, bot_id)
+            return channel
+
+    def relay(self, bot_id, updates):
+        """Queue a bot's bot-relative updates (used by the HTTP endpoint)."""
+        self.bot(bot_id).update(updates)
+
+    def stats(self):
+        """
+        Return gateway statistics.
+
+        Returns:
+            dict: Connection state, publisher counters and per-bot update counts
+        """
+        return {
+            "connected": self.connector.connected,
+            "pending": self.publisher.pending(),
+            "sent": self.publisher.sent,
+            "coalesced": self.publisher.coalesced,
+            "failed": self.publisher.failed,
+            "logged": self.connector.telemetry_log.pending_count(),
+            "bots": {bot_id: {"updates": channel.updates, "lastSeen": channel.last_seen}
+                     for bot_id, channel in list(self.bots.items())},
+        }
+
+    # ===== HTTP RELAY =====
+    def start_server(self, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+        """
+        Accept bot updates over HTTP in a background thread.
+
+        Args:
+            host (str): Interface to listen on (this machine only by default)
+            port (int): Port, or 0 for any free port
+            token (str): Shared secret every request must send in the
+                X-Gateway-Token header; required unless host is loopback
+
+        Returns:
+            int: The port listened on
+
+        Raises:
+            ValueError: If host is reachable from other machines and no token is set
+        """
+        if not token and not _is_loopback(host):
+            raise ValueError(f"A token is required to listen on {host}")
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _authorized(self):
+                if token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), token):
+                    self._send(401, {"error": "missing or wrong token"})
+                    return False
+                return True
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                parts = self.path.strip('/').split('/')
+                if len(parts) != 2 or parts[0] != "bots":
+                    self._send(404, {"error": "not found"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    updates = json.loads(self.rfile.read(length))
+                    if not isinstance(updates, dict):
+                        raise ValueError("body must be a JSON object")
+                    gateway.relay(parts[1], updates)
+                except ValueError as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                self._send(202, {"queued": len(updates)})
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                if self.path.strip('/') == "fleet":
+                    self._send(200, gateway.stats())
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Keep request logging out of the gateway's console
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="fleet-gateway", daemon=True)
+        self._thread.start()
+        print(f"Fleet gateway listening on http://{host}:{self._server.server_port}/")
+        return self._server.server_port
+
+    def close(self, timeout=10):
+        """Stop the HTTP endpoint, drain pending updates and close the connection."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(timeout=2)
+            self._server = None
+        self.publisher.close(timeout)
+        self.connector.close()
+
+
+class GatewayClient:
+    """
+    Send a bot's telemetry to a FleetGateway over HTTP.
+
+    Has the commit_batch() method of FirebaseConnector, so it can be used
+    as the connector of a TelemetryPublisher on the bot. Like the connector
+    it records every batch in a write-ahead TelemetryLog first, so updates
+    made while the gateway is unreachable are relayed, in order, with the
+    next batch that gets through.
+
+    Attributes:
+        telemetry_log (TelemetryLog): Batches not yet accepted by the gateway
+    """
+
+    def __init__(self, url, bot_id, timeout=2.0, token=None, log_dir=None):
+        """
+        Args:
+            url (str): Gateway base URL, e.g. "http://gateway.local:8090"
+            bot_id (str): This bot's id
+            timeout (float): Seconds before a request gives up
+            token (str): Shared token the gateway expects (see FleetGateway.start_server)
+            log_dir (str): Relay log directory (default: gateway_client_log/<bot_id>)
+        """
+        self.url = f"{url.rstrip('/')}/bots/{check_key(bot_id)}"
+        self.bot_id = bot_id
+        self.timeout = timeout
+        self.token = token
+        self.telemetry_log = TelemetryLog(log_dir or os.path.join(CLIENT_LOG_DIR, bot_id))
+
+    def commit_batch(self, updates):
+        """
+        Log bot-relative updates and relay everything outstanding to the gateway.
+
+        Returns:
+            bool: True if the gateway accepted them, False if they are only
+                logged (or were refused as invalid)
+        """
+        try:
+            check_updates(updates)
+        except ValueError as e:
+            print(f"Refused telemetry for gateway: {e}")
+            return False
+        seq = self.telemetry_log.append(updates)
+        return self.replay_log() and seq not in self.telemetry_log.quarantined
+
+    def replay_log(self, batch_size=50):
+        """
+        Relay outstanding logged batches to the gateway.
+
+        Returns:
+            bool: True if nothing is left outstanding
+        """
+        return self.telemetry_log.replay(self._send, batch_size)
+
+    def _send(self, records):
+        """POST logged records as one merged update (TelemetryLog.replay callback)."""
+        merged = {}
+        for record in records:
+            for path, value in record["updates"].items():
+                merge_path_update(merged, path, value)
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        request = urllib.request.Request(self.url, data=json.dumps(merged).encode(), headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status == 202
+        except urllib.error.HTTPError as e:
+            if e.code == 400:
+                raise RecordRejected(e.read().decode(errors="replace")) from e
+            print(f"Gateway refused telemetry: HTTP {e.code}")
+            return False
+        except OSError as e:
+            print(f"Error relaying telemetry to gateway: {e}")
+            return False
+
+    def close(self):
+        """Close the relay log (outstanding batches are relayed on the next run)."""
+        self.telemetry_log.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    database = None
+    if os.environ.get("FIREBASE_EMULATOR"):
+        from rtdb_emulator import emulator_from_spec
+        database = emulator_from_spec(os.environ["FIREBASE_EMULATOR"])
+
+    gateway = FleetGateway(database=database)
+    gateway.start_server(os.environ.get("GATEWAY_HOST", DEFAULT_HOST),
+                         int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT,
+                         token=os.environ.get("GATEWAY_TOKEN"))
+    try:
+        while True:
+            time.sleep(30)
+            stats = gateway.stats()
+            print(f"{len(stats['bots'])} bot(s), {stats['sent']} batches sent, "
+                  f"{stats['coalesced']} coalesced, {stats['logged']} logged")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.close()
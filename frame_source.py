@@ -0,0 +1,484 @@
+"""
+Frame sources for Smart Logistics Bot.
+
+Every camera or recording is wrapped in a FrameSource with the same
+read() -> (ok, frame) interface as cv2.VideoCapture, so the detection loop
+can run against the live Pi camera, a USB/V4L2 camera, or recorded field
+data (a directory of captured_images/*.jpg, a video file, or a
+memory-mapped raw frame dump) on any machine. SimulatedCamera renders
+synthetic scenes for runs without a camera (see hardware.py).
+
+Replay sources can be paced in real time or run as fast as possible.
+"""
+
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from hardware import SCENE_SYMBOLS, render_scene
+from metrics import span
+
+# Replay pacing modes
+REALTIME = "realtime"  # Deliver frames at the recording's frame rate
+AS_FAST_AS_POSSIBLE = "fast"  # Deliver frames as soon as they are read
+
+
+class FrameSource:
+    """
+    Base class for all frame sources.
+
+    Subclasses implement _open(), _read() and _close(). Sources can be used
+    as context managers and iterated over until they run out of frames.
+
+    Attributes:
+        frames_read (int): Frames delivered so far
+    """
+
+    def __init__(self, pacing=AS_FAST_AS_POSSIBLE, fps=30.0, loop=False):
+        """
+        Args:
+            pacing (str): REALTIME or AS_FAST_AS_POSSIBLE (replay sources only)
+            fps (float): Frame rate used for REALTIME pacing
+            loop (bool): Restart replay sources when they reach the end
+        """
+        self.pacing = pacing
+        self.fps = fps
+        self.loop = loop
+        self.frames_read = 0
+        self.is_open = False
+        self._next_frame_time = None
+
+    def open(self):
+        """
+        Open the source.
+
+        Returns:
+            bool: True if the source is ready to deliver frames
+        """
+        if not self.is_open:
+            self.is_open = self._open()
+            self._next_frame_time = None
+        return self.is_open
+
+    def read(self):
+        """
+        Read the next frame.
+
+        Returns:
+            tuple: (ok, frame) like cv2.VideoCapture.read()
+        """
+        if not self.is_open and not self.open():
+            return False, None
+
+        with span("capture"):
+            ok, frame = self._read()
+            if not ok and self.loop and self._rewind():
+                ok, frame = self._read()
+        if not ok:
+            return False, None
+
+        if self.pacing == REALTIME and self.fps:
+            now = time.monotonic()
+            if self._next_frame_time is None:
+                self._next_frame_time = now
+            elif self._next_frame_time > now:
+                time.sleep(self._next_frame_time - now)
+            self._next_frame_time += 1.0 / self.fps
+
+        self.frames_read += 1
+        return True, frame
+
+    def close(self):
+        """Release the underlying camera or file."""
+        if self.is_open:
+            self._close()
+            self.is_open = False
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _rewind(self):
+        """Go back to the first frame; returns False if not supported."""
+        return False
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self  # Opened on the first read()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            ok, frame = self.read()
+            if not ok:
+                return
+            yield frame
+
+
+# ===== LIVE SOURCES =====
+class Picamera2Source(FrameSource):
+    """Raspberry Pi camera via picamera2 (imported only when opened)."""
+
+    def __init__(self, size=(640, 480), pixel_format="RGB888", warmup=2.0,
+                 settle_tolerance=0.05, **kwargs):
+        """
+        Args:
+            size (tuple): Capture size (width, height)
+            pixel_format (str): picamera2 pixel format
+            warmup (float): Maximum seconds to wait for exposure to settle
+            settle_tolerance (float): Relative change in exposure time and
+                gain between frames below which exposure counts as settled
+        """
+        super().__init__(**kwargs)
+        self.size = size
+        self.pixel_format = pixel_format
+        self.warmup = warmup
+        self.settle_tolerance = settle_tolerance
+        self.warmup_time = None
+        self.camera = None
+
+    def _open(self):
+        try:
+            from picamera2 import Picamera2
+            self.camera = Picamera2()
+            self.camera.preview_configuration.main.size = self.size
+            self.camera.preview_configuration.main.format = self.pixel_format
+            self.camera.configure("preview")
+            self.camera.start()
+            self._wait_for_exposure()
+            return True
+        except Exception as e:
+            print(f"Error: Could not open Pi camera: {e}")
+            return False
+
+    def _wait_for_exposure(self):
+        """
+        Poll frame metadata until auto exposure has settled, instead of a fixed sleep.
+
+        Exposure counts as settled when the AGC reports it is locked, or when
+        exposure time and analogue gain stop changing between frames.
+
+        Returns:
+            bool: True if exposure settled before the warmup limit
+        """
+        start = time.monotonic()
+        previous = None
+        settled = False
+        while time.monotonic() - start < self.warmup:
+            metadata = self.camera.capture_metadata()
+            if metadata.get("AeLocked"):
+                settled = True
+                break
+            current = (metadata.get("ExposureTime"), metadata.get("AnalogueGain"))
+            if previous is not None and None not in current and None not in previous:
+                if all(abs(c - p) <= self.settle_tolerance * max(p, 1e-6)
+                       for c, p in zip(current, previous)):
+                    settled = True
+                    break
+            previous = current
+        self.warmup_time = time.monotonic() - start
+        if not settled:
+            print(f"Warning: Camera exposure still changing after {self.warmup:.1f}s")
+        return settled
+
+    def _read(self):
+        return True, self.camera.capture_array()
+
+    def _close(self):
+        self.camera.stop()
+
+
+class V4L2Source(FrameSource):
+    """USB/V4L2 camera via cv2.VideoCapture."""
+
+    def __init__(self, device=0, buffer_size=1, **kwargs):
+        """
+        Args:
+            device (int): Camera index (0 for the default camera)
+            buffer_size (int): Driver buffer length; 1 keeps frames fresh
+        """
+        super().__init__(**kwargs)
+        self.device = device
+        self.buffer_size = buffer_size
+        self.capture = None
+
+    def _open(self):
+        self.capture = cv2.VideoCapture(self.device)
+        if not self.capture.isOpened():
+            print(f"Error: Could not open camera {self.device}")
+            return False
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        return True
+
+    def _read(self):
+        return self.capture.read()
+
+    def _close(self):
+        self.capture.release()
+
+
+# ===== REPLAY SOURCES =====
+class ImageDirectorySource(FrameSource):
+    """
+    Replay a directory of saved images, e.g. captured_images/.
+
+    Annotated images are skipped by default. Images are converted back to
+    the camera's channel order (the bot saves frames with RGB2BGR).
+    """
+
+    def __init__(self, directory="captured_images", pattern="*.jpg", skip_annotated=True,
+                 color_conversion=cv2.COLOR_BGR2RGB, **kwargs):
+        """
+        Args:
+            directory (str): Directory to read from
+            pattern (str): Glob pattern for image files
+            skip_annotated (bool): Ignore *_annotated.jpg files
+            color_conversion: cv2 conversion applied after loading, or None
+            **kwargs: pacing, fps and loop (see FrameSource)
+        """
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.pattern = pattern
+        self.skip_annotated = skip_annotated
+        self.color_conversion = color_conversion
+        self.paths = []
+        self._index = 0
+
+    def _open(self):
+        self.paths = sorted(glob.glob(os.path.join(self.directory, self.pattern)))
+        if self.skip_annotated:
+            self.paths = [p for p in self.paths if not p.endswith("_annotated.jpg")]
+        self._index = 0
+        if not self.paths:
+            print(f"Error: No images matching {self.pattern} in {self.directory}")
+            return False
+        return True
+
+    def _read(self):
+        while self._index < len(self.paths):
+            path = self.paths[self._index]
+            self._index += 1
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"Warning: Could not read {path}")
+                continue
+            if self.color_conversion is not None:
+                frame = cv2.cvtColor(frame, self.color_conversion)
+            return True, frame
+        return False, None
+
+    def _rewind(self):
+        self._index = 0
+        return True
+
+
+class VideoFileSource(FrameSource):
+    """Replay a recorded video file."""
+
+    def __init__(self, path, color_conversion=None, **kwargs):
+        """
+        Args:
+            path (str): Video file path
+            color_conversion: cv2 conversion applied to each frame, or None
+            **kwargs: pacing, fps and loop (see FrameSource); fps defaults
+                to the file's own frame rate
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.color_conversion = color_conversion
+        self._fps_given = "fps" in kwargs
+        self.capture = None
+
+    def _open(self):
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            print(f"Error: Could not open video {self.path}")
+            return False
+        file_fps = self.capture.get(cv2.CAP_PROP_FPS)
+        if not self._fps_given and file_fps > 0:
+            self.fps = file_fps
+        return True
+
+    def _read(self):
+        ok, frame = self.capture.read()
+        if ok and self.color_conversion is not None:
+            frame = cv2.cvtColor(frame, self.color_conversion)
+        return ok, frame
+
+    def _rewind(self):
+        return self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def _close(self):
+        self.capture.release()
+
+
+class RawFrameDumpSource(FrameSource):
+    """
+    Replay a memory-mapped dump of raw frames.
+
+    A .npy file written by write_raw_dump() carries its own shape; any
+    other file is read as headerless uint8 frames of the given shape.
+    Nothing is decoded: each read copies one frame out of the mapping, so
+    callers get a writable frame (annotate_frame() draws in place) while
+    only the frames actually read are paged in.
+    """
+
+    def __init__(self, path, frame_shape=(480, 640, 3), **kwargs):
+        """
+        Args:
+            path (str): Dump file path
+            frame_shape (tuple): (height, width, channels) for headerless dumps
+            **kwargs: pacing, fps and loop (see FrameSource)
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.frame_shape = tuple(frame_shape)
+        self.frames = None
+        self._index = 0
+
+    def _open(self):
+        try:
+            if self.path.endswith(".npy"):
+                self.frames = np.load(self.path, mmap_mode="r")
+            else:
+                self.frames = np.memmap(self.path, dtype=np.uint8, mode="r")
+                self.frames = self.frames.reshape((-1,) + self.frame_shape)
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not map frame dump {self.path}: {e}")
+            return False
+        self._index = 0
+        return True
+
+    def _read(self):
+        if self._index >= len(self.frames):
+            return False, None
+        # The mapping is read-only; hand out a copy that can be drawn on
+        frame = np.array(self.frames[self._index])
+        self._index += 1
+        return True, frame
+
+    def _rewind(self):
+        self._index = 0
+        return True
+
+    def _close(self):
+        self.frames = None
+
+
+# ===== SIMULATION =====
+class SimulatedCamera(FrameSource):
+    """
+    Synthetic camera showing a random arrangement of red symbols.
+
+    A new scene is drawn every scene_frames reads (one checkpoint burst), so
+    all frames of a burst show the same symbols.
+
+    Attributes:
+        counts (dict): Symbol counts in the current scene (the ground truth)
+    """
+
+    def __init__(self, seed=None, max_per_symbol=2, scene_frames=5, size=(640, 480), **kwargs):
+        """
+        Args:
+            seed (int): Seed for reproducible scenes
+            max_per_symbol (int): Most symbols of one kind in a scene
+            scene_frames (int): Reads before the scene changes
+            size (tuple): Frame (width, height)
+        """
+        super().__init__(**kwargs)
+        self.max_per_symbol = max_per_symbol
+        self.scene_frames = scene_frames
+        self.size = size
+        self.counts = {}
+        self._rng = np.random.default_rng(seed)
+        self._frame = None
+
+    def _open(self):
+        return True
+
+    def _read(self):
+        if self._frame is None or self.frames_read % self.scene_frames == 0:
+            self.counts = {name: int(self._rng.integers(0, self.max_per_symbol + 1))
+                           for name in SCENE_SYMBOLS}
+            self._frame = render_scene(self.counts, self.size, rng=self._rng)
+        return True, self._frame.copy()
+
+
+def write_raw_dump(path, frames):
+    """
+    Save frames as a .npy dump that RawFrameDumpSource can memory-map.
+
+    Args:
+        path (str): Output path (should end in .npy)
+        frames: N x H x W x 3 array or list of equally sized frames
+    """
+    np.save(path, np.asarray(frames, dtype=np.uint8))
+
+
+def open_source(spec, **kwargs):
+    """
+    Create a frame source from a short text spec.
+
+    Specs:
+        "picamera2"               Raspberry Pi camera
+        "v4l2:0"                  V4L2/USB camera index 0
+        "dir:captured_images"     Directory of images
+        "video:run.mp4"           Video file
+        "raw:frames.npy"          Memory-mapped raw frame dump
+        "sim:7"                   Synthetic scenes (SimulatedCamera, seed 7)
+
+    Args:
+        spec (str): Source spec
+        **kwargs: Passed on to the source (e.g. pacing=REALTIME)
+
+    Returns:
+        FrameSource: The (unopened) source
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "picamera2":
+        return Picamera2Source(**kwargs)
+    if kind == "v4l2":
+        return V4L2Source(int(arg or 0), **kwargs)
+    if kind == "dir":
+        return ImageDirectorySource(arg or "captured_images", **kwargs)
+    if kind == "video":
+        return VideoFileSource(arg, **kwargs)
+    if kind == "raw":
+        return RawFrameDumpSource(arg, **kwargs)
+    if kind == "sim":
+        return SimulatedCamera(int(arg) if arg else None, **kwargs)
+    raise ValueError(f"Unknown frame source: {spec}")
+
+
+# Offline detection throughput benchmark against recorded frames
+if __name__ == "__main__":
+    import sys
+    from symbol_detection import detect_symbols
+
+    spec = sys.argv[1] if len(sys.argv) > 1 else "dir:captured_images"
+    pacing = REALTIME if "--realtime" in sys.argv else AS_FAST_AS_POSSIBLE
+
+    with open_source(spec, pacing=pacing) as source:
+        start = time.perf_counter()
+        detect_time = 0.0
+        for frame in source:
+            t0 = time.perf_counter()
+            detect_symbols(frame)
+            detect_time += time.perf_counter() - t0
+        elapsed = time.perf_counter() - start
+
+    n = source.frames_read
+    if n:
+        print(f"{n} frames in {elapsed:.2f} s ({n / elapsed:.1f} FPS end to end)")
+        print(f"Detection: {detect_time / n * 1000:.2f} ms/frame ({n / detect_time:.1f} FPS)")
+    else:
+        print("No frames read")
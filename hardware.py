@@ -0,0 +1,363 @@
+"""
+Hardware backends for Smart Logistics Bot.
+
+The bot talks to its motor pins, PWM and camera through the same small
+interfaces whether it runs on the robot or in simulation:
+
+    - "real": RPi.GPIO and the Pi camera (imported only when selected)
+    - "sim":  SimulatedGPIO, which records pin levels and motion time, and
+              synthetic scenes of red symbols (render_scene, shown by
+              frame_source.SimulatedCamera)
+
+In simulation the mission's event loop runs on a VirtualClock. Whenever the
+loop would sleep (a timed motion, the pause before a capture, the motors
+settling) the clock jumps ahead instead, while time spent computing or
+waiting on background work still counts. A multi-lap mission with
+detection, image writes and telemetry therefore finishes far faster than
+real time and reports the lap times it would have had on the robot.
+
+Example:
+    clock = VirtualClock()
+    gpio = load_gpio("sim", clock)
+    report = run_mission(runner.run(), clock)
+    print(clock.report())
+"""
+
+import asyncio
+import os
+import selectors
+import threading
+import time
+
+import numpy as np
+
+# Backend names (HARDWARE environment variable)
+REAL = "real"
+SIMULATED = "sim"
+
+# Symbols drawn by render_scene, in material order (see to_material_counts)
+SCENE_SYMBOLS = ["Circle", "Square", "Triangle", "X"]
+
+# Red in the camera's BGR channel order
+SYMBOL_COLOR = (0, 0, 255)
+
+
+# ===== VIRTUAL CLOCK =====
+class VirtualClock:
+    """
+    Simulated time that skips idle waits but keeps real work.
+
+    now() is the real time since the clock was created plus every idle
+    wait that was skipped.
+
+    Attributes:
+        skipped (float): Seconds of waiting skipped so far
+    """
+
+    def __init__(self):
+        self.skipped = 0.0
+        self._start = time.monotonic()
+        self._cpu_start = time.process_time()
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def now(self):
+        """Simulated seconds since the clock was created."""
+        return time.monotonic() - self._start + self.skipped
+
+    def advance(self, seconds):
+        """Skip seconds of idle time."""
+        with self._lock:
+            self.skipped += max(0.0, seconds)
+
+    @property
+    def busy(self):
+        """bool: True while background work started from the loop is running."""
+        return self._busy > 0
+
+    def track(self, func):
+        """
+        Mark background work as busy until func returns.
+
+        Must be called when the work is handed off, so the clock never skips
+        ahead between the hand-off and the worker starting.
+
+        Returns:
+            callable: func wrapped to clear the busy mark when it finishes
+        """
+        with self._lock:
+            self._busy += 1
+
+        def tracked(*args):
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+        return tracked
+
+    def report(self):
+        """
+        Compare simulated time with the real time and CPU time used.
+
+        Returns:
+            dict: simulated, wall, cpu and speedup
+        """
+        wall = time.monotonic() - self._start
+        simulated = wall + self.skipped
+        return {
+            "simulated": simulated,
+            "wall": wall,
+            "cpu": time.process_time() - self._cpu_start,
+            "speedup": simulated / wall if wall else float("inf"),
+        }
+
+
+class _SkippingSelector:
+    """Selector that advances the virtual clock instead of blocking while idle."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._selector = selectors.DefaultSelector()
+
+    def select(self, timeout=None):
+        if timeout is None or timeout <= 0 or self.clock.busy:
+            # Nothing scheduled, or background work is running: wait for real
+            return self._selector.select(timeout)
+        events = self._selector.select(0)
+        if not events:
+            self.clock.advance(timeout)
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop whose timers run on a VirtualClock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        super().__init__(_SkippingSelector(clock))
+
+    def time(self):
+        return self.clock.now()
+
+    def run_in_executor(self, executor, func, *args):
+        # The clock must not skip ahead while executor work is in flight
+        return super().run_in_executor(executor, self.clock.track(func), *args)
+
+
+def run_mission(coro, clock=None):
+    """
+    Run a coroutine to completion, on a VirtualClock if one is given.
+
+    Args:
+        coro: Coroutine, e.g. MissionRunner.run()
+        clock (VirtualClock): Simulated time (None = real time via asyncio.run)
+
+    Returns:
+        The coroutine's result
+    """
+    if clock is None:
+        return asyncio.run(coro)
+    loop = VirtualTimeLoop(clock)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_default_executor())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+# ===== GPIO =====
+class SimulatedPWM:
+    """PWM channel of SimulatedGPIO."""
+
+    def __init__(self, gpio, pin, frequency):
+        self.gpio = gpio
+        self.pin = pin
+        self.frequency = frequency
+        self.duty_cycle = 0
+
+    def start(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+
+    def ChangeDutyCycle(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+
+    def stop(self):
+        self.duty_cycle = 0
+
+
+class SimulatedGPIO:
+    """
+    Stand-in for the RPi.GPIO module that records what the motors do.
+
+    Attributes:
+        levels (dict): Pin -> current output level
+        writes (int): output() calls made
+        high_time (dict): Set of pins driven HIGH together (frozenset) ->
+            seconds that combination was active, e.g. how long the bot drove
+            forward
+    """
+    BCM = "BCM"
+    BOARD = "BOARD"
+    OUT = "OUT"
+    IN = "IN"
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self, clock=None):
+        """
+        Args:
+            clock (VirtualClock): Time source for high_time (default: real time)
+        """
+        self.clock = clock
+        self.mode = None
+        self.pins = []
+        self.levels = {}
+        self.pwm = {}
+        self.writes = 0
+        self.high_time = {}
+        self._high_since = None
+
+    def _now(self):
+        return self.clock.now() if self.clock else time.monotonic()
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, pin, direction, initial=LOW):
+        if pin not in self.pins:
+            self.pins.append(pin)
+        self.levels[pin] = initial
+
+    def output(self, pin, level):
+        if pin not in self.levels:
+            raise RuntimeError(f"Pin {pin} has not been set up as an output")
+        self._account()
+        self.levels[pin] = int(bool(level))
+        self.writes += 1
+
+    def input(self, pin):
+        return self.levels.get(pin, self.LOW)
+
+    def PWM(self, pin, frequency):
+        self.pwm[pin] = SimulatedPWM(self, pin, frequency)
+        return self.pwm[pin]
+
+    def cleanup(self):
+        self._account()
+        self.levels = {pin: self.LOW for pin in self.levels}
+
+    def high_pins(self):
+        """Return the pins currently driven HIGH."""
+        return frozenset(pin for pin, level in self.levels.items() if level)
+
+    def _account(self):
+        """Add the time since the last write to the pins that were HIGH."""
+        now = self._now()
+        if self._high_since is not None:
+            pins = self.high_pins()
+            self.high_time[pins] = self.high_time.get(pins, 0.0) + now - self._high_since
+        self._high_since = now
+
+
+def load_gpio(backend=REAL, clock=None):
+    """
+    Return the GPIO module for a backend.
+
+    Args:
+        backend (str): REAL or SIMULATED
+        clock (VirtualClock): Time source for the simulated backend
+
+    Returns:
+        RPi.GPIO or SimulatedGPIO
+    """
+    if backend == SIMULATED:
+        return SimulatedGPIO(clock)
+    if backend != REAL:
+        raise ValueError(f"Unknown hardware backend: {backend}")
+    import RPi.GPIO as GPIO
+    return GPIO
+
+
+def hardware_backend():
+    """Backend selected by the HARDWARE environment variable (default: real)."""
+    return os.environ.get("HARDWARE", REAL)
+
+
+# ===== SYNTHETIC SCENES =====
+def scene_layout(counts, roi=(100, 100, 440, 280), rng=None):
+    """
+    Place symbols in a grid of cells inside the ROI, so they never touch.
+
+    Args:
+        counts (dict): Symbol name (see SCENE_SYMBOLS) -> number to place
+        roi (tuple): (x, y, w, h) the symbols are placed inside
+        rng (np.random.Generator): Randomizes cell order and symbol size
+
+    Returns:
+        list: (name, (cx, cy), radius) for every symbol
+    """
+    rng = rng or np.random.default_rng()
+    x0, y0, w, h = roi
+    columns, rows = 4, 3
+    cell_w, cell_h = w // columns, h // rows
+    symbols = [name for name in SCENE_SYMBOLS for _ in range(counts.get(name, 0))]
+    if len(symbols) > columns * rows:
+        raise ValueError(f"At most {columns * rows} symbols fit in a scene")
+
+    layout = []
+    for name, cell in zip(symbols, rng.permutation(columns * rows)):
+        cx = x0 + int(cell % columns) * cell_w + cell_w // 2
+        cy = y0 + int(cell // columns) * cell_h + cell_h // 2
+        layout.append((name, (cx, cy), int(min(cell_w, cell_h) * rng.uniform(0.3, 0.4))))
+    return layout
+
+
+def draw_symbol(frame, name, center, r, color=SYMBOL_COLOR):
+    """Draw one filled symbol ("Circle", "Square", "Triangle" or "X") of radius r."""
+    import cv2
+
+    cx, cy = center
+    if name == "Circle":
+        cv2.circle(frame, (cx, cy), r, color, -1)
+    elif name == "Square":
+        cv2.rectangle(frame, (cx - r, cy - r), (cx + r, cy + r), color, -1)
+    elif name == "Triangle":
+        points = np.array([[cx - r, cy + r], [cx + r, cy + r], [cx, cy - r]])
+        cv2.fillPoly(frame, [points], color)
+    else:
+        thickness = max(4, r // 3)
+        cv2.line(frame, (cx - r, cy - r), (cx + r, cy + r), color, thickness)
+        cv2.line(frame, (cx + r, cy - r), (cx - r, cy + r), color, thickness)
+
+
+def render_scene(counts, size=(640, 480), roi=(100, 100, 440, 280), background=200, rng=None):
+    """
+    Draw red symbols on a plain background (see scene_layout).
+
+    Args:
+        counts (dict): Symbol name (see SCENE_SYMBOLS) -> number to draw
+        size (tuple): Frame (width, height)
+        roi (tuple): (x, y, w, h) the symbols are drawn inside
+        background (int): Gray level of the background
+        rng (np.random.Generator): Randomizes cell order and symbol size
+
+    Returns:
+        np.ndarray: BGR frame
+    """
+    width, height = size
+    frame = np.full((height, width, 3), background, np.uint8)
+    for name, center, r in scene_layout(counts, roi, rng):
+        draw_symbol(frame, name, center, r)
+    return frame
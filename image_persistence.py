@@ -0,0 +1,246 @@
+"""
+Asynchronous image persistence for Smart Logistics Bot.
+
+Frames are handed to an ImageWriter, which queues them and does the color
+conversion, JPEG encoding and SD card writes on background worker threads,
+so saving checkpoint images never holds up the control loop.
+"""
+
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+from metrics import count, span
+
+# What submit() does when the queue is full
+POLICY_BLOCK = "block"              # Wait for space (no frames lost)
+POLICY_DROP_NEWEST = "drop_newest"  # Reject the new frame
+POLICY_DROP_OLDEST = "drop_oldest"  # Discard the oldest queued frame
+POLICIES = (POLICY_BLOCK, POLICY_DROP_NEWEST, POLICY_DROP_OLDEST)
+
+_STOP = object()
+
+
+class ImageWriter:
+    """
+    Bounded-queue JPEG writer backed by worker threads.
+
+    Attributes:
+        written (int): Images written to disk
+        dropped (int): Images discarded because the queue was full
+        errors (int): Images that failed to encode or write
+    """
+
+    def __init__(self, max_queue=8, workers=1, policy=POLICY_BLOCK,
+                 fsync_every=4, jpeg_quality=90):
+        """
+        Start the worker threads.
+
+        Args:
+            max_queue (int): Maximum number of frames waiting to be written
+            workers (int): Number of encoder/writer threads
+            policy (str): One of POLICIES, applied when the queue is full
+            fsync_every (int): fsync written files in batches of this size
+                (0 disables explicit fsync and leaves it to the OS)
+            jpeg_quality (int): JPEG quality passed to cv2.imencode
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.policy = policy
+        self.fsync_every = fsync_every
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._unsynced = []
+        self._closed = False
+        self._workers = [threading.Thread(target=self._run, name=f"image-writer-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, path, frame, color_conversion=cv2.COLOR_RGB2BGR, copy=True):
+        """
+        Queue a frame to be saved as a JPEG.
+
+        Args:
+            path (str): Destination file path
+            frame: Image to save
+            color_conversion: cv2 conversion code applied before encoding, or None
+            copy (bool): Copy the frame so the caller may keep drawing on it
+
+        Returns:
+            bool: True if the frame was queued, False if it was dropped
+        """
+        if self._closed:
+            raise RuntimeError("ImageWriter is closed")
+        item = (path, frame.copy() if copy else frame, color_conversion)
+
+        if self.policy == POLICY_BLOCK:
+            self._queue.put(item)
+            return True
+
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                if self.policy == POLICY_DROP_NEWEST:
+                    self._count_drop(path)
+                    return False
+            # Drop the oldest queued frame and try again
+            try:
+                old_path = self._queue.get_nowait()[0]
+                self._queue.task_done()
+                self._count_drop(old_path)
+            except queue.Empty:
+                pass
+
+    def _count_drop(self, path):
+        with self._lock:
+            self.dropped += 1
+        count("images_dropped")
+        print(f"Image queue full, dropped {path}")
+
+    def _run(self):
+        """Worker loop: encode and write frames until told to stop."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path, frame, color_conversion):
+        """Encode one frame and write it to disk."""
+        try:
+            with span("jpeg_encode"):
+                if color_conversion is not None:
+                    frame = cv2.cvtColor(frame, color_conversion)
+                ok, encoded = cv2.imencode(".jpg", frame, self.encode_params)
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            with span("disk_write"):
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(encoded.tobytes())
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Error saving image {path}: {e}")
+            return
+
+        with self._lock:
+            self.written += 1
+            self._unsynced.append(path)
+            batch = None
+            if self.fsync_every and len(self._unsynced) >= self.fsync_every:
+                batch, self._unsynced = self._unsynced, []
+        if batch:
+            with span("fsync"):
+                self._fsync(batch)
+
+    def _fsync(self, paths):
+        """Flush a batch of written files (and their directories) to storage."""
+        directories = set()
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                directories.add(os.path.dirname(path) or ".")
+            except OSError as e:
+                print(f"Error syncing image {path}: {e}")
+        for directory in directories:
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass  # Directory fsync isn't supported everywhere
+
+    def pending(self):
+        """Return the number of frames waiting to be written."""
+        return self._queue.qsize()
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued frame has been written and synced.
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if the queue drained within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+        with self._lock:
+            batch, self._unsynced = self._unsynced, []
+        if batch and self.fsync_every:
+            self._fsync(batch)
+        return True
+
+    def _discard_queued(self):
+        """Drop every frame still waiting in the queue."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._queue.task_done()
+            if item is not _STOP:
+                with self._lock:
+                    self.dropped += 1
+                count("images_dropped")
+                print(f"Image writer closing, discarded {item[0]}")
+
+    def close(self, timeout=None):
+        """
+        Flush outstanding frames and stop the worker threads.
+
+        Frames still queued when the timeout expires are discarded (counted
+        as dropped), so a stuck disk can't hang shutdown.
+
+        Args:
+            timeout (float): Seconds to wait for the flush, or None to wait indefinitely
+
+        Returns:
+            bool: True if everything was written before shutdown
+        """
+        if self._closed:
+            return True
+        drained = self.flush(timeout)
+        self._closed = True
+        if not drained:
+            # Give up on the frames still queued so the stop markers fit
+            self._discard_queued()
+        for _ in self._workers:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break  # Workers are daemon threads and exit with the process
+        for worker in self._workers:
+            worker.join(timeout)
+        print(f"Image writer stopped ({self.written} written, {self.dropped} dropped, "
+              f"{self.errors} errors)")
+        return drained
@@ -0,0 +1,133 @@
+"""
+Material detection history for Smart Logistics Bot.
+
+Every checkpoint result is stored under history/ keyed by day, run and
+location, and the rollups that dashboards and reports read are updated in
+the same multi-path update with server-side increments. Readers fetch one
+small aggregate node instead of scanning raw events, and counts from
+several bots add up instead of overwriting each other.
+
+Database layout:
+    history/
+        events/<YYYY-MM-DD>/<runId>/<location>/<timestamp ms>
+                                        Counts seen at one checkpoint
+        rollups/
+            locations/<location>        Totals per material, visits, lastSeen
+            hourly/<YYYY-MM-DDTHH>      Totals per material, checkpoints (UTC)
+            runs/<runId>                startedAt, lastUpdate, totals and
+                                        per-location counts (last N runs only)
+            recentRuns/<runId>          startedAt, index of the runs kept
+"""
+
+import time
+
+from firebase_integration import increment
+
+HISTORY_ROOT = "history"
+
+# Runs kept in history/rollups/runs
+DEFAULT_MAX_RUNS = 10
+
+MATERIAL_KEYS = ["dispatchReady", "damaged", "eWaste", "rawMaterials"]
+
+
+def location_key(location):
+    """Make a location name safe to use as a database key."""
+    key = location.strip()
+    for char in ".$#[]/":
+        key = key.replace(char, "_")
+    return key or "unknown"
+
+
+class MaterialHistory:
+    """
+    Build the multi-path updates that record checkpoints and their rollups.
+
+    The class only produces update dicts; send them with
+    FirebaseConnector.commit_batch() or TelemetryPublisher.update().
+
+    Attributes:
+        run_id (str): Id of the current run
+        recent_runs (dict): Run id -> start time (ms) of the runs kept
+    """
+
+    def __init__(self, run_id=None, max_runs=DEFAULT_MAX_RUNS, recent_runs=None, root=HISTORY_ROOT):
+        """
+        Args:
+            run_id (str): Id of this run (default: start time, e.g. "20250101-093000")
+            max_runs (int): Number of runs kept in the per-run rollup
+            recent_runs (dict): Existing history/rollups/recentRuns contents,
+                so older runs can be pruned (see FirebaseConnector.read)
+            root (str): Database path the history lives under
+        """
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+        self.max_runs = max_runs
+        self.recent_runs = dict(recent_runs or {})
+        self.root = root.strip('/')
+
+    def _path(self, *parts):
+        return "/".join((self.root,) + parts)
+
+    def start_run(self, started_at=None):
+        """
+        Register the run and prune runs beyond max_runs.
+
+        Args:
+            started_at (int): Start time in ms (default: now)
+
+        Returns:
+            dict: Multi-path update
+        """
+        started_at = started_at or int(time.time() * 1000)
+        self.recent_runs[self.run_id] = started_at
+        updates = {
+            self._path("rollups", "recentRuns", self.run_id): started_at,
+            self._path("rollups", "runs", self.run_id, "startedAt"): started_at,
+        }
+
+        # Run ids sort by start time; drop the oldest beyond max_runs
+        ordered = sorted(self.recent_runs, key=lambda run: (self.recent_runs[run], run))
+        for run in ordered[:max(0, len(ordered) - self.max_runs)]:
+            del self.recent_runs[run]
+            updates[self._path("rollups", "recentRuns", run)] = None
+            updates[self._path("rollups", "runs", run)] = None
+        return updates
+
+    def checkpoint(self, location, counts, timestamp=None):
+        """
+        Record one checkpoint result and update every rollup.
+
+        Args:
+            location (str): Where the counts were taken
+            counts (dict): Material name -> count (see MATERIAL_KEYS)
+            timestamp (int): Time of the checkpoint in ms (default: now)
+
+        Returns:
+            dict: Multi-path update with the raw event and rollup increments
+        """
+        timestamp = timestamp or int(time.time() * 1000)
+        seconds = timestamp / 1000.0
+        day = time.strftime("%Y-%m-%d", time.gmtime(seconds))
+        hour = time.strftime("%Y-%m-%dT%H", time.gmtime(seconds))
+        location = location_key(location)
+        counts = {key: int(counts.get(key, 0)) for key in MATERIAL_KEYS}
+
+        location_node = self._path("rollups", "locations", location)
+        hourly_node = self._path("rollups", "hourly", hour)
+        run_node = self._path("rollups", "runs", self.run_id)
+
+        updates = {
+            self._path("events", day, self.run_id, location, str(timestamp)): counts,
+            f"{location_node}/visits": increment(1),
+            f"{location_node}/lastSeen": timestamp,
+            f"{hourly_node}/checkpoints": increment(1),
+            f"{run_node}/lastUpdate": timestamp,
+        }
+        for key, count in counts.items():
+            if not count:
+                continue
+            updates[f"{location_node}/{key}"] = increment(count)
+            updates[f"{hourly_node}/{key}"] = increment(count)
+            updates[f"{run_node}/totals/{key}"] = increment(count)
+            updates[f"{run_node}/locations/{location}/{key}"] = increment(count)
+        return updates
@@ -0,0 +1,359 @@
+"""
+Latency instrumentation for Smart Logistics Bot.
+
+Stages are timed with spans that feed fixed-bucket latency histograms:
+
+    from metrics import span
+
+    with span("contours"):
+        contours, _ = cv2.findContours(...)
+
+Recording a span is a perf_counter() pair, a bisect and a few additions
+under a lock - a couple of microseconds - so instrumentation stays on in
+production. The histograms and counters are served in the Prometheus text
+format by MetricsServer and can be dumped to a file at shutdown.
+
+Work done in a process pool is timed in the worker process; run it through
+collect() and merge() the returned samples in the parent so they show up
+in the parent's histograms.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "slbot"
+
+# Default port of the metrics endpoint
+DEFAULT_PORT = 9110
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets.
+
+    Attributes:
+        buckets (tuple): Bucket upper bounds in seconds
+        counts (list): Observations per bucket (last entry = above every bound)
+        total (float): Sum of all observations in seconds
+        count (int): Number of observations
+        errors (int): Spans that ended with an exception
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the buckets.
+
+        Returns:
+            float: Upper bound of the bucket holding the quantile, in seconds
+                (inf if it lies above the last bucket, None if empty)
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _Span:
+    """Context manager returned by MetricsRegistry.span()."""
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Latency histograms per stage and event counters.
+
+    Example:
+        registry = MetricsRegistry()
+        with registry.span("capture"):
+            ok, frame = camera.read()
+        registry.count("frames_dropped")
+        print(registry.prometheus_text())
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name):
+        """Time a block of code as stage name."""
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator that times every call of a function as stage name."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def observe(self, name, seconds, error=False):
+        """
+        Record one latency for stage name.
+
+        Args:
+            name (str): Stage name
+            seconds (float): Latency
+            error (bool): The stage failed
+        """
+        samples = getattr(self._local, "samples", None)
+        if samples is not None:
+            samples.append((name, seconds, error))
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if error:
+                histogram.errors += 1
+
+    def count(self, name, amount=1):
+        """Add amount to the event counter name."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    # ===== PROCESS POOLS =====
+    def collect(self, func, *args, **kwargs):
+        """
+        Call func and return the spans it recorded instead of keeping them.
+
+        Returns:
+            tuple: (func's result, list of (name, seconds, error) samples)
+        """
+        self._local.samples = samples = []
+        try:
+            return func(*args, **kwargs), samples
+        finally:
+            self._local.samples = None
+
+    def merge(self, samples):
+        """Record samples returned by collect(), e.g. from a worker process."""
+        for name, seconds, error in samples:
+            self.observe(name, seconds, error)
+
+    # ===== EXPORT =====
+    def summary(self):
+        """
+        Return per-stage statistics.
+
+        Returns:
+            dict: Stage -> {"count", "errors", "mean_ms", "p50_ms", "p95_ms", "p99_ms"};
+                percentiles are bucket upper bounds
+        """
+        with self._lock:
+            histograms = {name: (h.count, h.errors, h.total, h.quantile(0.5), h.quantile(0.95),
+                                 h.quantile(0.99))
+                          for name, h in self.histograms.items()}
+        return {
+            name: {
+                "count": count,
+                "errors": errors,
+                "mean_ms": total / count * 1000 if count else 0.0,
+                "p50_ms": p50 * 1000,
+                "p95_ms": p95 * 1000,
+                "p99_ms": p99 * 1000,
+            }
+            for name, (count, errors, total, p50, p95, p99) in sorted(histograms.items())
+        }
+
+    def format_summary(self):
+        """Return the per-stage statistics as a short human-readable table."""
+        lines = [f"{'stage':<22}{'count':>8}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<22}{s['count']:>8}{s['mean_ms']:>10.2f}"
+                         f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['errors']:>8}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<22}{value:>8}")
+        return "\n".join(lines)
+
+    def prometheus_text(self):
+        """Return every metric in the Prometheus text exposition format."""
+        latency = f"{METRIC_PREFIX}_stage_latency_seconds"
+        errors = f"{METRIC_PREFIX}_stage_errors_total"
+        events = f"{METRIC_PREFIX}_events_total"
+        with self._lock:
+            histograms = {name: (list(h.counts), h.total, h.count, h.errors)
+                          for name, h in self.histograms.items()}
+            counters = dict(self.counters)
+
+        lines = [f"# HELP {latency} Latency of each instrumented stage.",
+                 f"# TYPE {latency} histogram"]
+        for name, (counts, total, count, _) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{latency}_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{latency}_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{latency}_sum{{stage="{name}"}} {total:.9g}')
+            lines.append(f'{latency}_count{{stage="{name}"}} {count}')
+
+        lines += [f"# HELP {errors} Instrumented stages that raised an exception.",
+                  f"# TYPE {errors} counter"]
+        for name, (_, _, _, error_count) in sorted(histograms.items()):
+            lines.append(f'{errors}{{stage="{name}"}} {error_count}')
+
+        lines += [f"# HELP {events} Event counters.", f"# TYPE {events} counter"]
+        for name, value in sorted(counters.items()):
+            lines.append(f'{events}{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write prometheus_text() to a file (e.g. at shutdown)."""
+        with open(path, "w") as f:
+            f.write(self.prometheus_text())
+
+    def reset(self):
+        """Drop every histogram and counter."""
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+
+class MetricsServer:
+    """
+    HTTP endpoint serving a registry in the Prometheus text format at /metrics.
+
+    Example:
+        server = MetricsServer(port=9110)
+        server.start()   # curl http://<bot-ip>:9110/metrics
+    """
+
+    def __init__(self, registry=None, host="0.0.0.0", port=DEFAULT_PORT):
+        """
+        Args:
+            registry (MetricsRegistry): Registry to serve (default: REGISTRY)
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 = any free port)
+        """
+        self.registry = registry or REGISTRY
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """
+        Start serving in a background thread.
+
+        Returns:
+            int: The port the server listens on
+        """
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] == "/metrics":
+                    body = registry.prometheus_text().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                else:
+                    body = b"Not found"
+                    self.send_response(404)
+                    self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep request logging out of the bot's console
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="metrics-server", daemon=True)
+        self._thread.start()
+        print(f"Metrics available at http://{self.host}:{self.port}/metrics")
+        return self.port
+
+    def stop(self):
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Process-wide registry used by the instrumented modules
+REGISTRY = MetricsRegistry()
+
+
+def span(name):
+    """Time a block of code as stage name in the process-wide registry."""
+    return REGISTRY.span(name)
+
+
+def timed(name):
+    """Decorator that times a function as stage name in the process-wide registry."""
+    return REGISTRY.timed(name)
+
+
+def observe(name, seconds, error=False):
+    """Record a latency measured elsewhere in the process-wide registry."""
+    REGISTRY.observe(name, seconds, error)
+
+
+def count(name, amount=1):
+    """Add to an event counter in the process-wide registry."""
+    REGISTRY.count(name, amount)
+
+
+def collect(func, *args, **kwargs):
+    """
+    Run func with its spans collected instead of recorded.
+
+    Submit this to a process pool instead of func, and merge() the samples
+    in the parent:
+
+        future = pool.submit(collect, detect_symbols, frame)
+        result, samples = future.result()
+        merge(samples)
+    """
+    return REGISTRY.collect(func, *args, **kwargs)
+
+
+def merge(samples):
+    """Record samples returned by collect() in the process-wide registry."""
+    REGISTRY.merge(samples)
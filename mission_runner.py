@@ -0,0 +1,189 @@
+"""
+Pipelined mission runner for Smart Logistics Bot.
+
+MissionRunner drives a motion plan (see RoutePlanner.motion_plan) for a
+number of laps without operator input. At each stop that needs a visit it
+only captures the frames, then starts driving to the next stop straight
+away. Detection, image writes and the Firebase upload for that stop run on
+a background worker while the bot is moving, so the lap time is set by
+driving, not by driving plus processing.
+
+Every capture carries its location and capture time, so results are
+attributed to the stop they were taken at even when they are finished
+after the bot has moved on.
+
+Mission settings are read from a JSON file (see mission.json):
+
+    {"visit": ["Building A", "Building C"], "laps": 3, "capture_delay": 1.0}
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import observe
+
+# Defaults for settings missing from the mission file
+DEFAULT_MISSION = {
+    "visit": None,          # Buildings to visit (None = every building in the site graph)
+    "laps": 1,              # Times to drive the route
+    "capture_delay": 1.0,   # Seconds to stand still before capturing
+    "max_pending": 2,       # Stops that may be processed in the background at once
+}
+
+
+def load_mission(path="mission.json"):
+    """
+    Load mission settings, filling in defaults.
+
+    A missing file gives the default mission.
+
+    Args:
+        path (str): JSON mission file
+
+    Returns:
+        dict: Settings with every key of DEFAULT_MISSION
+    """
+    mission = dict(DEFAULT_MISSION)
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            mission.update(json.load(f))
+    mission["laps"] = int(mission["laps"])
+    if mission["laps"] < 1:
+        raise ValueError(f"A mission needs at least one lap, got {mission['laps']}")
+    return mission
+
+
+class MissionRunner:
+    """
+    Drive a motion plan for several laps, processing stops in the background.
+
+    Example:
+        runner = MissionRunner(motors, plan, capture, process, laps=3)
+        report = asyncio.run(runner.run())
+
+    Attributes:
+        lap_times (list): Seconds each lap took, from leaving to returning to the start
+        drive_time (float): Seconds spent in motion primitives
+        backlog_waits (float): Seconds spent waiting for background processing
+            to catch up before a capture (see max_pending)
+        checkpoints (list): (lap, location, result) for every processed stop
+        errors (list): (lap, location, exception) for stops whose processing failed
+    """
+
+    def __init__(self, motors, plan, capture, process, laps=1, capture_delay=1.0,
+                 max_pending=2, on_arrive=None):
+        """
+        Args:
+            motors (MotorController): Motors to drive the plan with
+            plan (list): Steps from RoutePlanner.motion_plan()
+            capture (callable): capture(location) -> captured data; runs in a
+                thread and should only read the camera
+            process (callable): process(location, captured) -> result; runs
+                on the background worker, one stop at a time, in visit order
+            laps (int): Times to drive the plan
+            capture_delay (float): Seconds to stand still before capturing
+            max_pending (int): Stops that may wait for processing before
+                the bot waits for the worker to catch up
+            on_arrive (callable): on_arrive(location) at every node reached
+        """
+        self.motors = motors
+        self.plan = plan
+        self.capture = capture
+        self.process = process
+        self.laps = laps
+        self.capture_delay = capture_delay
+        self.max_pending = max(1, max_pending)
+        self.on_arrive = on_arrive
+
+        self.lap_times = []
+        self.drive_time = 0.0
+        self.backlog_waits = 0.0
+        self.checkpoints = []
+        self.errors = []
+        self._pending = []
+
+    async def run(self):
+        """
+        Drive every lap, then wait for the last stops to finish processing.
+
+        Returns:
+            dict: Summary (see report())
+        """
+        loop = asyncio.get_running_loop()
+        # A single worker keeps the uploads in the order the stops were visited
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint") as worker:
+            try:
+                for lap in range(1, self.laps + 1):
+                    print(f"\n==== Lap {lap}/{self.laps} ====")
+                    started = loop.time()
+                    for step in self.plan:
+                        await self._execute(step, lap, loop, worker)
+                    self.lap_times.append(loop.time() - started)
+                    print(f"Lap {lap} took {self.lap_times[-1]:.1f} s")
+            finally:
+                await self._drain(len(self._pending))
+        return self.report()
+
+    async def _execute(self, step, lap, loop, worker):
+        """Carry out one step of the motion plan."""
+        if step["action"] in ("turn", "move"):
+            started = loop.time()
+            if step["action"] == "turn":
+                await self.motors.turn(step["direction"], step["duration"])
+            else:
+                print(f"\nNavigating to {step['to']}...")
+                await self.motors.move(step["duration"])
+            elapsed = loop.time() - started
+            self.drive_time += elapsed
+            observe(step["action"], elapsed)
+            return
+
+        location = step["location"]
+        print(f"Arrived at {location}")
+        if self.on_arrive:
+            self.on_arrive(location)
+        if not step["visit"]:
+            return
+
+        await asyncio.sleep(self.capture_delay)  # Let the bot come to rest
+        # Don't let captures pile up faster than they can be processed
+        waited = loop.time()
+        await self._drain(len(self._pending) - self.max_pending + 1)
+        self.backlog_waits += loop.time() - waited
+        observe("backlog_wait", loop.time() - waited)
+
+        captured = await asyncio.to_thread(self.capture, location)
+        future = loop.run_in_executor(worker, self.process, location, captured)
+        self._pending.append((lap, location, future))
+
+    async def _drain(self, count):
+        """Wait for the oldest count pending stops to finish processing."""
+        while count > 0 and self._pending:
+            lap, location, future = self._pending.pop(0)
+            count -= 1
+            try:
+                result = await future
+            except Exception as e:
+                print(f"Processing failed at {location} (lap {lap}): {e}")
+                self.errors.append((lap, location, e))
+            else:
+                self.checkpoints.append((lap, location, result))
+
+    def report(self):
+        """
+        Summarize the mission.
+
+        Returns:
+            dict: laps, lap_times, drive_time, backlog_waits, checkpoints and errors
+        """
+        return {
+            "laps": len(self.lap_times),
+            "lap_times": list(self.lap_times),
+            "drive_time": self.drive_time,
+            "backlog_waits": self.backlog_waits,
+            "checkpoints": len(self.checkpoints),
+            "errors": len(self.errors),
+        }
+
@@ -0,0 +1,193 @@
+"""
+Non-blocking motor control for Smart Logistics Bot.
+
+MotorController drives the L298N-style motor pins from asyncio timers
+instead of time.sleep(). Each motion primitive sets the pins, schedules
+the stop with loop.call_later() and returns an awaitable, so capture,
+detection and uploads can run on the same event loop while the wheels
+turn. Motions can be cancelled at any time, which stops the motors at once.
+
+The pause that lets the bot come to rest is only inserted when the next
+motion would reverse a motor that has just been running, instead of after
+every stop.
+"""
+
+import asyncio
+import time
+
+# Default BCM pin numbers
+DEFAULT_PINS = {
+    "in1": 17, "in2": 27, "en_a": 4,   # Right motor
+    "in3": 5, "in4": 6, "en_b": 13,    # Left motor
+}
+
+# Pin levels (in1, in2, in3, in4) for each motion
+FORWARD = (1, 0, 0, 1)  # Both motors forward
+RIGHT = (0, 1, 0, 0)    # Right motor backward, left motor stopped
+LEFT = (0, 0, 1, 0)     # Left motor backward, right motor stopped
+STOPPED = (0, 0, 0, 0)
+
+TURN_PATTERNS = {"right": RIGHT, "left": LEFT, "around": RIGHT}
+
+
+def _motor_directions(pattern):
+    """Return (right, left) motor directions: 1 forward, -1 backward, 0 stopped."""
+    in1, in2, in3, in4 = pattern
+    return in1 - in2, in4 - in3
+
+
+class MotorController:
+    """
+    Timed, cancellable motion primitives for the two drive motors.
+
+    Example:
+        motors = MotorController(GPIO)
+        motors.setup()
+        await motors.move(3)
+        await motors.turn("right", 1.5)
+
+    Attributes:
+        motion (str): Current motion ("stopped", "forward", "right", "left")
+        motions (int): Motion primitives started
+        settle_waits (float): Seconds spent letting the bot come to rest
+    """
+
+    def __init__(self, gpio, pins=None, speed=75, settle_time=0.3):
+        """
+        Args:
+            gpio: RPi.GPIO module (or a compatible simulation)
+            pins (dict): Pin numbers (see DEFAULT_PINS)
+            speed (int): PWM duty cycle for both motors (0-100)
+            settle_time (float): Seconds a motor must rest before it reverses
+        """
+        self.gpio = gpio
+        self.pins = dict(DEFAULT_PINS, **(pins or {}))
+        self.speed = speed
+        self.settle_time = settle_time
+        self.motion = "stopped"
+        self.motions = 0
+        self.settle_waits = 0.0
+
+        self._pattern = STOPPED
+        self._last_pattern = STOPPED
+        self._stopped_at = None
+        self._timer = None
+        self._done = None
+        self._pwm = []
+
+    def setup(self):
+        """Configure the motor pins and start PWM."""
+        gpio = self.gpio
+        gpio.setwarnings(False)
+        gpio.setmode(gpio.BCM)
+        for pin in self.pins.values():
+            gpio.setup(pin, gpio.OUT)
+        self._pwm = [gpio.PWM(self.pins["en_a"], 100), gpio.PWM(self.pins["en_b"], 100)]
+        for pwm in self._pwm:
+            pwm.start(self.speed)
+        for pin in ("in1", "in2", "in3", "in4"):
+            gpio.output(self.pins[pin], gpio.LOW)
+
+    # ===== MOTION PRIMITIVES =====
+    async def move(self, duration):
+        """Drive forward for duration seconds, then stop."""
+        print("Moving forward...")
+        await self._run("forward", FORWARD, duration)
+
+    async def turn(self, direction, duration):
+        """
+        Turn in place for duration seconds, then stop.
+
+        Args:
+            direction (str): "right", "left" or "around" (spins right)
+            duration (float): Seconds to turn
+        """
+        if direction not in TURN_PATTERNS:
+            raise ValueError(f"Unknown turn direction: {direction}")
+        print(f"Turning {direction}...")
+        await self._run(direction, TURN_PATTERNS[direction], duration)
+
+    async def stop(self):
+        """Stop the motors now, cancelling any motion in progress."""
+        self.stop_now()
+
+    def stop_now(self):
+        """
+        Stop the motors immediately (safe to call from any code, e.g. cleanup).
+
+        A motion in progress ends early; whoever awaits it resumes normally.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._done is not None and not self._done.done():
+            self._done.set_result(None)
+        self._done = None
+        if self._pattern != STOPPED:
+            self._apply(STOPPED)
+            print("Car stopped")
+
+    @property
+    def busy(self):
+        """bool: True while a motion primitive is running."""
+        return self._done is not None and not self._done.done()
+
+    # ===== INTERNALS =====
+    async def _run(self, name, pattern, duration):
+        """Start a motion, stop it from a timer after duration and wait for that."""
+        if self.busy:
+            self.stop_now()  # A new motion replaces the one in progress
+
+        loop = asyncio.get_running_loop()
+        self._done = done = loop.create_future()
+        try:
+            await self._settle(pattern)
+            if done.done():
+                return  # Stopped while waiting to settle
+            self.motion = name
+            self.motions += 1
+            self._apply(pattern)
+            self._timer = loop.call_later(duration, self._finish, done)
+            await done
+        except asyncio.CancelledError:
+            # Cancelled by the caller: never leave the wheels turning
+            if self._done is done:
+                self.stop_now()
+            raise
+
+    def _finish(self, done):
+        """Timer callback: stop the motors at the end of a motion."""
+        self._timer = None
+        self._apply(STOPPED)
+        if not done.done():
+            done.set_result(None)
+
+    async def _settle(self, pattern):
+        """Wait only if this motion reverses a motor that has just stopped."""
+        if self._stopped_at is None or not self.settle_time:
+            return
+        reverses = any(old * new < 0 for old, new in zip(_motor_directions(self._last_pattern),
+                                                         _motor_directions(pattern)))
+        remaining = self._stopped_at + self.settle_time - self._now()
+        if reverses and remaining > 0:
+            self.settle_waits += remaining
+            await asyncio.sleep(remaining)
+
+    def _now(self):
+        """Event loop time (time.monotonic() outside a loop, e.g. during cleanup)."""
+        try:
+            return asyncio.get_running_loop().time()
+        except RuntimeError:
+            return time.monotonic()
+
+    def _apply(self, pattern):
+        """Write a pin pattern, skipping the write if nothing changes."""
+        if pattern == self._pattern:
+            return
+        if pattern == STOPPED:
+            self._last_pattern = self._pattern
+            self._stopped_at = self._now()
+            self.motion = "stopped"
+        for pin, level in zip(("in1", "in2", "in3", "in4"), pattern):
+            self.gpio.output(self.pins[pin], self.gpio.HIGH if level else self.gpio.LOW)
+        self._pattern = pattern
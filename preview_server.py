@@ -0,0 +1,198 @@
+"""
+Headless live preview for Smart Logistics Bot.
+
+Serves the latest annotated frame as an MJPEG stream over HTTP from a
+background thread, replacing cv2.imshow/waitKey on bots without a display.
+Publishing a frame never blocks, and frames are only JPEG encoded while at
+least one viewer is connected.
+
+Open http://<bot-ip>:8080/ in a browser to watch the stream.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+BOUNDARY = "frame"
+
+INDEX_PAGE = b"""<!DOCTYPE html>
+<html><head><title>Smart Logistics Bot - Live Preview</title></head>
+<body style="margin:0;background:#111">
+<img src="/stream.mjpg" style="display:block;margin:auto;max-width:100%">
+</body></html>
+"""
+
+
+class PreviewServer:
+    """
+    Publish frames to an MJPEG-over-HTTP endpoint.
+
+    Attributes:
+        host (str): Interface the server listens on
+        port (int): Port the server listens on
+        viewers (int): Number of connected stream viewers
+    """
+
+    def __init__(self, host="0.0.0.0", port=8080, jpeg_quality=70):
+        """
+        Configure the preview server (call start() to begin serving).
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on
+            jpeg_quality (int): JPEG quality of streamed frames
+        """
+        self.host = host
+        self.port = port
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.viewers = 0
+
+        self._cond = threading.Condition()
+        self._encode_lock = threading.Lock()
+        self._frame = None
+        self._color_conversion = None
+        self._version = 0
+        self._jpeg = None
+        self._jpeg_version = -1
+        self._server = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """
+        Start serving in a background thread.
+
+        Returns:
+            int: The port the server listens on (useful with port=0)
+        """
+        if self._running:
+            return self.port
+        preview = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in ("/", "/index.html"):
+                    self._send(200, "text/html", INDEX_PAGE)
+                elif self.path.startswith("/snapshot.jpg"):
+                    preview._add_viewer()
+                    try:
+                        jpeg, _ = preview._wait_for_jpeg(-1, timeout=5)
+                    finally:
+                        preview._remove_viewer()
+                    if jpeg is None:
+                        self._send(503, "text/plain", b"No frame available")
+                    else:
+                        self._send(200, "image/jpeg", jpeg)
+                elif self.path.startswith("/stream.mjpg"):
+                    self._stream()
+                else:
+                    self._send(404, "text/plain", b"Not found")
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.end_headers()
+                preview._add_viewer()
+                try:
+                    version = -1
+                    while preview._running:
+                        jpeg, version = preview._wait_for_jpeg(version, timeout=1)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write(f"--{BOUNDARY}\r\n".encode())
+                        self.wfile.write(b"Content-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Viewer disconnected
+                finally:
+                    preview._remove_viewer()
+
+            def log_message(self, format, *args):
+                pass  # Keep request logging out of the bot's console
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="preview-server", daemon=True)
+        self._thread.start()
+        print(f"Live preview available at http://{self.host}:{self.port}/")
+        return self.port
+
+    def stop(self):
+        """Stop the server and disconnect viewers."""
+        if not self._running:
+            return
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=2)
+
+    def publish(self, frame, color_conversion=None):
+        """
+        Make a frame the latest preview frame. Never blocks on viewers.
+
+        Only a reference is kept, so the caller must not draw on the frame
+        after publishing it. Nothing is encoded unless a viewer is connected.
+
+        Args:
+            frame: Image to show
+            color_conversion: cv2 conversion code to get BGR for encoding, or None
+        """
+        with self._cond:
+            self._frame = frame
+            self._color_conversion = color_conversion
+            self._version += 1
+            self._cond.notify_all()
+
+    def _add_viewer(self):
+        with self._cond:
+            self.viewers += 1
+
+    def _remove_viewer(self):
+        with self._cond:
+            self.viewers -= 1
+
+    def _wait_for_jpeg(self, seen_version, timeout):
+        """
+        Wait for a frame newer than seen_version and return it JPEG encoded.
+
+        The encoding is done once per frame and shared by all viewers, on
+        the viewer's thread rather than the publisher's.
+
+        Returns:
+            tuple: (jpeg bytes or None, version)
+        """
+        with self._cond:
+            if self._version <= seen_version or self._frame is None:
+                self._cond.wait(timeout)
+            if self._frame is None or self._version <= seen_version:
+                return None, seen_version
+            frame, version = self._frame, self._version
+            color_conversion = self._color_conversion
+
+        # Encode outside the condition lock so publish() is never held up
+        with self._encode_lock:
+            if self._jpeg_version != version:
+                if color_conversion is not None:
+                    frame = cv2.cvtColor(frame, color_conversion)
+                ok, encoded = cv2.imencode(".jpg", frame, self.encode_params)
+                if not ok:
+                    return None, seen_version
+                self._jpeg = encoded.tobytes()
+                self._jpeg_version = version
+            return self._jpeg, self._jpeg_version
@@ -5,17 +5,17 @@ This demonstrates how to update the Firebase database when:
 2. The camera detects materials (using OpenCV)
 """
 
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import db
 import time
 import cv2
 import numpy as np
 import os
 from firebase_integration import FirebaseConnector
-import RPi.GPIO as GPIO
-from time import sleep
-from picamera2 import Picamera2
+from rtdb_emulator import emulator_from_spec
+from color_lut import ColorClassifier, label_components
+from preview_server import PreviewServer
+from capture_pipeline import CapturePipeline, BLOCK
+from frame_source import open_source
+from metrics import REGISTRY, MetricsServer, span
 
 # ===== CONFIGURATION =====
 # Replace with your Firebase project details
@@ -37,20 +37,35 @@ HSV_RANGES = {
 # Minimum contour area to consider a detection valid
 MIN_CONTOUR_AREA = 1000
 
+# How detect_materials() finds blobs:
+#   "components" - one connected-components pass over the class label image
+#   "contours"   - one findContours pass per material
+MATERIAL_LABELING_MODE = "components"
+
+# Lookup-table classifier compiled from HSV_RANGES (built on first use)
+material_classifier = None
+
+# Firebase connector (created by initialize_firebase)
+firebase = None
+
 # ===== FIREBASE SETUP =====
 def initialize_firebase():
     """Initialize Firebase connection"""
+    global firebase
     try:
-        # Check if the credential file exists
-        if not os.path.exists(FIREBASE_CRED_PATH):
-            print(f"Error: Firebase credentials file not found at {FIREBASE_CRED_PATH}")
-            return False
-            
-        cred = credentials.Certificate(FIREBASE_CRED_PATH)
-        firebase_admin.initialize_app(cred, {
-            'databaseURL': FIREBASE_DB_URL
-        })
-        print("Firebase initialized successfully")
+        # Writes are logged locally and uploaded later if Firebase is unreachable
+        # FIREBASE_EMULATOR runs against an in-process database instead,
+        # e.g. "latency=0.2,failure_rate=0.1" (see rtdb_emulator.py)
+        database = None
+        if os.environ.get("FIREBASE_EMULATOR"):
+            database = emulator_from_spec(os.environ["FIREBASE_EMULATOR"])
+        # BOT_ID enables fleet mode: state goes under bots/<BOT_ID>/
+        firebase = FirebaseConnector(FIREBASE_CRED_PATH, database_url=FIREBASE_DB_URL,
+                                     database=database, bot_id=os.environ.get("BOT_ID"))
+        if firebase.connected:
+            print("Firebase initialized successfully")
+        else:
+            print("Firebase unavailable, logging locally until it connects")
         return True
     except Exception as e:
         print(f"Error initializing Firebase: {e}")
@@ -62,40 +77,16 @@ def update_location(location):
     if location not in LOCATIONS:
         print(f"Warning: {location} is not a valid location. Valid locations: {LOCATIONS}")
         return False
-        
-    try:
-        db.reference('currentLocation').set(location)
-        db.reference('lastUpdate').set(int(time.time() * 1000))  # Current time in milliseconds
-        print(f"Location updated to: {location}")
-        return True
-    except Exception as e:
-        print(f"Error updating location: {e}")
-        return False
+    
+    # Location and timestamp go out in one multi-path update
+    return firebase.update_location(location)
 
 def update_materials(materials_dict):
-    """Update the detected materials counts in Firebase"""
-    try:
-        # Get current values
-        current_data = db.reference('detectedMaterials').get() or {
-            "dispatchReady": 0,
-            "damaged": 0,
-            "eWaste": 0,
-            "rawMaterials": 0
-        }
-        
-        # Update with new values
-        for key, value in materials_dict.items():
-            if key in current_data:
-                current_data[key] += value
-        
-        # Set the updated values
-        db.reference('detectedMaterials').set(current_data)
-        db.reference('lastUpdate').set(int(time.time() * 1000))
-        print(f"Materials updated: {materials_dict}")
-        return True
-    except Exception as e:
-        print(f"Error updating materials: {e}")
-        return False
+    """Add newly detected material counts to the totals in Firebase"""
+    # Server-side increments: no read-modify-write, so counts from several
+    # bots never overwrite each other. Deltas from a few calls are summed
+    # locally and sent together.
+    return firebase.accumulate_materials(materials_dict)
 
 # ===== CHECKPOINT DETECTION =====
 def detect_checkpoint(frame, checkpoint_markers):
@@ -126,48 +117,72 @@ def detect_checkpoint(frame, checkpoint_markers):
     return None
 
 # ===== MATERIAL DETECTION =====
-def detect_materials(frame):
+def detect_materials(frame, return_blobs=False):
     """
     Detect materials using color thresholding
     
+    All materials are labelled in a single pass: one lookup-table class image
+    and one connected-components call, however many HSV_RANGES there are.
+    
     Args:
         frame: Camera frame
+        return_blobs: Also return per-blob stats for later stages
         
     Returns:
-        Dictionary with counts of each material type detected
+        Dictionary with counts of each material type detected, or
+        (counts, blobs) if return_blobs is True. Each blob is a dict with
+        "material", "area", "bbox" (x, y, w, h) and "centroid" (x, y).
     """
-    # Initialize results
-    results = {
-        "dispatchReady": 0,
-        "damaged": 0,
-        "eWaste": 0,
-        "rawMaterials": 0
-    }
+    # Classify every pixel with one table lookup instead of cvtColor + inRange per range
+    global material_classifier
+    if material_classifier is None:
+        material_classifier = ColorClassifier(HSV_RANGES)
+    labels = material_classifier.classify(frame)
     
-    # Convert to HSV for better color detection
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    if MATERIAL_LABELING_MODE == "components":
+        # Label blobs of every material at once and drop the small ones
+        counts, blobs = label_components(labels, len(material_classifier.classes),
+                                         min_area=MIN_CONTOUR_AREA)
+        for blob in blobs:
+            blob["material"] = material_classifier.classes[blob.pop("label") - 1]
+        results = {material: int(counts[material_classifier.label_of(material)])
+                   for material in HSV_RANGES}
+    else:
+        results, blobs = _detect_materials_by_contours(labels)
     
-    # Detect each material type by color
-    for material, (lower, upper) in HSV_RANGES.items():
-        # Convert HSV ranges to numpy arrays
-        lower_bound = np.array(lower)
-        upper_bound = np.array(upper)
-        
+    if return_blobs:
+        return results, blobs
+    return results
+
+def _detect_materials_by_contours(labels):
+    """Count materials with a separate findContours pass per material."""
+    results = {}
+    blobs = []
+    for material in HSV_RANGES:
         # Create mask for this color
-        mask = cv2.inRange(hsv, lower_bound, upper_bound)
+        mask = (labels == material_classifier.label_of(material)).view(np.uint8)
         
         # Find contours
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        with span("contours"):
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         # Count valid detections
         count = 0
         for contour in contours:
-            if cv2.contourArea(contour) > MIN_CONTOUR_AREA:
+            area = cv2.contourArea(contour)
+            if area > MIN_CONTOUR_AREA:
                 count += 1
+                x, y, w, h = cv2.boundingRect(contour)
+                M = cv2.moments(contour)
+                blobs.append({
+                    "material": material,
+                    "area": int(area),
+                    "bbox": (x, y, w, h),
+                    "centroid": (M["m10"] / M["m00"], M["m01"] / M["m00"])
+                })
                 
         results[material] = count
-    
-    return results
+    return results, blobs
 
 # ===== MAIN FUNCTION =====
 def main():
@@ -177,11 +192,11 @@ def main():
         print("Failed to initialize Firebase. Exiting.")
         return
     
-    # Initialize camera
+    # Initialize camera (FRAME_SOURCE can point at recorded data, e.g. "video:run.mp4")
     print("Initializing camera...")
-    cap = cv2.VideoCapture(0)  # Use 0 for default camera
+    cap = open_source(os.environ.get("FRAME_SOURCE", "v4l2:0"))  # Use v4l2:0 for default camera
     
-    if not cap.isOpened():
+    if not cap.open():
         print("Error: Could not open camera")
         return
     
@@ -195,49 +210,79 @@ def main():
     }
     
     # Set initial location
-    current_location = "Start"
-    update_location(current_location)
+    state = {"location": "Start", "last_materials_update": time.time()}
+    update_location(state["location"])
     
-    print("Bot monitoring started. Press 'q' to quit.")
+    # Live preview replaces the OpenCV window (view at http://<bot-ip>:8080/)
+    preview = PreviewServer(port=8080)
+    preview.start()
     
-    try:
-        last_materials_update = time.time()
-        materials_update_interval = 5  # Update materials every 5 seconds
+    # Per-stage latency histograms for Prometheus (http://<bot-ip>:9110/metrics)
+    metrics_server = MetricsServer(port=int(os.environ.get("METRICS_PORT", 9110)))
+    metrics_server.start()
+    
+    materials_update_interval = 5  # Update materials every 5 seconds
+    metrics_interval = 30          # Print pipeline metrics every 30 seconds
+    
+    def detection_stage(packet):
+        """Detect checkpoints and materials on the freshest frame."""
+        frame = packet.frame
+        events = []
+        
+        # Detect checkpoint (if location has changed)
+        location = detect_checkpoint(frame, checkpoint_markers)
+        if location and location != state["location"]:
+            state["location"] = location
+            events.append(packet.derive(("location", location)))
         
-        while True:
-            # Capture frame
-            ret, frame = cap.read()
-            if not ret:
-                print("Error: Failed to capture frame")
-                break
-            
-            # Detect checkpoint (if location has changed)
-            location = detect_checkpoint(frame, checkpoint_markers)
-            if location and location != current_location:
-                current_location = location
-                update_location(current_location)
-            
-            # Periodically detect and update materials
-            current_time = time.time()
-            if current_time - last_materials_update > materials_update_interval:
-                materials = detect_materials(frame)
-                if any(materials.values()):  # Only update if something was detected
-                    update_materials(materials)
-                last_materials_update = current_time
-            
-            # Display frame (remove in production)
-            cv2.imshow('Camera Feed', frame)
-            
-            # Check for exit key
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        # Periodically detect and update materials
+        current_time = time.time()
+        if current_time - state["last_materials_update"] > materials_update_interval:
+            materials = detect_materials(frame)
+            if any(materials.values()):  # Only update if something was detected
+                events.append(packet.derive(("materials", materials)))
+            state["last_materials_update"] = current_time
+        
+        # Publish frame to the live preview (never blocks the loop)
+        preview.publish(frame)
+        return events
+    
+    def telemetry_stage(packet):
+        """Send detection events to Firebase off the detection thread."""
+        kind, value = packet.data
+        if kind == "location":
+            update_location(value)
+        elif kind == "materials":
+            update_materials(value)
+    
+    # Capture -> detection (latest frame wins) -> telemetry (events are never dropped)
+    pipeline = CapturePipeline(cap.read)
+    pipeline.add_stage("detection", detection_stage)
+    pipeline.add_stage("telemetry", telemetry_stage, maxsize=32, policy=BLOCK)
+    pipeline.start()
+    
+    print("Bot monitoring started. Press Ctrl+C to quit.")
+    
+    try:
+        last_metrics = time.time()
+        while pipeline.running:
+            time.sleep(1)
+            if time.time() - last_metrics > metrics_interval:
+                print(pipeline.format_metrics())
+                last_metrics = time.time()
                 
     except KeyboardInterrupt:
         print("Monitoring interrupted by user")
     finally:
         # Clean up
-        cap.release()
-        cv2.destroyAllWindows()
+        pipeline.stop()
+        cap.close()
+        preview.stop()
+        metrics_server.stop()
+        firebase.close()
+        print(pipeline.format_metrics())
+        print(REGISTRY.format_summary())
+        REGISTRY.dump(os.environ.get("METRICS_DUMP", "metrics.prom"))
         print("Bot monitoring stopped")
 
 if __name__ == "__main__":
@@ -0,0 +1,291 @@
+"""
+Graph-based route planning for Smart Logistics Bot.
+
+The site is described in a JSON config (see site_graph.json): nodes,
+edges with a compass heading and a travel time, and the durations of the
+turns the bot can make. The planner finds the cheapest tour from the start
+through only the buildings that need a visit and back, accounting for the
+time spent turning, and turns it into a motion plan of timed turn/move
+steps for the motor code.
+
+Headings are in degrees clockwise (0 = the direction the bot faces at the
+start, 90 = a right turn from there).
+"""
+
+import heapq
+import itertools
+import json
+
+# Tours over more buildings than this use a heuristic instead of trying every order
+EXACT_TOUR_LIMIT = 7
+
+
+class RoutePlanner:
+    """
+    Shortest paths and visit tours over a site graph.
+
+    Attributes:
+        start (str): Node the bot starts and ends at
+        start_heading (int): Heading of the bot at the start
+        nodes (dict): Node name -> attributes (e.g. {"visit": true})
+        turns (dict): Turn direction ("right", "left", "around") -> seconds
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): Site graph with "start", "nodes", "edges", "turns"
+                and optionally "start_heading". Edges are
+                {"from", "to", "heading", "travel"} and can be driven in
+                both directions unless "bidirectional" is false.
+        """
+        self.start = config["start"]
+        self.start_heading = config.get("start_heading", 0) % 360
+        self.nodes = config["nodes"]
+        self.turns = config.get("turns", {"right": 1.5})
+        self.edges = {name: [] for name in self.nodes}
+        for edge in config["edges"]:
+            source, target = edge["from"], edge["to"]
+            heading = edge["heading"] % 360
+            for node in (source, target):
+                if node not in self.nodes:
+                    raise ValueError(f"Edge uses unknown node: {node}")
+            self.edges[source].append((target, heading, edge["travel"]))
+            if edge.get("bidirectional", True):
+                self.edges[target].append((source, (heading + 180) % 360, edge["travel"]))
+        if self.start not in self.nodes:
+            raise ValueError(f"Unknown start node: {self.start}")
+        self._leg_cache = {}
+
+    @classmethod
+    def from_file(cls, path="site_graph.json"):
+        """Load a planner from a JSON site graph file."""
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def buildings(self):
+        """Return the nodes marked for a visit by default, in config order."""
+        return [name for name, attributes in self.nodes.items() if attributes.get("visit")]
+
+    # ===== TURNS =====
+    def turn_sequence(self, heading, new_heading):
+        """
+        Return the cheapest turns from one heading to another.
+
+        Returns:
+            tuple: (seconds, list of (direction, seconds) turns)
+        """
+        rotation = (new_heading - heading) % 360
+        if rotation == 0:
+            return 0.0, []
+        if rotation % 90:
+            raise ValueError(f"Headings must differ by multiples of 90 degrees, got {rotation}")
+
+        quarter_turns = rotation // 90  # Clockwise quarter turns needed
+        options = []
+        if "right" in self.turns:
+            options.append([("right", self.turns["right"])] * quarter_turns)
+        if "left" in self.turns:
+            options.append([("left", self.turns["left"])] * (4 - quarter_turns))
+        if quarter_turns == 2 and "around" in self.turns:
+            options.append([("around", self.turns["around"])])
+        if not options:
+            raise ValueError("Site graph defines no usable turns")
+        best = min(options, key=lambda turns: sum(seconds for _, seconds in turns))
+        return sum(seconds for _, seconds in best), best
+
+    # ===== SHORTEST PATHS =====
+    def shortest_path(self, source, target, heading, final_heading=None):
+        """
+        Cheapest drive from source (facing heading) to target, turns included.
+
+        Args:
+            source (str): Node to start from
+            target (str): Node to reach
+            heading (int): Heading at source
+            final_heading (int): Heading to turn to at target, or None to stop
+                as soon as it is reached; the final turn is part of the cost,
+                so the cheapest arrival heading is chosen with it in mind
+
+        Returns:
+            tuple: (seconds, list of (node, heading, travel) edges, arrival heading)
+
+        Raises:
+            ValueError: If target can't be reached
+        """
+        key = (source, target, heading, final_heading)
+        if key in self._leg_cache:
+            return self._leg_cache[key]
+        if source == target:
+            turn_cost = 0.0 if final_heading is None else self.turn_sequence(heading, final_heading)[0]
+            return turn_cost, [], heading
+
+        # Dijkstra over (node, heading) states, since turning costs time. With
+        # a final heading, reaching target queues a finished entry that
+        # includes the final turn; the first finished entry popped is cheapest
+        queue = [(0.0, 0, source, heading, [], False)]
+        best = {}
+        counter = itertools.count(1)
+        while queue:
+            cost, _, node, facing, path, finished = heapq.heappop(queue)
+            if finished or (node == target and final_heading is None):
+                self._leg_cache[key] = (cost, path, facing)
+                return self._leg_cache[key]
+            if node == target:
+                turn_cost, _ = self.turn_sequence(facing, final_heading)
+                heapq.heappush(queue, (cost + turn_cost, next(counter), node, facing, path, True))
+            if best.get((node, facing), float("inf")) < cost:
+                continue
+            for neighbour, edge_heading, travel in self.edges[node]:
+                turn_cost, _ = self.turn_sequence(facing, edge_heading)
+                new_cost = cost + turn_cost + travel
+                state = (neighbour, edge_heading)
+                if new_cost < best.get(state, float("inf")):
+                    best[state] = new_cost
+                    heapq.heappush(queue, (new_cost, next(counter), neighbour, edge_heading,
+                                           path + [(neighbour, edge_heading, travel)], False))
+        raise ValueError(f"No route from {source} to {target}")
+
+    def tour_cost(self, order, return_to_start=True):
+        """
+        Total seconds to visit the nodes in order from the start.
+
+        With return_to_start, the tour ends back at the start turned to
+        start_heading, and that last turn is part of the total.
+
+        Returns:
+            tuple: (seconds, list of legs as (target, path) pairs)
+        """
+        node, heading = self.start, self.start_heading
+        total, legs = 0.0, []
+        stops = list(order) + ([self.start] if return_to_start else [])
+        for i, stop in enumerate(stops):
+            last_return = return_to_start and i == len(stops) - 1
+            cost, path, heading = self.shortest_path(
+                node, stop, heading, self.start_heading if last_return else None)
+            total += cost
+            legs.append((stop, path))
+            node = stop
+        return total, legs
+
+    # ===== TOURS =====
+    def plan_tour(self, visits=None, return_to_start=True):
+        """
+        Find the cheapest order to visit the given nodes.
+
+        Every order is tried for up to EXACT_TOUR_LIMIT stops; larger tours
+        start from the nearest-neighbour order and are improved with 2-opt.
+
+        Args:
+            visits (list): Nodes that need a visit this run (default: buildings())
+            return_to_start (bool): End the tour back at the start node
+
+        Returns:
+            tuple: (list of nodes in visit order, total seconds)
+        """
+        visits = [v for v in (self.buildings() if visits is None else visits) if v != self.start]
+        for node in visits:
+            if node not in self.nodes:
+                raise ValueError(f"Unknown location: {node}")
+        visits = list(dict.fromkeys(visits))
+        if not visits:
+            return [], 0.0
+
+        if len(visits) <= EXACT_TOUR_LIMIT:
+            best = min(itertools.permutations(visits),
+                       key=lambda order: self.tour_cost(order, return_to_start)[0])
+            return list(best), self.tour_cost(best, return_to_start)[0]
+
+        order = self._nearest_neighbour(visits)
+        cost = self.tour_cost(order, return_to_start)[0]
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(order) - 1):
+                for j in range(i + 1, len(order)):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    candidate_cost = self.tour_cost(candidate, return_to_start)[0]
+                    if candidate_cost < cost - 1e-9:
+                        order, cost, improved = candidate, candidate_cost, True
+        return order, cost
+
+    def _nearest_neighbour(self, visits):
+        node, heading = self.start, self.start_heading
+        remaining, order = list(visits), []
+        while remaining:
+            costs = {stop: self.shortest_path(node, stop, heading) for stop in remaining}
+            stop = min(remaining, key=lambda s: costs[s][0])
+            order.append(stop)
+            remaining.remove(stop)
+            node, heading = stop, costs[stop][2]
+        return order
+
+    # ===== MOTION PLANS =====
+    def motion_plan(self, visits=None, return_to_start=True):
+        """
+        Plan a tour and turn it into timed motion steps.
+
+        Steps are dicts:
+            {"action": "turn", "direction": "right", "duration": 1.5}
+            {"action": "move", "duration": 3.0, "to": "Building A"}
+            {"action": "arrive", "location": "Building A", "visit": True}
+        "visit" is True at the stops that need processing; nodes that are
+        only passed through are reported with "visit": False.
+
+        A plan that returns to the start also turns back to start_heading at
+        the end, so it can be driven again lap after lap.
+
+        Args:
+            visits (list): Nodes that need a visit (default: buildings())
+            return_to_start (bool): End the plan back at the start node,
+                facing start_heading
+
+        Returns:
+            tuple: (list of steps, estimated seconds)
+        """
+        order, total = self.plan_tour(visits, return_to_start)
+        _, legs = self.tour_cost(order, return_to_start)
+        steps = []
+        heading = self.start_heading
+        for stop, path in legs:
+            for node, edge_heading, travel in path:
+                _, turns = self.turn_sequence(heading, edge_heading)
+                for direction, seconds in turns:
+                    steps.append({"action": "turn", "direction": direction, "duration": seconds})
+                steps.append({"action": "move", "duration": travel, "to": node})
+                visit = node == stop and stop in order
+                steps.append({"action": "arrive", "location": node, "visit": visit})
+                heading = edge_heading
+        if return_to_start and steps:
+            # Already counted in total by tour_cost()
+            _, turns = self.turn_sequence(heading, self.start_heading)
+            for direction, duration in turns:
+                steps.append({"action": "turn", "direction": direction, "duration": duration})
+        return steps, total
+
+
+def describe_plan(steps):
+    """Return a motion plan as short human-readable lines."""
+    lines = []
+    for step in steps:
+        if step["action"] == "turn":
+            lines.append(f"turn {step['direction']} ({step['duration']:.1f} s)")
+        elif step["action"] == "move":
+            lines.append(f"move to {step['to']} ({step['duration']:.1f} s)")
+        else:
+            lines.append(f"arrive at {step['location']}" + (" - process" if step["visit"] else ""))
+    return lines
+
+
+# Print the plan for the buildings given on the command line
+if __name__ == "__main__":
+    import sys
+
+    planner = RoutePlanner.from_file()
+    visits = sys.argv[1:] or None
+    steps, total = planner.motion_plan(visits)
+    order = [step["location"] for step in steps if step["action"] == "arrive" and step["visit"]]
+    print(f"Visit order: {' -> '.join([planner.start] + order + [planner.start])}")
+    print(f"Estimated drive time: {total:.1f} s")
+    for line in describe_plan(steps):
+        print(f"  {line}")
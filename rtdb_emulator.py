@@ -0,0 +1,358 @@
+"""
+In-process Firebase Realtime Database emulator for Smart Logistics Bot.
+
+RTDBEmulator stands in for the firebase_admin.db module: reference(path)
+returns an object with get(), set(), update(), delete(), child() and
+transaction(), and increment / timestamp server values are applied like
+the real database does. Latency, jitter, random failures and network
+partitions can be injected, so batching, retries and offline replay can be
+tested and benchmarked on machines with no network.
+
+Example:
+    emulator = RTDBEmulator(latency=0.05, failure_rate=0.1)
+    firebase = FirebaseConnector(database=emulator)
+
+The bot scripts use the emulator when FIREBASE_EMULATOR is set, e.g.
+FIREBASE_EMULATOR="latency=0.2,jitter=0.1,failure_rate=0.05".
+"""
+
+import copy
+import random
+import threading
+import time
+
+
+class EmulatorError(Exception):
+    """
+    Error raised by the emulator, shaped like firebase_admin's FirebaseError.
+
+    Attributes:
+        code (str): "UNAVAILABLE" for injected network failures,
+            "INVALID_ARGUMENT" for requests the database would reject
+    """
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+# Characters Firebase doesn't allow in a key
+INVALID_KEY_CHARS = ".$#[]"
+
+
+def _split(path):
+    """Split a database path into its keys ('/' and '' are the root)."""
+    return [key for key in path.strip('/').split('/') if key]
+
+
+def _check_path(path):
+    """Raise ValueError for paths the client library refuses, like firebase_admin does."""
+    if not isinstance(path, str) or any(c in path for c in INVALID_KEY_CHARS):
+        raise ValueError(f'Invalid path: "{path}". Path contains illegal characters.')
+    return path
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class RTDBEmulator:
+    """
+    Thread-safe in-memory JSON tree with the firebase_admin.db reference API.
+
+    Attributes:
+        latency (float): Seconds added to every call
+        jitter (float): Extra random delay of up to this many seconds
+        failure_rate (float): Probability (0-1) that a call fails as unavailable
+        lost_reply_rate (float): Probability (0-1) that a write is applied but
+            the reply is lost, so the client sees a failure (an ambiguous write)
+        server_increments (bool): Accept increment server values; set False
+            to emulate a database that rejects them
+        calls (dict): Operation name -> number of calls that reached the database
+        failures (int): Calls failed by fault injection
+    """
+
+    def __init__(self, data=None, latency=0.0, jitter=0.0, failure_rate=0.0,
+                 lost_reply_rate=0.0, server_increments=True, seed=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            data (dict): Initial database contents
+            latency (float): Seconds added to every call
+            jitter (float): Extra random delay of up to this many seconds
+            failure_rate (float): Probability that a call fails
+            lost_reply_rate (float): Probability that a write's reply is lost
+            server_increments (bool): Accept {".sv": {"increment": n}} values
+            seed (int): Seed for jitter and failures, for repeatable runs
+            clock: Callable returning the current time in seconds
+            sleep: Callable used to wait out latency (swap both for a virtual clock)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.lost_reply_rate = lost_reply_rate
+        self.server_increments = server_increments
+        self.clock = clock
+        self.sleep = sleep
+        self.calls = {}
+        self.failures = 0
+        self._data = copy.deepcopy(data) if data else {}
+        self._partitions = []
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+
+    # ===== FAULT INJECTION =====
+    def add_partition(self, start, duration):
+        """
+        Make the database unreachable for a window of time.
+
+        Args:
+            start (float): Seconds from now until the partition begins
+            duration (float): Length of the partition in seconds
+        """
+        begin = self.clock() + start
+        with self._lock:
+            self._partitions.append((begin, begin + duration))
+
+    def partition(self, duration=float("inf")):
+        """Make the database unreachable from now on (or for duration seconds)."""
+        self.add_partition(0.0, duration)
+
+    def heal(self):
+        """End every current and scheduled partition."""
+        with self._lock:
+            self._partitions = []
+
+    def partitioned(self):
+        """Return True if the database is currently unreachable."""
+        now = self.clock()
+        with self._lock:
+            return any(begin <= now < end for begin, end in self._partitions)
+
+    def _call(self, operation):
+        """Apply injected latency and failures for one request."""
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            self.sleep(delay)
+        if self.partitioned():
+            self.failures += 1
+            raise EmulatorError("UNAVAILABLE", f"{operation} failed: network partition")
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise EmulatorError("UNAVAILABLE", f"{operation} failed: injected failure")
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def _reply(self, operation):
+        """Deliver a write's reply, or lose it as lost_reply_rate says (the write stays applied)."""
+        if self.lost_reply_rate and self._random.random() < self.lost_reply_rate:
+            self.failures += 1
+            raise EmulatorError("UNAVAILABLE", f"{operation} failed: reply lost")
+
+    # ===== DATABASE API =====
+    def reference(self, path="/"):
+        """
+        Return a reference to a database location (like firebase_admin.db.reference).
+
+        Args:
+            path (str): Database path
+
+        Returns:
+            EmulatedReference: Reference bound to this emulator
+        """
+        return EmulatedReference(self, _check_path(path))
+
+    def snapshot(self, path="/"):
+        """Return a copy of the data at path without any latency or faults."""
+        with self._lock:
+            return copy.deepcopy(self._get(_split(path)))
+
+    # ===== TREE OPERATIONS (lock held) =====
+    def _get(self, keys):
+        node = self._data
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                return None
+            node = node[key]
+        return node if node != {} else None
+
+    def _set(self, keys, value):
+        """Write value at keys, deleting the location if value is None or empty."""
+        if not keys:
+            self._data = value if isinstance(value, dict) else {}
+            return
+        node = self._data
+        parents = []
+        for key in keys[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                if value is None:
+                    return
+                child = node[key] = {}
+            parents.append((node, key))
+            node = child
+        if value is None or value == {}:
+            node.pop(keys[-1], None)
+            # Like the real database, remove parents left empty
+            for parent, key in reversed(parents):
+                if parent[key]:
+                    break
+                del parent[key]
+        else:
+            node[keys[-1]] = value
+
+    def _resolve(self, keys, value):
+        """Replace server values in value with their results at location keys."""
+        if isinstance(value, dict):
+            server_value = value.get(".sv")
+            if server_value is not None and len(value) == 1:
+                if server_value == "timestamp":
+                    return int(time.time() * 1000)
+                if isinstance(server_value, dict) and _is_number(server_value.get("increment")):
+                    if not self.server_increments:
+                        raise EmulatorError("INVALID_ARGUMENT", "increment server values are disabled")
+                    current = self._get(keys)
+                    return (current if _is_number(current) else 0) + server_value["increment"]
+                raise EmulatorError("INVALID_ARGUMENT", f"unsupported server value {server_value}")
+            resolved = {}
+            for key, child in value.items():
+                if not isinstance(key, str) or not key or any(c in key for c in INVALID_KEY_CHARS + "/"):
+                    raise EmulatorError("INVALID_ARGUMENT", f"invalid key {key!r}")
+                child = self._resolve(keys + [key], child)
+                if child is not None and child != {}:
+                    resolved[key] = child
+            return resolved
+        if isinstance(value, (list, tuple)):
+            return {str(i): self._resolve(keys + [str(i)], v) for i, v in enumerate(value)}
+        if value is None or isinstance(value, (str, bool)) or _is_number(value):
+            return value
+        raise EmulatorError("INVALID_ARGUMENT", f"value of type {type(value).__name__} is not JSON")
+
+
+class EmulatedReference:
+    """
+    A location in an RTDBEmulator, mirroring firebase_admin.db.Reference.
+
+    Attributes:
+        path (str): Absolute path of the location
+        key (str): Last path segment, or None for the root
+    """
+
+    def __init__(self, emulator, path="/"):
+        self._emulator = emulator
+        self._keys = _split(path)
+        self.path = "/" + "/".join(self._keys)
+        self.key = self._keys[-1] if self._keys else None
+
+    def child(self, path):
+        """Return a reference to a location below this one."""
+        return EmulatedReference(self._emulator, self.path + "/" + _check_path(path).strip('/'))
+
+    def get(self):
+        """Return the value at this location (None if nothing is stored)."""
+        self._emulator._call("get")
+        with self._emulator._lock:
+            return copy.deepcopy(self._emulator._get(self._keys))
+
+    def set(self, value):
+        """Replace the value at this location."""
+        if value is None:
+            raise ValueError("Value must not be None")
+        self._emulator._call("set")
+        with self._emulator._lock:
+            self._emulator._set(self._keys, self._emulator._resolve(self._keys, value))
+        self._emulator._reply("set")
+
+    def update(self, value):
+        """
+        Atomically write several child paths (a multi-path update).
+
+        Raises:
+            EmulatorError: INVALID_ARGUMENT if a path contains an invalid key or
+                one path is an ancestor of another
+        """
+        if not isinstance(value, dict) or not value:
+            raise ValueError("Value argument must be a non-empty dictionary")
+        paths = [_split(path) for path in value]
+        for keys in paths:
+            if not keys:
+                raise EmulatorError("INVALID_ARGUMENT", "update paths must not be empty")
+            if any(c in key for key in keys for c in INVALID_KEY_CHARS):
+                raise EmulatorError("INVALID_ARGUMENT", f"invalid path {'/'.join(keys)!r}")
+            for other in paths:
+                if other is not keys and other[:len(keys)] == keys:
+                    raise EmulatorError("INVALID_ARGUMENT",
+                                        f"path {'/'.join(keys)} is an ancestor of {'/'.join(other)}")
+        self._emulator._call("update")
+        with self._emulator._lock:
+            # Resolve every value first so a rejected update changes nothing
+            resolved = [(self._keys + keys, self._emulator._resolve(self._keys + keys, child))
+                        for keys, child in zip(paths, value.values())]
+            for keys, child in resolved:
+                self._emulator._set(keys, child)
+        self._emulator._reply("update")
+
+    def delete(self):
+        """Remove the value at this location."""
+        self._emulator._call("delete")
+        with self._emulator._lock:
+            self._emulator._set(self._keys, None)
+        self._emulator._reply("delete")
+
+    def transaction(self, transaction_update):
+        """
+        Atomically replace the value with transaction_update(current value).
+
+        Returns:
+            The new value
+        """
+        self._emulator._call("transaction")
+        with self._emulator._lock:
+            current = copy.deepcopy(self._emulator._get(self._keys))
+            new_value = transaction_update(current)
+            self._emulator._set(self._keys, self._emulator._resolve(self._keys, new_value))
+        self._emulator._reply("transaction")
+        return copy.deepcopy(new_value)
+
+
+def emulator_from_spec(spec, **kwargs):
+    """
+    Create an emulator from a short text spec.
+
+    Specs are comma-separated key=value settings, e.g.
+    "latency=0.2,jitter=0.1,failure_rate=0.05,lost_reply_rate=0.01,partition=10+30,seed=1".
+    "partition=START+DURATION" schedules an outage START seconds from now;
+    "1" or "on" gives an emulator with no faults.
+
+    Args:
+        spec (str): Emulator spec
+        **kwargs: Passed on to RTDBEmulator (e.g. clock)
+
+    Returns:
+        RTDBEmulator: The configured emulator
+    """
+    settings = {}
+    partitions = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item or item.lower() in ("1", "on", "true"):
+            continue
+        name, _, value = item.partition("=")
+        if name == "partition":
+            start, _, duration = value.partition("+")
+            partitions.append((float(start), float(duration or "inf")))
+        elif name in ("latency", "jitter", "failure_rate", "lost_reply_rate"):
+            settings[name] = float(value)
+        elif name == "seed":
+            settings[name] = int(value)
+        elif name == "server_increments":
+            settings[name] = value.lower() not in ("0", "off", "false")
+        else:
+            raise ValueError(f"Unknown emulator setting: {name}")
+
+    emulator = RTDBEmulator(**settings, **kwargs)
+    for start, duration in partitions:
+        emulator.add_partition(start, duration)
+    print(f"Using in-process Firebase emulator ({spec})")
+    return emulator
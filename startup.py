@@ -0,0 +1,122 @@
+"""
+Startup orchestration for Smart Logistics Bot.
+
+Independent initialization phases (GPIO, camera warm-up, Firebase
+connection, detection setup) run concurrently on their own threads instead
+of one after another, and each phase is timed so slow boots can be
+diagnosed from the startup report.
+"""
+
+import threading
+import time
+
+
+class StartupPhase:
+    """
+    One named initialization step.
+
+    Attributes:
+        name (str): Phase name used in the report
+        result: Value returned by the phase function
+        error (Exception): Exception raised by the phase, if any
+        duration (float): Seconds the phase took
+    """
+
+    def __init__(self, name, func, required=True):
+        self.name = name
+        self.func = func
+        self.required = required
+        self.result = None
+        self.error = None
+        self.duration = None
+
+    def run(self):
+        start = time.monotonic()
+        try:
+            self.result = self.func()
+        except Exception as e:
+            self.error = e
+        self.duration = time.monotonic() - start
+
+
+class StartupOrchestrator:
+    """
+    Run startup phases concurrently and report how long each took.
+
+    Example:
+        startup = StartupOrchestrator()
+        startup.add_phase("camera", open_camera)
+        startup.add_phase("firebase", connect_firebase, required=False)
+        results = startup.run()
+        print(startup.report())
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.total_time = None
+
+    def add_phase(self, name, func, required=True):
+        """
+        Register a phase.
+
+        Args:
+            name (str): Phase name
+            func: Callable() returning the phase's result
+            required (bool): If True, run() fails when this phase raises;
+                otherwise its result is None and the bot starts without it
+        """
+        self.phases.append(StartupPhase(name, func, required))
+
+    def run(self):
+        """
+        Run every phase in parallel and wait for all of them.
+
+        Returns:
+            dict: Phase name -> result
+
+        Raises:
+            RuntimeError: If a required phase failed
+        """
+        start = time.monotonic()
+        threads = [threading.Thread(target=phase.run, name=f"startup-{phase.name}", daemon=True)
+                   for phase in self.phases]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.total_time = time.monotonic() - start
+
+        for phase in self.phases:
+            if phase.error is not None and not phase.required:
+                print(f"Warning: {phase.name} startup failed: {phase.error}")
+        failed = [phase for phase in self.phases if phase.error is not None and phase.required]
+        if failed:
+            raise RuntimeError("; ".join(f"{phase.name}: {phase.error}" for phase in failed))
+        return {phase.name: phase.result for phase in self.phases}
+
+    def timings(self):
+        """
+        Return the per-phase timing breakdown.
+
+        Returns:
+            dict: Phase name -> seconds, plus "total" (wall clock)
+        """
+        timings = {phase.name: phase.duration for phase in self.phases}
+        timings["total"] = self.total_time
+        return timings
+
+    def report(self):
+        """Return the timing breakdown as a short human-readable table."""
+        lines = ["Startup timing:"]
+        width = max([len(phase.name) for phase in self.phases] + [5])
+        for phase in self.phases:
+            if phase.duration is None:
+                status = "not run"
+            else:
+                status = f"{phase.duration:6.2f} s" + ("  FAILED" if phase.error else "")
+            lines.append(f"  {phase.name:<{width}}  {status}")
+        if self.total_time is not None:
+            serial = sum(phase.duration or 0 for phase in self.phases)
+            lines.append(f"  {'total':<{width}}  {self.total_time:6.2f} s "
+                         f"(run one after another: {serial:.2f} s)")
+        return "\n".join(lines)
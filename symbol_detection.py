@@ -0,0 +1,651 @@
+"""
+Symbol detection engine for Smart Logistics Bot.
+
+This module contains the red-symbol detection pipeline (mask -> contours ->
+shape classification) used at each checkpoint. It has no dependency on the
+camera, GPIO or Firebase, so it can be imported on any machine to process
+live frames, archived images from captured_images/, or whole batches of
+frames at once.
+"""
+
+import glob
+import json
+import os
+
+import cv2
+import numpy as np
+
+from color_lut import ColorClassifier
+from metrics import span
+
+# Default region of interest (x, y, w, h) inside a 640x480 frame
+DEFAULT_ROI = (100, 100, 440, 280)
+
+# Two red ranges in HSV (red wraps around the hue boundaries)
+LOWER_RED1 = np.array([0, 100, 100])
+UPPER_RED1 = np.array([10, 255, 255])
+LOWER_RED2 = np.array([160, 100, 100])
+UPPER_RED2 = np.array([179, 255, 255])
+RED_RANGES = {"red": [(LOWER_RED1, UPPER_RED1), (LOWER_RED2, UPPER_RED2)]}
+
+# Contours smaller than this (in pixels) are treated as noise
+MIN_SYMBOL_AREA = 300
+
+# Kernel used to clean up the red mask
+MORPH_KERNEL = np.ones((5, 5), np.uint8)
+
+# Coarse-to-fine search: downscale factor for the candidate search and the
+# margin (full-resolution pixels) kept around each candidate
+COARSE_SCALE = 4
+CANDIDATE_MARGIN = 16
+
+# Symbol shapes and the material category each one represents
+SYMBOL_TO_MATERIAL = {
+    "Circle": "dispatchReady",
+    "Triangle": "eWaste",
+    "Square": "damaged",
+    "X": "rawMaterials"
+}
+
+
+def empty_counts():
+    """Return a zeroed symbol count dictionary."""
+    return {shape: 0 for shape in SYMBOL_TO_MATERIAL}
+
+
+def to_material_counts(symbol_counts):
+    """
+    Convert symbol counts to material categories for Firebase.
+
+    Args:
+        symbol_counts (dict): Counts keyed by shape name
+
+    Returns:
+        dict: Counts keyed by material category
+    """
+    return {
+        "dispatchReady": symbol_counts["Circle"],
+        "damaged": symbol_counts["Square"],
+        "eWaste": symbol_counts["Triangle"],
+        "rawMaterials": symbol_counts["X"]
+    }
+
+
+_red_classifier = None
+
+
+def get_red_classifier():
+    """Return the shared red lookup-table classifier, compiling it on first use."""
+    global _red_classifier
+    if _red_classifier is None:
+        _red_classifier = ColorClassifier(RED_RANGES)
+    return _red_classifier
+
+
+def build_raw_red_mask(roi):
+    """Threshold red pixels in an ROI without any noise cleanup."""
+    # One table lookup per pixel replaces cvtColor + two inRange calls
+    return get_red_classifier().mask(roi)
+
+
+def build_red_mask(roi):
+    """
+    Segment red pixels in an ROI and clean the mask up.
+
+    Args:
+        roi: Image region (H x W x 3)
+
+    Returns:
+        Binary mask (H x W, uint8) of red pixels
+    """
+    # Use morphological operations to reduce noise
+    raw_mask = build_raw_red_mask(roi)
+    with span("morphology"):
+        return cv2.morphologyEx(raw_mask, cv2.MORPH_OPEN, MORPH_KERNEL)
+
+
+# Column layout of the contour feature matrix
+FEATURE_NAMES = (
+    "area", "perimeter", "circularity", "vertices", "solidity",
+    "deep_defects", "cx", "cy", "x", "y", "w", "h",
+    "hu0", "hu1", "hu2", "hu3", "hu4", "hu5", "hu6"
+)
+F = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# Shape index used by classify_features(), -1 means unrecognised
+SHAPES = ("Circle", "Triangle", "Square", "X")
+
+# A convexity defect deeper than this fraction of the blob's shorter side
+# counts as a notch; an X has four, solid shapes have none
+DEFECT_DEPTH_RATIO = 0.15
+X_MAX_SOLIDITY = 0.75
+X_MIN_DEFECTS = 3
+CIRCLE_MIN_CIRCULARITY = 0.75
+
+
+def extract_features(contours, min_area=MIN_SYMBOL_AREA):
+    """
+    Compute a feature matrix for all contours in one pass.
+
+    Contours below min_area are dropped before any of the more expensive
+    features (approximation, hull, defects, moments) are computed.
+
+    Args:
+        contours (list): Contours from cv2.findContours
+        min_area (float): Minimum contour area to keep
+
+    Returns:
+        tuple: (features, kept, approxes) - an N x len(FEATURE_NAMES) float
+            array, the contours it describes and their polygon approximations,
+            all in the same order
+    """
+    areas = np.array([cv2.contourArea(c) for c in contours], dtype=np.float64)
+    kept = [c for c, a in zip(contours, areas) if a >= min_area]
+    approxes = []
+    features = np.zeros((len(kept), len(FEATURE_NAMES)), dtype=np.float64)
+    if not kept:
+        return features, kept, approxes
+    features[:, F["area"]] = areas[areas >= min_area]
+
+    for i, cnt in enumerate(kept):
+        row = features[i]
+        peri = cv2.arcLength(cnt, True)
+        row[F["perimeter"]] = peri
+        approx = cv2.approxPolyDP(cnt, 0.04 * peri, True)
+        approxes.append(approx)
+        row[F["vertices"]] = len(approx)
+        row[F["x"]:F["h"] + 1] = cv2.boundingRect(cnt)
+
+        hull_idx = cv2.convexHull(cnt, returnPoints=False)
+        row[F["solidity"]] = cv2.contourArea(cnt[hull_idx.ravel()])
+        if len(hull_idx) > 3:
+            try:
+                defects = cv2.convexityDefects(cnt, hull_idx)
+            except cv2.error:
+                defects = None  # Self-intersecting hull, treat as convex
+            if defects is not None:
+                min_side = min(row[F["w"]], row[F["h"]])
+                row[F["deep_defects"]] = np.count_nonzero(
+                    defects.reshape(-1, 4)[:, 3] / 256.0 > DEFECT_DEPTH_RATIO * min_side)
+
+        M = cv2.moments(cnt)
+        if M["m00"] != 0:
+            row[F["cx"]] = M["m10"] / M["m00"]
+            row[F["cy"]] = M["m01"] / M["m00"]
+        row[F["hu0"]:] = cv2.HuMoments(M)[:, 0]
+
+    # Derived features on the whole matrix at once
+    area = features[:, F["area"]]
+    peri = features[:, F["perimeter"]]
+    hull_area = features[:, F["solidity"]]
+    features[:, F["circularity"]] = 4 * np.pi * area / np.maximum(peri * peri, 1e-9)
+    features[:, F["solidity"]] = area / np.maximum(hull_area, 1e-9)
+    hu = features[:, F["hu0"]:]
+    features[:, F["hu0"]:] = -np.sign(hu) * np.log10(np.abs(hu) + 1e-30)
+    return features, kept, approxes
+
+
+def classify_features(features):
+    """
+    Classify every row of a feature matrix as Circle, Triangle, Square or X.
+
+    An X is a strongly non-convex blob with several deep convexity defects;
+    the remaining blobs are split by polygon vertex count and circularity.
+
+    Args:
+        features (numpy.ndarray): Output of extract_features()
+
+    Returns:
+        numpy.ndarray: Index into SHAPES for each row (-1 if unrecognised)
+    """
+    vertices = features[:, F["vertices"]]
+    is_x = ((features[:, F["solidity"]] < X_MAX_SOLIDITY)
+            & (features[:, F["deep_defects"]] >= X_MIN_DEFECTS)
+            & (features[:, F["circularity"]] <= CIRCLE_MIN_CIRCULARITY))
+
+    labels = np.full(len(features), -1, dtype=np.int64)
+    # Blobs with more than four vertices that aren't round enough fall back to Circle
+    labels[vertices > 4] = SHAPES.index("Circle")
+    labels[vertices == 4] = SHAPES.index("Square")  # All quadrilaterals count as squares
+    labels[vertices == 3] = SHAPES.index("Triangle")
+    labels[is_x] = SHAPES.index("X")
+    return labels
+
+
+def detect_in_mask(red_mask, offset=(0, 0)):
+    """
+    Find and classify symbols in a precomputed red mask.
+
+    Args:
+        red_mask: Binary mask of red pixels
+        offset (tuple): (x, y) added to all geometry, e.g. the ROI origin
+
+    Returns:
+        dict: {"counts": {...}, "symbols": [...]} - see detect_symbols()
+    """
+    ox, oy = offset
+    counts = empty_counts()
+    symbols = []
+
+    with span("contours"):
+        contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    with span("classify"):
+        features, _, approxes = extract_features(contours)
+        labels = classify_features(features)
+
+    for approx, row, label in zip(approxes, features, labels):
+        if label < 0:
+            continue
+        shape_name = SHAPES[label]
+        counts[shape_name] += 1
+
+        centroid = None
+        if row[F["area"]] > 0:
+            centroid = (int(row[F["cx"]]) + ox, int(row[F["cy"]]) + oy)
+        x, y, w, h = row[F["x"]:F["h"] + 1].astype(int)
+        symbols.append({
+            "shape": shape_name,
+            "area": float(row[F["area"]]),
+            "bbox": (int(x) + ox, int(y) + oy, int(w), int(h)),
+            "centroid": centroid,
+            "approx": approx + np.array([ox, oy], dtype=approx.dtype)
+        })
+
+    return {"counts": counts, "symbols": symbols}
+
+
+def detect_symbols(frame, roi=DEFAULT_ROI):
+    """
+    Detect red symbols inside the ROI of a single frame.
+
+    Args:
+        frame: Camera frame (H x W x 3)
+        roi (tuple): (x, y, w, h) region to search, or None for the full frame
+
+    Returns:
+        dict: {
+            "counts": {"Circle": int, "Triangle": int, "Square": int, "X": int},
+            "symbols": [{"shape", "area", "bbox", "centroid", "approx"}, ...]
+        }
+        All geometry is in full-frame pixel coordinates.
+    """
+    if roi is None:
+        roi = (0, 0, frame.shape[1], frame.shape[0])
+    roi_x, roi_y, roi_w, roi_h = roi
+    region = frame[roi_y:roi_y + roi_h, roi_x:roi_x + roi_w]
+    return detect_in_mask(build_red_mask(region), offset=(roi_x, roi_y))
+
+
+def detect_symbols_batch(frames, roi=DEFAULT_ROI):
+    """
+    Detect symbols in many frames with a single color classification pass.
+
+    The ROIs of all frames are stacked into one tall image so the red
+    lookup runs in one call, then morphology and
+    contour finding run per frame so results match detect_symbols().
+
+    Args:
+        frames: N x H x W x 3 array, or a list of equally sized frames
+        roi (tuple): (x, y, w, h) region to search, or None for the full frame
+
+    Returns:
+        list: One detect_symbols() result per frame
+    """
+    frames = np.asarray(frames)
+    if frames.ndim == 3:
+        frames = frames[np.newaxis]
+    if len(frames) == 0:
+        return []
+    if roi is None:
+        roi = (0, 0, frames.shape[2], frames.shape[1])
+    roi_x, roi_y, roi_w, roi_h = roi
+
+    regions = frames[:, roi_y:roi_y + roi_h, roi_x:roi_x + roi_w]
+    n, h, w = regions.shape[:3]
+    stacked = np.ascontiguousarray(regions).reshape(n * h, w, 3)
+    masks = build_raw_red_mask(stacked).reshape(n, h, w)
+
+    results = []
+    for mask in masks:
+        with span("morphology"):
+            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, MORPH_KERNEL)
+        results.append(detect_in_mask(mask, offset=(roi_x, roi_y)))
+    return results
+
+
+def _merge_boxes(boxes):
+    """Merge overlapping (x0, y0, x1, y1) boxes until none overlap."""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def find_candidate_regions(frame, roi=DEFAULT_ROI, scale=COARSE_SCALE, margin=CANDIDATE_MARGIN):
+    """
+    Find regions that may contain symbols using a downscaled copy of the ROI.
+
+    Args:
+        frame: Camera frame (H x W x 3)
+        roi (tuple): (x, y, w, h) region to search, or None for the full frame
+        scale (int): Downscale factor for the coarse search
+        margin (int): Full-resolution pixels added around each candidate
+
+    Returns:
+        list: Non-overlapping (x, y, w, h) regions in full-frame coordinates
+    """
+    if roi is None:
+        roi = (0, 0, frame.shape[1], frame.shape[0])
+    roi_x, roi_y, roi_w, roi_h = roi
+
+    # Strided slicing is a free nearest-neighbour downscale and keeps hues intact
+    small = frame[roi_y:roi_y + roi_h:scale, roi_x:roi_x + roi_w:scale]
+    mask = build_raw_red_mask(small)
+    with span("contours"):
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Keep blobs that could still pass the full-resolution area filter
+    min_small_area = MIN_SYMBOL_AREA / (scale * scale) / 2
+    boxes = []
+    for cnt in contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        if w * h < min_small_area:
+            continue
+        boxes.append((max(roi_x + x * scale - margin, roi_x),
+                      max(roi_y + y * scale - margin, roi_y),
+                      min(roi_x + (x + w) * scale + margin, roi_x + roi_w),
+                      min(roi_y + (y + h) * scale + margin, roi_y + roi_h)))
+
+    return [(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in _merge_boxes(boxes)]
+
+
+def detect_symbols_coarse_to_fine(frame, roi=DEFAULT_ROI, scale=COARSE_SCALE,
+                                  margin=CANDIDATE_MARGIN):
+    """
+    Detect symbols by classifying only small full-resolution crops.
+
+    Candidates are found on a downscaled copy of the ROI first, so empty
+    floor and wall never go through full-resolution masking, morphology
+    and contour finding.
+
+    Args:
+        frame: Camera frame (H x W x 3)
+        roi (tuple): (x, y, w, h) region to search, or None for the full frame
+        scale (int): Downscale factor for the coarse search
+        margin (int): Full-resolution pixels added around each candidate
+
+    Returns:
+        dict: Same format as detect_symbols()
+    """
+    counts = empty_counts()
+    symbols = []
+    for x, y, w, h in find_candidate_regions(frame, roi, scale, margin):
+        result = detect_symbols(frame, (x, y, w, h))
+        for shape, count in result["counts"].items():
+            counts[shape] += count
+        symbols.extend(result["symbols"])
+    return {"counts": counts, "symbols": symbols}
+
+
+class RoiCache:
+    """
+    Learned per-location detection ROI, persisted to a JSON file.
+
+    The ROI for a location is the union of the symbol bounding boxes seen
+    in its last few detections plus a margin. After several detections in
+    a row find nothing, the location falls back to the default ROI in case
+    the symbols moved out of the learned window.
+
+    Symbols added outside the learned window while the known ones are still
+    in view would never be seen, so every rescan_every-th visit searches
+    the default ROI again, and so does the visit after a symbol touched the
+    edge of the learned window.
+    """
+
+    def __init__(self, path="roi_cache.json", default_roi=DEFAULT_ROI, margin=32,
+                 history=5, max_misses=2, rescan_every=3, frame_size=(640, 480)):
+        """
+        Args:
+            path (str): JSON file to persist learned ROIs, or None to keep them in memory
+            default_roi (tuple): ROI used until a location has been learned
+            margin (int): Pixels added around the learned symbol area
+            history (int): Number of recent detections the ROI is built from
+            max_misses (int): Empty detections in a row before resetting a location
+            rescan_every (int): Search the default ROI on every rescan_every-th
+                visit of a learned location
+            frame_size (tuple): (width, height) used to clip learned ROIs
+        """
+        self.path = path
+        self.default_roi = tuple(default_roi)
+        self.margin = margin
+        self.history = history
+        self.max_misses = max_misses
+        self.rescan_every = max(1, rescan_every)
+        self.frame_size = frame_size
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not load ROI cache {path}: {e}")
+
+    def get(self, location):
+        """Return the ROI to use at a location."""
+        entry = self.entries.get(location)
+        if not entry or not entry["boxes"]:
+            return self.default_roi
+        if entry.get("visits", 0) >= self.rescan_every - 1:
+            return self.default_roi  # Periodic full search
+        return self._learned_roi(entry)
+
+    def _learned_roi(self, entry):
+        """Union of the entry's boxes plus the margin, clipped to the frame."""
+        x0 = min(b[0] for b in entry["boxes"]) - self.margin
+        y0 = min(b[1] for b in entry["boxes"]) - self.margin
+        x1 = max(b[0] + b[2] for b in entry["boxes"]) + self.margin
+        y1 = max(b[1] + b[3] for b in entry["boxes"]) + self.margin
+        width, height = self.frame_size
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, width), min(y1, height)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def update(self, location, result, roi=None):
+        """
+        Learn from a detection result at a location.
+
+        Args:
+            location (str): Location name
+            result (dict): detect_symbols() style result
+            roi (tuple): ROI the result was detected in (default: get(location))
+        """
+        roi = self.get(location) if roi is None else tuple(roi)
+        entry = self.entries.setdefault(location, {"boxes": [], "misses": 0})
+        full_scan = roi == self.default_roi
+        if full_scan and entry["boxes"]:
+            learned = self._learned_roi(entry)
+            outside = [s for s in result["symbols"] if not _box_inside(s["bbox"], learned)]
+            if outside:
+                print(f"Found {len(outside)} symbol(s) outside the learned ROI at "
+                      f"{location}, widening it")
+        entry["visits"] = 0 if full_scan else entry.get("visits", 0) + 1
+        if not full_scan and any(_touches_edge(s["bbox"], roi) for s in result["symbols"]):
+            # Something may continue beyond the window, look at everything next time
+            entry["visits"] = self.rescan_every
+
+        if result["symbols"]:
+            xs = [s["bbox"][0] for s in result["symbols"]]
+            ys = [s["bbox"][1] for s in result["symbols"]]
+            x1 = max(s["bbox"][0] + s["bbox"][2] for s in result["symbols"])
+            y1 = max(s["bbox"][1] + s["bbox"][3] for s in result["symbols"])
+            box = [min(xs), min(ys), x1 - min(xs), y1 - min(ys)]
+            entry["boxes"] = (entry["boxes"] + [box])[-self.history:]
+            entry["misses"] = 0
+        else:
+            entry["misses"] += 1
+            if entry["misses"] >= self.max_misses:
+                entry["boxes"] = []
+                entry["misses"] = 0
+        self.save()
+
+    def save(self):
+        """Write the learned ROIs to disk."""
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: could not save ROI cache {self.path}: {e}")
+
+
+def _box_inside(box, roi):
+    """Check whether an (x, y, w, h) box lies entirely inside an ROI."""
+    x, y, w, h = box
+    rx, ry, rw, rh = roi
+    return rx <= x and ry <= y and x + w <= rx + rw and y + h <= ry + rh
+
+
+def _touches_edge(box, roi, tolerance=2):
+    """Check whether an (x, y, w, h) box reaches the border of an ROI."""
+    x, y, w, h = box
+    rx, ry, rw, rh = roi
+    return (x - rx <= tolerance or y - ry <= tolerance
+            or rx + rw - (x + w) <= tolerance or ry + rh - (y + h) <= tolerance)
+
+
+def fuse_results(results):
+    """
+    Fuse detections from several frames of the same scene into one result.
+
+    Each shape count is the median over the frames. The confidence is the
+    fraction of frames whose counts agree exactly with the fused counts.
+
+    Args:
+        results (list): detect_symbols() results for a burst of frames
+
+    Returns:
+        dict: {
+            "counts": fused symbol counts,
+            "confidence": float in [0, 1],
+            "frame_index": index of the first frame that matches the fused
+                counts (or the closest one), useful for saving/annotation
+        }
+    """
+    if not results:
+        return {"counts": empty_counts(), "confidence": 0.0, "frame_index": None}
+
+    shapes = list(SYMBOL_TO_MATERIAL)
+    matrix = np.array([[r["counts"][s] for s in shapes] for r in results])
+    # Round half up so a 2-frame tie doesn't silently drop a symbol
+    fused = np.floor(np.median(matrix, axis=0) + 0.5).astype(int)
+
+    distance = np.abs(matrix - fused).sum(axis=1)
+    return {
+        "counts": dict(zip(shapes, fused.tolist())),
+        "confidence": float(np.mean(distance == 0)),
+        "frame_index": int(np.argmin(distance))
+    }
+
+
+def detect_symbols_burst(frames, roi=DEFAULT_ROI, executor=None):
+    """
+    Detect symbols in a burst of frames and fuse the counts.
+
+    Args:
+        frames: N x H x W x 3 array or list of frames of the same scene
+        roi (tuple): (x, y, w, h) region to search, or None for the full frame
+        executor: Optional concurrent.futures executor (e.g. a process pool)
+            to spread the frames across CPU cores; without one the frames
+            are processed with detect_symbols_batch() in this process
+
+    Returns:
+        tuple: (fused, results) - fuse_results() output and the per-frame results
+    """
+    if executor is None:
+        results = detect_symbols_batch(frames, roi)
+    else:
+        results = list(executor.map(detect_symbols, frames, [roi] * len(frames)))
+    return fuse_results(results), results
+
+
+def annotate_frame(frame, result, location=None, roi=DEFAULT_ROI):
+    """
+    Draw the ROI, detected symbols, counts and location onto a frame.
+
+    Args:
+        frame: Frame to draw on (modified in place)
+        result (dict): Output of detect_symbols()
+        location (str): Optional location label
+        roi (tuple): ROI rectangle to outline, or None to skip it
+
+    Returns:
+        The annotated frame
+    """
+    if roi is not None:
+        roi_x, roi_y, roi_w, roi_h = roi
+        cv2.rectangle(frame, (roi_x, roi_y), (roi_x + roi_w, roi_y + roi_h), (0, 255, 0), 2)
+
+    for symbol in result["symbols"]:
+        cv2.drawContours(frame, [symbol["approx"]], -1, (0, 255, 0), 2)
+        if symbol["centroid"] is not None:
+            cx, cy = symbol["centroid"]
+            cv2.putText(frame, symbol["shape"], (cx - 30, cy),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+
+    # Display the counts on the frame
+    y0, dy = 30, 30
+    for i, (shape, count) in enumerate(result["counts"].items()):
+        cv2.putText(frame, f"{shape}: {count}", (10, y0 + i * dy),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+    if location:
+        cv2.putText(frame, f"Location: {location}", (10, 150),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+    return frame
+
+
+def load_frame(path):
+    """Load a saved image in the same channel order the camera delivers."""
+    image = cv2.imread(path)
+    if image is None:
+        return None
+    # Images are saved with RGB2BGR, so undo that here
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+# Reprocess archived checkpoint images
+if __name__ == "__main__":
+    import sys
+
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else "captured_images"
+    batch_size = 32
+    paths = sorted(p for p in glob.glob(os.path.join(image_dir, "*.jpg"))
+                   if not p.endswith("_annotated.jpg"))
+    print(f"Reprocessing {len(paths)} images from {image_dir}")
+
+    for start in range(0, len(paths), batch_size):
+        loaded = [(p, load_frame(p)) for p in paths[start:start + batch_size]]
+        loaded = [(p, f) for p, f in loaded if f is not None]
+        batch_paths = [p for p, _ in loaded]
+        frames = [f for _, f in loaded]
+        # Frames of different sizes can't be stacked, fall back to one at a time
+        if len({f.shape for f in frames}) == 1:
+            results = detect_symbols_batch(frames)
+        else:
+            results = [detect_symbols(f) for f in frames]
+        for path, result in zip(batch_paths, results):
+            print(f"{os.path.basename(path)}: {to_material_counts(result['counts'])}")
@@ -0,0 +1,336 @@
+"""
+Durable write-ahead telemetry log for Smart Logistics Bot.
+
+Every intended Firebase write is appended as a JSONL record with a sequence
+number and a CRC32 checksum before it is sent. Records stay outstanding
+until Firebase acknowledges them, so writes made while offline are replayed
+in order once the connection returns. Fully acknowledged segment files are
+deleted, and the log is capped so it can't fill the SD card.
+
+A record Firebase refuses outright (an invalid key, say) would otherwise
+stay at the head of the log and block everything behind it, so it is moved
+to a quarantine file and acknowledged instead.
+
+Only one TelemetryLog may have a directory open at a time; a second one
+would hand out the same sequence numbers and compact the first one's
+records, so it is refused.
+
+Layout of the log directory:
+    segment-<first seq>.jsonl   One record per line
+    ack.json                    Highest acknowledged sequence number
+    lock                        Held (flock) while the log is open
+    log_id                      Random id naming this log in the database
+    quarantine.jsonl            Records Firebase rejected, with the reason
+"""
+
+import fcntl
+import glob
+import json
+import os
+import time
+import uuid
+import zlib
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+ACK_FILE = "ack.json"
+LOCK_FILE = "lock"
+LOG_ID_FILE = "log_id"
+QUARANTINE_FILE = "quarantine.jsonl"
+
+
+class RecordRejected(Exception):
+    """Raised by a replay send() when Firebase permanently refuses the records."""
+
+
+def _checksum(seq, ts, updates):
+    """CRC32 over the canonical JSON form of a record's contents."""
+    payload = json.dumps({"seq": seq, "ts": ts, "updates": updates},
+                         sort_keys=True, separators=(",", ":"))
+    return zlib.crc32(payload.encode())
+
+
+class TelemetryLog:
+    """
+    Append-only, segmented log of pending telemetry writes.
+
+    Attributes:
+        directory (str): Where segments are stored
+        log_id (str): Random id kept with the log, so the records it has
+            applied can be recorded in the database (see FirebaseConnector)
+        acked_seq (int): Highest sequence number acknowledged by Firebase
+        corrupt_records (int): Records skipped on load because they failed
+            to parse or their checksum didn't match
+        quarantined (list): Sequence numbers moved to the quarantine file
+            since the log was opened
+    """
+
+    def __init__(self, directory="telemetry_log", segment_max_records=500,
+                 max_segments=200, fsync=True):
+        """
+        Open (or create) the log and load outstanding records.
+
+        Args:
+            directory (str): Log directory
+            segment_max_records (int): Records per segment before rotating
+            max_segments (int): Oldest segments are dropped beyond this many,
+                even if unacknowledged, to bound disk usage
+            fsync (bool): fsync every append so records survive power loss
+
+        Raises:
+            RuntimeError: If another TelemetryLog has the directory open
+        """
+        self.directory = directory
+        self.segment_max_records = segment_max_records
+        self.max_segments = max_segments
+        self.fsync = fsync
+        self.acked_seq = 0
+        self.corrupt_records = 0
+        self.quarantined = []
+
+        # Segment path -> last seq written to it, oldest first
+        self._segments = {}
+        self._outstanding = []
+        self._file = None
+        self._file_records = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._acquire_lock()
+        self.log_id = self._load_log_id()
+        self._load()
+
+    # ===== LOADING =====
+    def _load(self):
+        """Read the ack marker and every segment, keeping unacknowledged records."""
+        ack_path = os.path.join(self.directory, ACK_FILE)
+        if os.path.exists(ack_path):
+            try:
+                with open(ack_path, "r") as f:
+                    self.acked_seq = int(json.load(f)["acked_seq"])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: could not read {ack_path}: {e}")
+
+        last_seq = self.acked_seq
+        for path in sorted(glob.glob(os.path.join(self.directory, SEGMENT_PREFIX + "*" + SEGMENT_SUFFIX))):
+            segment_last = 0
+            for record in self._read_segment(path):
+                segment_last = max(segment_last, record["seq"])
+                if record["seq"] > self.acked_seq:
+                    self._outstanding.append(record)
+            self._segments[path] = segment_last
+            last_seq = max(last_seq, segment_last)
+
+        self._outstanding.sort(key=lambda r: r["seq"])
+        self._next_seq = last_seq + 1
+        self._compact()
+        if self._outstanding:
+            print(f"Telemetry log: {len(self._outstanding)} record(s) waiting to be uploaded")
+
+    def _acquire_lock(self):
+        """Take the directory's lock file, refusing a directory already in use."""
+        path = os.path.join(self.directory, LOCK_FILE)
+        lock_file = open(path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Telemetry log {self.directory} is already open "
+                               f"in another connector or process")
+        return lock_file
+
+    def _load_log_id(self):
+        """Read the log's id, creating one for a new log."""
+        path = os.path.join(self.directory, LOG_ID_FILE)
+        try:
+            with open(path, "r") as f:
+                log_id = f.read().strip()
+            if log_id:
+                return log_id
+        except OSError:
+            pass
+        log_id = uuid.uuid4().hex[:16]
+        with open(path, "w") as f:
+            f.write(log_id)
+        return log_id
+
+    def _read_segment(self, path):
+        """Yield valid records from a segment, skipping torn or corrupt lines."""
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        if record["crc"] != _checksum(record["seq"], record["ts"], record["updates"]):
+                            raise ValueError("checksum mismatch")
+                    except (ValueError, KeyError, TypeError):
+                        self.corrupt_records += 1
+                        continue
+                    yield record
+        except OSError as e:
+            print(f"Warning: could not read telemetry segment {path}: {e}")
+
+    # ===== WRITING =====
+    def append(self, updates):
+        """
+        Durably record a multi-path update before it is sent.
+
+        Args:
+            updates (dict): Path -> value pairs
+
+        Returns:
+            int: Sequence number assigned to the record
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        ts = int(time.time() * 1000)
+        record = {"seq": seq, "ts": ts, "updates": updates,
+                  "crc": _checksum(seq, ts, updates)}
+
+        if self._file is None or self._file_records >= self.segment_max_records:
+            self._rotate(seq)
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._file_records += 1
+        self._segments[self._file.name] = seq
+        self._outstanding.append(record)
+
+        if len(self._segments) > self.max_segments:
+            self._drop_oldest_segment()
+        return seq
+
+    def _rotate(self, first_seq):
+        """Start a new segment (always a fresh file, never after a torn line)."""
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+        self._file = open(path, "a")
+        self._file_records = 0
+        self._segments[path] = first_seq
+
+    def _drop_oldest_segment(self):
+        """Discard the oldest segment to respect max_segments."""
+        path = next(iter(self._segments))
+        last_seq = self._segments.pop(path)
+        dropped = [r for r in self._outstanding if r["seq"] <= last_seq]
+        self._outstanding = [r for r in self._outstanding if r["seq"] > last_seq]
+        self._remove(path)
+        if last_seq > self.acked_seq:
+            self._write_ack(last_seq)
+        print(f"Warning: telemetry log full, dropped {len(dropped)} unsent record(s)")
+
+    # ===== READING / ACKNOWLEDGING =====
+    def outstanding(self, limit=None):
+        """
+        Return unacknowledged records, oldest first.
+
+        Args:
+            limit (int): Maximum number of records to return
+
+        Returns:
+            list: Records as dicts with "seq", "ts" and "updates"
+        """
+        return self._outstanding[:limit] if limit else list(self._outstanding)
+
+    def pending_count(self):
+        """Return the number of unacknowledged records."""
+        return len(self._outstanding)
+
+    def ack(self, seq):
+        """
+        Mark every record up to and including seq as uploaded and compact.
+
+        Args:
+            seq (int): Highest sequence number Firebase has accepted
+        """
+        if seq <= self.acked_seq:
+            return
+        self._write_ack(seq)
+        self._outstanding = [r for r in self._outstanding if r["seq"] > seq]
+        self._compact()
+
+    def _write_ack(self, seq):
+        self.acked_seq = seq
+        ack_path = os.path.join(self.directory, ACK_FILE)
+        tmp_path = ack_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"acked_seq": seq}, f)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, ack_path)
+
+    def _compact(self):
+        """Delete segments whose records have all been acknowledged."""
+        current = self._file.name if self._file is not None else None
+        for path, last_seq in list(self._segments.items()):
+            if last_seq <= self.acked_seq and path != current:
+                del self._segments[path]
+                self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Warning: could not remove telemetry segment {path}: {e}")
+
+    def replay(self, send, batch_size=50):
+        """
+        Send outstanding records in order, in batches, acknowledging each batch.
+
+        When send() rejects a batch, its records are sent one at a time so
+        the rejected ones can be quarantined and the rest still go out.
+
+        Args:
+            send: Callable(list of records) -> bool, True if Firebase accepted
+                them, False to retry later (e.g. offline); raises
+                RecordRejected if Firebase will never accept them
+            batch_size (int): Records per send call
+
+        Returns:
+            bool: True if nothing is left outstanding
+        """
+        singles = 0  # Records left to send one at a time after a rejected batch
+        while self._outstanding:
+            batch = self._outstanding[:1 if singles else batch_size]
+            try:
+                accepted = send(batch)
+            except RecordRejected as e:
+                if len(batch) > 1:
+                    singles = len(batch)
+                    continue
+                self.quarantine(batch[0], str(e))
+                accepted = True
+            if not accepted:
+                return False
+            self.ack(batch[-1]["seq"])
+            singles = max(singles - 1, 0)
+        return True
+
+    def quarantine(self, record, reason):
+        """
+        Set a record aside in the quarantine file (the caller acknowledges it).
+
+        Args:
+            record (dict): Outstanding record
+            reason (str): Why Firebase refused it
+        """
+        path = os.path.join(self.directory, QUARANTINE_FILE)
+        entry = dict(record, reason=reason, quarantined_at=int(time.time() * 1000))
+        with open(path, "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.quarantined.append(record["seq"])
+        print(f"Warning: telemetry record {record['seq']} was rejected and moved to {path}: {reason}")
+
+    def close(self):
+        """Close the current segment file and release the directory."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()  # Releases the flock
+            self._lock_file = None
@@ -0,0 +1,171 @@
+"""
+Non-blocking telemetry publisher for Smart Logistics Bot.
+
+TelemetryPublisher owns the Firebase connection on a background thread.
+Callers hand it updates and return immediately; pending writes to the same
+path are coalesced so only the latest value is sent, and everything that is
+pending goes out as one multi-path update. Network latency and outages
+never stall motor control or detection.
+"""
+
+import threading
+import time
+
+from firebase_integration import FirebaseConnector, merge_path_update
+
+
+class TelemetryPublisher:
+    """
+    Fire-and-forget, coalescing front end for a FirebaseConnector.
+
+    Attributes:
+        connector (FirebaseConnector): Connector used for the actual writes
+        sent (int): Batches committed
+        coalesced (int): Pending values replaced by a newer value before sending
+        failed (int): Batches the connector could not send
+    """
+
+    def __init__(self, connector=None, min_interval=0.1):
+        """
+        Start the publisher thread.
+
+        Args:
+            connector (FirebaseConnector): Connector to publish through (a new one if None)
+            min_interval (float): Minimum seconds between batches, so bursts of
+                updates are gathered into one request
+        """
+        self.connector = connector if connector is not None else FirebaseConnector()
+        self.min_interval = min_interval
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+
+        self._pending = {}
+        self._in_flight = False
+        self._flushes = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="telemetry-publisher", daemon=True)
+        self._thread.start()
+
+    # ===== PUBLIC API (never blocks on the network) =====
+    def set(self, path, value):
+        """
+        Queue a write of value to path, replacing any pending value for it.
+
+        Args:
+            path (str): Database path, e.g. "currentLocation"
+            value: JSON-serialisable value
+        """
+        path = path.strip('/')
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("TelemetryPublisher is closed")
+            self._merge(path, value)
+            self._cond.notify_all()
+
+    def update(self, updates):
+        """Queue several path -> value writes at once."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("TelemetryPublisher is closed")
+            for path, value in updates.items():
+                self._merge(path.strip('/'), value)
+            self._cond.notify_all()
+
+    def update_location(self, location):
+        """Queue a location update (see FirebaseConnector.update_location)."""
+        self.update({'currentLocation': location, 'lastUpdate': int(time.time() * 1000)})
+
+    def update_materials(self, materials_dict):
+        """Queue a material count update (see FirebaseConnector.update_materials)."""
+        self.update({'detectedMaterials': materials_dict, 'lastUpdate': int(time.time() * 1000)})
+
+    def update_checkpoint(self, location, materials_dict):
+        """Queue location and material counts together."""
+        self.update({
+            'currentLocation': location,
+            'detectedMaterials': materials_dict,
+            'lastUpdate': int(time.time() * 1000)
+        })
+
+    def pending(self):
+        """Return the number of paths waiting to be sent."""
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        """
+        Wait until everything queued so far has been sent (or has failed).
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if the queue drained within the timeout
+        """
+        with self._cond:
+            # Send straight away instead of waiting out min_interval
+            self._flushes += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+            finally:
+                self._flushes -= 1
+
+    def close(self, timeout=None):
+        """
+        Drain pending updates and stop the publisher thread.
+
+        Args:
+            timeout (float): Seconds to wait for the drain, or None to wait indefinitely
+
+        Returns:
+            bool: True if everything was sent before shutdown
+        """
+        drained = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        print(f"Telemetry publisher stopped ({self.sent} sent, {self.coalesced} coalesced, "
+              f"{self.failed} failed)")
+        return drained
+
+    # ===== INTERNALS =====
+    def _merge(self, path, value):
+        """Add path -> value to the pending set (lock held)."""
+        if merge_path_update(self._pending, path, value):
+            self.coalesced += 1
+
+    def _run(self):
+        """Publisher loop: send pending updates as one batch at a time."""
+        last_send = 0.0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return  # Closed and drained
+
+                # Let a burst of updates accumulate into one request
+                delay = last_send + self.min_interval - time.monotonic()
+                if delay > 0:
+                    self._cond.wait_for(lambda: self._closed or self._flushes, delay)
+
+                batch, self._pending = self._pending, {}
+                self._in_flight = True
+
+            ok = False
+            try:
+                ok = self.connector.commit_batch(batch)
+            except Exception as e:
+                print(f"Error publishing telemetry: {e}")
+            last_send = time.monotonic()
+
+            with self._cond:
+                self._in_flight = False
+                if ok:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+                self._cond.notify_all()
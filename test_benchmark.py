@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the detection benchmark suite.
+Runs a few small benchmarks on synthetic scenes.
+"""
+
+import copy
+import os
+import tempfile
+
+import numpy as np
+from benchmark import (CONDITIONS, DETECTORS, compare, generate_scene, generate_scenes,
+                       load_results, run_benchmark, save_results)
+from symbol_detection import detect_symbols
+
+
+def test_scenes_match_their_counts():
+    """Clean and cluttered scenes are detected with the counts they were drawn with."""
+    counts = {"Circle": 3, "Square": 2, "Triangle": 1, "X": 2}
+    rng = np.random.default_rng(3)
+    assert detect_symbols(generate_scene(counts, rng=rng))["counts"] == counts
+    assert detect_symbols(generate_scene(counts, clutter=8, rng=rng))["counts"] == counts
+
+
+def test_conditions_share_layouts():
+    """Every condition uses the same symbol counts for a given seed."""
+    clean = generate_scenes("clean", scenes=13, seed=5)
+    noisy = generate_scenes("noise", scenes=13, seed=5)
+    assert [counts for _, counts in clean] == [counts for _, counts in noisy]
+    assert sorted(sum(counts.values()) for _, counts in clean) == list(range(13))
+    assert not np.array_equal(clean[1][0], noisy[1][0])
+    assert set(CONDITIONS) >= {"clean", "noise", "blur", "dim", "clutter"}
+
+
+def test_results_and_baselines():
+    """Results include timing and accuracy, survive a JSON round trip and flag regressions."""
+    results = run_benchmark(["detect_symbols", "detect_materials"], ["clean"], scenes=13, repeat=1)
+    clean = results["detectors"]["detect_symbols"]["clean"]
+    assert clean["fps"] > 0 and clean["ms_per_frame"] > 0
+    assert clean["exact"] == 1.0 and clean["recall"] == 1.0
+    assert set(clean["by_blobs"]) == {str(n) for n in range(13)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "baseline.json")
+        save_results(results, path)
+        baseline = load_results(path)
+    assert compare(results, baseline) == []
+
+    # Faster but less accurate is still a regression
+    worse = copy.deepcopy(results)
+    worse["detectors"]["detect_symbols"]["clean"]["ms_per_frame"] /= 2
+    worse["detectors"]["detect_symbols"]["clean"]["exact"] = 0.9
+    regressions = compare(worse, baseline)
+    assert len(regressions) == 1 and "exact matches" in regressions[0]
+
+    slower = copy.deepcopy(results)
+    slower["detectors"]["detect_symbols"]["clean"]["ms_per_frame"] *= 2
+    assert "ms/frame" in compare(slower, baseline)[0]
+
+
+def test_clean_scenes_score_perfectly():
+    """Every detector, the material detectors included, is exact on clean scenes."""
+    results = run_benchmark(list(DETECTORS), ["clean"], scenes=26, repeat=1)
+    for detector, conditions in results["detectors"].items():
+        assert conditions["clean"]["exact"] == 1.0, detector
+
+
+if __name__ == "__main__":
+    print("===== Benchmark Suite Test =====")
+    for test in [test_scenes_match_their_counts, test_conditions_share_layouts,
+                 test_results_and_baselines, test_clean_scenes_score_perfectly]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the threaded capture pipeline.
+Uses a fake camera - no hardware is needed.
+"""
+
+import queue
+import threading
+import time
+
+from capture_pipeline import BLOCK, LATEST_WINS, CapturePipeline, StageQueue
+
+
+def fake_camera(interval=0.002, frames=None):
+    """Return a read_frame() callable yielding increasing frame numbers."""
+    state = {"n": 0}
+
+    def read_frame():
+        time.sleep(interval)
+        if frames is not None and state["n"] >= frames:
+            return False, None
+        state["n"] += 1
+        return True, state["n"]
+    return read_frame
+
+
+def test_latest_wins_replaces_oldest():
+    """A full latest-wins queue drops its oldest items and counts them."""
+    slot = StageQueue(maxsize=1, policy=LATEST_WINS)
+    for item in (1, 2, 3):
+        slot.put(item)
+    assert slot.get() == 3
+    assert slot.dropped == 2 and slot.max_depth == 1
+
+    window = StageQueue(maxsize=2, policy=LATEST_WINS)
+    for item in (1, 2, 3, 4):
+        window.put(item)
+    assert [window.get(), window.get()] == [3, 4]
+    assert window.dropped == 2
+    try:
+        window.get(timeout=0.01)
+        assert False, "Expected queue.Empty"
+    except queue.Empty:
+        pass
+
+
+def test_block_policy_counts_blocked_time():
+    """A full blocking queue holds the producer and records how long it waited."""
+    stage_queue = StageQueue(maxsize=1, policy=BLOCK)
+    stage_queue.put("a")
+    producer = threading.Thread(target=stage_queue.put, args=("b",))
+    producer.start()
+    producer.join(0.05)
+    assert producer.is_alive()
+
+    assert stage_queue.get() == "a"
+    producer.join(2)
+    assert not producer.is_alive()
+    assert stage_queue.get() == "b"
+    assert stage_queue.dropped == 0 and stage_queue.blocked_time >= 0.04
+
+
+def test_pipeline_metrics_and_shutdown():
+    """A slow stage supersedes frames; stop() drains and ends every thread."""
+    uploaded = []
+
+    def detect(packet):
+        time.sleep(0.02)
+        return packet.derive(packet.frame * 10)
+
+    def upload(packet):
+        uploaded.append(packet.data)
+
+    pipeline = CapturePipeline(fake_camera())
+    pipeline.add_stage("detection", detect)
+    pipeline.add_stage("telemetry", upload, maxsize=4, policy=BLOCK)
+    pipeline.start()
+    deadline = time.monotonic() + 5
+    while len(uploaded) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+
+    assert not pipeline.running
+    assert not any(stage._thread.is_alive() for stage in pipeline.stages)
+    metrics = pipeline.metrics()
+    assert metrics["capture"]["dropped"] > 0  # Detection is slower than capture
+    assert metrics["telemetry"]["input_dropped"] == 0
+    assert metrics["telemetry"]["processed"] == len(uploaded) == metrics["detection"]["processed"]
+    assert uploaded == sorted(uploaded)
+    assert metrics["telemetry"]["mean_latency_ms"] >= 20
+
+
+def test_camera_failure_stops_every_stage():
+    """When the camera gives up, the stop marker flows through every stage."""
+    pipeline = CapturePipeline(fake_camera(frames=3))
+    pipeline.grabber.max_failures = 2
+    pipeline.add_stage("detection", lambda packet: packet.derive(packet.frame))
+    pipeline.add_stage("telemetry", lambda packet: None, maxsize=4, policy=BLOCK)
+    pipeline.start()
+    pipeline.grabber._thread.join(2)
+    for stage in pipeline.stages:
+        stage.join(2)
+    assert not pipeline.running
+    assert not any(stage._thread.is_alive() for stage in pipeline.stages)
+    assert pipeline.grabber.captured == 3
+
+
+if __name__ == "__main__":
+    print("===== Capture Pipeline Test =====")
+    for test in [test_latest_wins_replaces_oldest, test_block_policy_counts_blocked_time,
+                 test_pipeline_metrics_and_shutdown, test_camera_failure_stops_every_stage]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
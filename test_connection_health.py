@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the connection health monitor and circuit breaker.
+Uses a fake probe - no Firebase credentials are needed.
+"""
+
+import time
+
+from connection_health import CircuitBreaker, HealthMonitor, CLOSED, OPEN, HALF_OPEN
+
+
+def test_breaker_opens_after_threshold():
+    """Consecutive failures open the breaker; a success closes it again."""
+    breaker = CircuitBreaker(failure_threshold=3, base_backoff=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    assert 9 < breaker.retry_in() <= 11
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_backoff_doubles_after_failed_trial():
+    """Each failed recovery attempt doubles the wait, up to max_backoff."""
+    breaker = CircuitBreaker(base_backoff=0.01, max_backoff=0.04, jitter=0)
+    breaker.trip()
+    waits = []
+    for _ in range(4):
+        time.sleep(breaker.retry_in() + 0.005)
+        assert breaker.allow() and breaker.state == HALF_OPEN
+        assert not breaker.allow()  # Only one trial at a time
+        breaker.record_failure()
+        waits.append(breaker._backoff)
+    assert waits == [0.04, 0.04, 0.04, 0.04]
+    assert breaker.trips == 1
+
+
+def test_monitor_recovers_connection():
+    """The monitor keeps probing with backoff and reports the recovery once."""
+    link_up = {"value": False}
+    recovered = []
+
+    def probe():
+        if not link_up["value"]:
+            raise ConnectionError("offline")
+        return True
+
+    breaker = CircuitBreaker(base_backoff=0.01, max_backoff=0.02, jitter=0)
+    monitor = HealthMonitor(probe, breaker, probe_interval=0.05,
+                            on_recover=lambda: recovered.append(True))
+    breaker.trip()
+    monitor.start()
+    try:
+        time.sleep(0.1)
+        assert breaker.state != CLOSED and monitor.probes >= 2
+        link_up["value"] = True
+        deadline = time.monotonic() + 2
+        while breaker.state != CLOSED and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert breaker.state == CLOSED
+        assert recovered == [True] and monitor.recoveries == 1
+    finally:
+        monitor.stop()
+
+
+if __name__ == "__main__":
+    print("===== Connection Health Test =====")
+    for test in [test_breaker_opens_after_threshold, test_backoff_doubles_after_failed_trial,
+                 test_monitor_recovers_connection]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
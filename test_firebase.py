@@ -1,103 +1,303 @@
 #!/usr/bin/env python3
 """
 Test script for the Firebase integration module.
-This script tests the connection to Firebase and basic data update operations.
+The tests run against the in-process database emulator, so no credentials
+or network are needed. If serviceAccountKey.json is present, running this
+script also checks the connection to the real Firebase project.
 """
 
+import json
 import os
+import tempfile
+import threading
 import time
-from firebase_integration import FirebaseConnector
-
-def test_firebase_connection():
-    """Test the basic Firebase connection and updates."""
-    print("Testing Firebase connection...")
-    
-    # Check if credentials file exists
-    if not os.path.exists("serviceAccountKey.json"):
-        print("Error: serviceAccountKey.json not found in the current directory.")
-        print("Please download your service account key from Firebase console.")
-        print("Instructions:")
-        print("1. Go to Firebase console > Project settings > Service accounts")
-        print("2. Click 'Generate new private key'")
-        print("3. Save the file as 'serviceAccountKey.json' in this directory")
-        return False
-    
-    # Initialize Firebase connection
-    firebase = FirebaseConnector()
-    
+
+from firebase_integration import FirebaseConnector, increment
+from metrics import REGISTRY
+from rtdb_emulator import RTDBEmulator, EmulatorError
+from telemetry_log import TelemetryLog
+
+MATERIALS = {
+    "dispatchReady": 5,  # circles
+    "damaged": 2,        # squares
+    "eWaste": 3,         # triangles
+    "rawMaterials": 10   # X shapes
+}
+
+
+def make_connector(emulator, log_dir, **kwargs):
+    """Connector on the emulator without the background health monitor."""
+    return FirebaseConnector(log_dir=log_dir, database=emulator, monitor=False, **kwargs)
+
+
+def test_emulated_updates():
+    """Location and materials each go out as one multi-path update."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(emulator, log_dir)
+        assert firebase.connected
+        assert emulator.snapshot("currentLocation") == "Start"
+
+        updates_before = emulator.calls.get("update", 0)
+        assert firebase.update_location("Test Location")
+        assert firebase.update_materials(MATERIALS)
+        assert emulator.calls["update"] - updates_before == 2
+        assert emulator.snapshot("currentLocation") == "Test Location"
+        assert emulator.snapshot("detectedMaterials") == MATERIALS
+        assert firebase.telemetry_log.pending_count() == 0
+        firebase.close()
+
+
+def test_offline_logging_and_replay():
+    """Writes made during a partition are logged and replayed in one update."""
+    emulator = RTDBEmulator(data={"currentLocation": "Start"})
+    emulator.partition()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(emulator, log_dir)
+        assert not firebase.connected
+
+        assert not firebase.update_location("Offline Location")
+        assert not firebase.update_materials({"dispatchReady": 1, "damaged": 1,
+                                              "eWaste": 1, "rawMaterials": 1})
+        assert firebase.telemetry_log.pending_count() == 2
+        assert emulator.snapshot("currentLocation") == "Start"
+
+        emulator.heal()
+        time.sleep(firebase.breaker.retry_in())
+        assert firebase.check_connection()
+        assert firebase.connected
+        assert firebase.telemetry_log.pending_count() == 0
+        assert emulator.snapshot("currentLocation") == "Offline Location"
+        assert emulator.snapshot("detectedMaterials/damaged") == 1
+        firebase.close()
+
+
+def test_invalid_keys_are_refused_before_logging():
+    """A write with a bad key is refused whole, before anything is sent."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(emulator, log_dir)
+        assert not firebase.commit_batch({"history/rollups/locations/Bldg. A/visits": increment(1),
+                                          "lastCheckpoint": "x"})
+        assert emulator.snapshot("lastCheckpoint") is None
+        assert firebase.telemetry_log.pending_count() == 0
+        assert firebase.server_increments and firebase.connected
+        assert firebase.commit_batch({"visits": increment(1), "lastCheckpoint": "y"})
+        assert emulator.snapshot("visits") == 1
+        firebase.close()
+
+
+def test_rejected_record_is_quarantined():
+    """A logged write Firebase refuses is set aside instead of blocking the log."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        # Records logged before keys were checked up front
+        log = TelemetryLog(log_dir)
+        log.append({"x": {"a.b": 1}, "visits": increment(1)})
+        log.append({"currentLocation": "Building A"})
+        log.close()
+
+        firebase = make_connector(emulator, log_dir)
+        assert emulator.snapshot("currentLocation") == "Building A"
+        assert emulator.snapshot("visits") is None
+        assert firebase.telemetry_log.pending_count() == 0
+        assert firebase.connected and firebase.server_increments
+        firebase.close()
+
+        # Rejected records stay out of the log after a restart
+        assert make_connector(emulator, log_dir).telemetry_log.pending_count() == 0
+        with open(os.path.join(log_dir, "quarantine.jsonl")) as f:
+            quarantined = [json.loads(line) for line in f]
+        assert [q["updates"] for q in quarantined] == [{"x": {"a.b": 1}, "visits": increment(1)}]
+        assert "a.b" in quarantined[0]["reason"]
+
+
+def test_rejections_keep_the_breaker_closed():
+    """Requests Firebase refuses are counted, not treated as an outage."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(emulator, log_dir)
+        rejected_before = REGISTRY.counters.get("firebase_rejected", 0)
+        for _ in range(firebase.breaker.failure_threshold):
+            assert not firebase.commit_batch({"bad#key": 1})
+            assert firebase.read("bad.path") is None
+        assert firebase.connected and firebase.breaker.failures == 0
+        assert REGISTRY.counters["firebase_rejected"] - rejected_before == 2 * firebase.breaker.failure_threshold
+
+        # A real outage still opens the breaker
+        emulator.partition()
+        for _ in range(firebase.breaker.failure_threshold):
+            firebase.read("currentLocation")
+        assert not firebase.connected
+        firebase.close()
+
+
+def test_circuit_breaker_short_circuits():
+    """Once the breaker opens, writes stop paying the network latency."""
+    emulator = RTDBEmulator(latency=0.02)
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(emulator, log_dir)
+        emulator.partition()
+
+        start = time.monotonic()
+        for i in range(20):
+            firebase.update_location(f"L{i}")
+        elapsed = time.monotonic() - start
+
+        assert not firebase.connected
+        assert emulator.failures == firebase.breaker.failure_threshold
+        assert elapsed < 0.02 * 8
+        assert firebase.telemetry_log.pending_count() == 20
+        firebase.close()
+
+
+def test_concurrent_accumulation():
+    """Two bots counting into the same database never lose increments."""
+    emulator = RTDBEmulator(latency=0.001, jitter=0.002, seed=1)
+    with tempfile.TemporaryDirectory() as log_dir:
+        bots = [make_connector(emulator, os.path.join(log_dir, f"bot{i}"), increment_flush_ticks=3)
+                for i in range(2)]
+
+        def count(bot):
+            for _ in range(30):
+                bot.accumulate_materials({"damaged": 1, "eWaste": 2})
+            bot.flush_increments()
+
+        threads = [threading.Thread(target=count, args=(bot,)) for bot in bots]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        totals = emulator.snapshot("detectedMaterials")
+        assert totals["damaged"] == 60 and totals["eWaste"] == 120
+        for bot in bots:
+            bot.close()
+
+
+def test_transaction_fallback():
+    """Counts still add up when the database rejects increment values."""
+    emulator = RTDBEmulator(server_increments=False)
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(emulator, log_dir, increment_flush_ticks=1)
+        assert firebase.accumulate_materials({"rawMaterials": 4})
+        assert firebase.accumulate_materials({"rawMaterials": 1})
+        assert not firebase.server_increments
+        assert emulator.calls["transaction"] == 2
+        assert emulator.snapshot("detectedMaterials/rawMaterials") == 5
+        firebase.close()
+
+
+class FailingTransactions:
+    """Database whose transactions fail as unavailable while fail is set."""
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.fail = True
+
+    def reference(self, path="/"):
+        ref = self.emulator.reference(path)
+        if self.fail:
+            def transaction(update):
+                raise EmulatorError("UNAVAILABLE", "transaction failed")
+            ref.transaction = transaction
+        return ref
+
+
+def test_transaction_fallback_is_all_or_nothing():
+    """Plain values aren't written until every counter transaction has succeeded."""
+    database = FailingTransactions(RTDBEmulator(server_increments=False))
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(database, log_dir)
+        assert not firebase.commit_batch({"lastCheckpoint": "A", "counts/damaged": increment(2)})
+        assert not firebase.server_increments
+        assert database.emulator.snapshot("lastCheckpoint") is None
+
+        database.fail = False
+        assert firebase.replay_log()
+        assert database.emulator.snapshot("lastCheckpoint") == "A"
+        assert database.emulator.snapshot("counts/damaged") == 2
+        firebase.close()
+
+
+def test_lost_replies_are_not_counted_twice():
+    """Increments that landed before their reply was lost aren't replayed."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = make_connector(emulator, log_dir, increment_flush_ticks=1)
+        emulator.lost_reply_rate = 1.0
+        assert not firebase.accumulate_materials({"damaged": 2})
+        assert emulator.snapshot("detectedMaterials/damaged") == 2
+        assert firebase.telemetry_log.pending_count() == 1
+
+        emulator.lost_reply_rate = 0.0
+        assert firebase.accumulate_materials({"damaged": 1})
+        assert emulator.snapshot("detectedMaterials/damaged") == 3
+        assert firebase.telemetry_log.pending_count() == 0
+        firebase.close()
+
+        # The same holds when the bot restarts before replaying
+        firebase = make_connector(emulator, log_dir, increment_flush_ticks=1)
+        emulator.lost_reply_rate = 1.0
+        assert not firebase.accumulate_materials({"eWaste": 5})
+        firebase.close()
+        emulator.lost_reply_rate = 0.0
+        firebase = make_connector(emulator, log_dir, increment_flush_ticks=1)
+        assert firebase.telemetry_log.pending_count() == 0
+        assert emulator.snapshot("detectedMaterials/eWaste") == 5
+        firebase.close()
+
+
+def test_emulator_rejects_overlapping_paths():
+    """Like the real database, a multi-path update can't contain a path and its ancestor."""
+    emulator = RTDBEmulator()
+    try:
+        emulator.reference().update({"a": 1, "a/b": 2})
+    except EmulatorError as e:
+        assert e.code == "INVALID_ARGUMENT"
+    else:
+        raise AssertionError("overlapping paths were accepted")
+    assert emulator.snapshot() is None
+
+
+def check_live_firebase():
+    """Test the basic Firebase connection and updates against the real project."""
+    print("\nTesting live Firebase connection...")
+    firebase = FirebaseConnector(monitor=False)
+
     if not firebase.connected:
         print("Firebase connection failed.")
         print("Check your credentials file and internet connection.")
         return False
-    
+
     print("Firebase connection successful!")
-    
-    # Test location update
-    print("\nTesting location update...")
-    result = firebase.update_location("Test Location")
-    if result:
-        print("✓ Location update successful")
-    else:
-        print("✗ Location update failed")
-    
-    # Test materials update
-    print("\nTesting materials update...")
-    materials = {
-        "dispatchReady": 5,  # circles
-        "damaged": 2,        # squares
-        "eWaste": 3,         # triangles
-        "rawMaterials": 10   # X shapes
-    }
-    
-    result = firebase.update_materials(materials)
-    if result:
-        print("✓ Materials update successful")
-    else:
-        print("✗ Materials update failed")
-    
+    print("✓ Location update successful" if firebase.update_location("Test Location")
+          else "✗ Location update failed")
+    print("✓ Materials update successful" if firebase.update_materials(MATERIALS)
+          else "✗ Materials update failed")
+    firebase.close()
     return True
 
-def test_local_logging():
-    """Test local logging when Firebase is unavailable."""
-    print("\nTesting local logging fallback...")
-    
-    # Temporarily rename the credentials file to simulate connection failure
-    if os.path.exists("serviceAccountKey.json"):
-        os.rename("serviceAccountKey.json", "serviceAccountKey.json.backup")
-        
-        try:
-            # Initialize Firebase without valid credentials
-            firebase = FirebaseConnector()
-            
-            # Should log locally instead
-            firebase.update_location("Offline Location")
-            firebase.update_materials({
-                "dispatchReady": 1,
-                "damaged": 1,
-                "eWaste": 1,
-                "rawMaterials": 1
-            })
-            
-            # Check if log file was created
-            if os.path.exists("material_logs.txt"):
-                print("✓ Local logging successful")
-                print("Check material_logs.txt for the logged data")
-            else:
-                print("✗ Local logging failed")
-                
-        finally:
-            # Restore the credentials file
-            os.rename("serviceAccountKey.json.backup", "serviceAccountKey.json")
-    else:
-        print("Skipping local logging test (no credentials file found)")
 
 if __name__ == "__main__":
     print("===== Firebase Integration Test =====")
-    
-    connection_success = test_firebase_connection()
-    
-    if connection_success:
-        test_local_logging()
-    
+    for test in [test_emulated_updates, test_offline_logging_and_replay,
+                 test_invalid_keys_are_refused_before_logging, test_rejected_record_is_quarantined, test_rejections_keep_the_breaker_closed,
+                 test_circuit_breaker_short_circuits, test_concurrent_accumulation,
+                 test_transaction_fallback, test_transaction_fallback_is_all_or_nothing,
+                 test_lost_replies_are_not_counted_twice,
+                 test_emulator_rejects_overlapping_paths]:
+        test()
+        print(f"✓ {test.__name__}")
+
+    if os.path.exists("serviceAccountKey.json"):
+        check_live_firebase()
+    else:
+        print("\nSkipping live test (serviceAccountKey.json not found).")
+        print("To run it, download a service account key from Firebase console:")
+        print("1. Go to Firebase console > Project settings > Service accounts")
+        print("2. Click 'Generate new private key'")
+        print("3. Save the file as 'serviceAccountKey.json' in this directory")
+
     print("\nTests completed!")
-    print("If all tests passed, the Firebase integration is working correctly.") 
\ No newline at end of file
+    print("If all tests passed, the Firebase integration is working correctly.")
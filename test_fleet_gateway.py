@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test script for fleet mode and the telemetry gateway.
+Runs against the in-process database emulator - no credentials are needed.
+"""
+
+import json
+import os
+import socket
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from firebase_integration import FirebaseConnector, increment
+from fleet_gateway import FleetGateway, GatewayClient
+from rtdb_emulator import RTDBEmulator
+
+
+def test_connectors_are_namespaced():
+    """Two bots in one process keep separate state and share the fleet index."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        bots = [FirebaseConnector(log_dir=os.path.join(log_dir, bot_id), database=emulator,
+                                  bot_id=bot_id, monitor=False)
+                for bot_id in ("bot1", "bot2")]
+        bots[0].update_location("Building A")
+        bots[1].update_location("Building C")
+        bots[1].update_materials({"damaged": 2})
+
+        assert emulator.snapshot("currentLocation") is None
+        assert emulator.snapshot("bots/bot1/currentLocation") == "Building A"
+        assert emulator.snapshot("bots/bot2/detectedMaterials") == {"damaged": 2}
+        fleet = emulator.snapshot("fleet")
+        assert fleet["bot1"]["currentLocation"] == "Building A"
+        assert fleet["bot2"]["currentLocation"] == "Building C"
+        assert bots[1].read("detectedMaterials/damaged") == 2
+        for bot in bots:
+            bot.close()
+
+
+def test_default_logs_are_per_bot():
+    """Bots in one process get their own telemetry log without passing log_dir."""
+    emulator = RTDBEmulator()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            bots = [FirebaseConnector(database=emulator, bot_id=bot_id, monitor=False)
+                    for bot_id in ("bot1", "bot2")]
+            assert [bot.telemetry_log.directory for bot in bots] == [
+                os.path.join("telemetry_log", "bot1"), os.path.join("telemetry_log", "bot2")]
+            assert bots[0].telemetry_log.log_id != bots[1].telemetry_log.log_id
+
+            # Both logs fill up offline, then replay only their own records
+            for bot in bots:
+                bot.breaker.trip()
+                bot.update_location("Building A")
+                bot.accumulate_materials({"damaged": 1})
+                bot.flush_increments()
+            assert [bot.telemetry_log.pending_count() for bot in bots] == [2, 2]
+
+            time.sleep(max(bot.breaker.retry_in() for bot in bots))
+            for bot in bots:
+                assert bot.check_connection()
+                assert bot.telemetry_log.pending_count() == 0
+            assert emulator.snapshot("bots/bot1/detectedMaterials/damaged") == 1
+            assert emulator.snapshot("bots/bot2/detectedMaterials/damaged") == 1
+
+            # A directory already open in this process is refused
+            try:
+                FirebaseConnector(database=emulator, bot_id="bot1", monitor=False)
+                assert False, "Expected RuntimeError"
+            except RuntimeError:
+                pass
+            for bot in bots:
+                bot.close()
+        finally:
+            os.chdir(cwd)
+
+
+def test_gateway_coalesces_fleet_updates():
+    """Updates from many bots go out in a few shared multi-path updates."""
+    emulator = RTDBEmulator(latency=0.01)
+    with tempfile.TemporaryDirectory() as log_dir:
+        gateway = FleetGateway(log_dir=log_dir, database=emulator, monitor=False, min_interval=0.05)
+        updates_before = emulator.calls.get("update", 0)
+        for i in range(30):
+            channel = gateway.bot(f"bot{i}")
+            channel.update_location("Building B")
+            channel.accumulate("detectedMaterials", {"eWaste": 1})
+            channel.accumulate("detectedMaterials", {"eWaste": 2})
+        assert gateway.publisher.flush(timeout=5)
+
+        assert emulator.calls["update"] - updates_before < 10
+        assert len(emulator.snapshot("fleet")) == 30
+        assert emulator.snapshot("bots/bot29/detectedMaterials/eWaste") == 3
+        gateway.close()
+
+
+def test_http_relay():
+    """Bots on other machines relay through the gateway's HTTP endpoint."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        gateway = FleetGateway(log_dir=log_dir, database=emulator, monitor=False)
+        port = gateway.start_server("127.0.0.1", 0)
+        try:
+            client = GatewayClient(f"http://127.0.0.1:{port}", "bot7",
+                                   log_dir=os.path.join(log_dir, "client"))
+            assert client.commit_batch({"currentLocation": "Building A", "lastUpdate": 1})
+            client.close()
+            assert gateway.publisher.flush(timeout=5)
+            assert emulator.snapshot("fleet/bot7") == {"currentLocation": "Building A", "lastUpdate": 1}
+
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/fleet", timeout=2) as response:
+                stats = json.loads(response.read())
+            assert stats["bots"]["bot7"]["updates"] == 1
+        finally:
+            gateway.close()
+
+
+def test_http_relay_rejects_invalid_keys():
+    """Updates the database would refuse get a 400 and are never queued."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        gateway = FleetGateway(log_dir=log_dir, database=emulator, monitor=False)
+        port = gateway.start_server("127.0.0.1", 0)
+        try:
+            bad = [("bot7", {"bad#key": 1}),
+                   ("bot7", {"detectedMaterials/e.waste": 1}),
+                   ("bot7", {"detectedMaterials": {"damaged": 1, "e$waste": 2}}),
+                   ("bot7", {"route": [{"a[0]": 1}]}),
+                   ("bot.7", {"currentLocation": "Building A"}),
+                   ("bot8", ["not", "a", "dict"])]
+            for bot_id, updates in bad:
+                request = urllib.request.Request(f"http://127.0.0.1:{port}/bots/{bot_id}",
+                                                 data=json.dumps(updates).encode())
+                try:
+                    urllib.request.urlopen(request, timeout=2)
+                    assert False, f"{updates} was accepted"
+                except urllib.error.HTTPError as e:
+                    assert e.code == 400
+            assert gateway.publisher.pending() == 0
+
+            client = GatewayClient(f"http://127.0.0.1:{port}", "bot7",
+                                   log_dir=os.path.join(log_dir, "client"))
+            assert client.commit_batch({"detectedMaterials": {"damaged": 1}, "lastUpdate": 2})
+            assert gateway.publisher.flush(timeout=5)
+            assert emulator.snapshot("bots/bot7/detectedMaterials") == {"damaged": 1}
+            assert gateway.connector.telemetry_log.quarantined == []
+            client.close()
+        finally:
+            gateway.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_client_logs_while_gateway_is_down():
+    """Telemetry relayed during a gateway outage is kept and sent once it is back."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        client_log = os.path.join(log_dir, "client")
+        port = _free_port()
+        client = GatewayClient(f"http://127.0.0.1:{port}", "bot7", timeout=0.5, log_dir=client_log)
+        assert not client.commit_batch({"currentLocation": "Building A", "detectedMaterials/damaged": increment(1)})
+        assert not client.commit_batch({"detectedMaterials/damaged": increment(2)})
+        assert client.telemetry_log.pending_count() == 2
+        client.close()  # The bot restarts before the gateway is back
+
+        gateway = FleetGateway(log_dir=log_dir, database=emulator, monitor=False)
+        gateway.start_server("127.0.0.1", port)
+        try:
+            client = GatewayClient(f"http://127.0.0.1:{port}", "bot7", log_dir=client_log)
+            assert client.commit_batch({"lastUpdate": 3})
+            assert client.telemetry_log.pending_count() == 0
+            assert gateway.publisher.flush(timeout=5)
+            assert emulator.snapshot("bots/bot7/currentLocation") == "Building A"
+            assert emulator.snapshot("bots/bot7/detectedMaterials/damaged") == 3
+            client.close()
+        finally:
+            gateway.close()
+
+
+def test_gateway_requires_token_off_loopback():
+    """Only loopback listeners may skip the token; with a token set, requests must carry it."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        gateway = FleetGateway(log_dir=log_dir, database=emulator, monitor=False)
+        try:
+            gateway.start_server("0.0.0.0", 0)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+
+        port = gateway.start_server("127.0.0.1", 0, token="s3cret")
+        try:
+            url = f"http://127.0.0.1:{port}"
+            anonymous = GatewayClient(url, "bot7", log_dir=os.path.join(log_dir, "anonymous"))
+            assert not anonymous.commit_batch({"currentLocation": "Building A"})
+            assert anonymous.telemetry_log.pending_count() == 1  # Kept, not dropped
+            try:
+                urllib.request.urlopen(f"{url}/fleet", timeout=2)
+                assert False, "Expected HTTP 401"
+            except urllib.error.HTTPError as e:
+                assert e.code == 401
+
+            client = GatewayClient(url, "bot7", token="s3cret", log_dir=os.path.join(log_dir, "client"))
+            assert client.commit_batch({"currentLocation": "Building B"})
+            assert gateway.publisher.flush(timeout=5)
+            assert emulator.snapshot("bots/bot7/currentLocation") == "Building B"
+            for c in (anonymous, client):
+                c.close()
+        finally:
+            gateway.close()
+
+
+if __name__ == "__main__":
+    print("===== Fleet Gateway Test =====")
+    for test in [test_connectors_are_namespaced, test_default_logs_are_per_bot,
+                 test_gateway_coalesces_fleet_updates,
+                 test_http_relay, test_http_relay_rejects_invalid_keys,
+                 test_client_logs_while_gateway_is_down, test_gateway_requires_token_off_loopback]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
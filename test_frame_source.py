@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the replay frame sources.
+Writes small recordings to a temporary directory - no camera is needed.
+"""
+
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from frame_source import AS_FAST_AS_POSSIBLE, REALTIME, open_source, write_raw_dump
+from hardware import render_scene
+from symbol_detection import annotate_frame, detect_symbols
+
+LEVELS = [0, 40, 80, 120, 160]
+
+
+def _frames():
+    return [np.full((48, 64, 3), level, np.uint8) for level in LEVELS]
+
+
+def _levels(source):
+    """Read a source to the end and return each frame's (rounded) gray level."""
+    return [int(round(frame.mean() / 40)) * 40 for frame in source]
+
+
+def test_directory_replay():
+    """Images are replayed in name order, annotated ones skipped, then the stream ends."""
+    with tempfile.TemporaryDirectory() as directory:
+        for i, frame in enumerate(_frames()):
+            cv2.imwrite(os.path.join(directory, f"Building_A_{i:03d}.jpg"), frame)
+        cv2.imwrite(os.path.join(directory, "Building_A_000_annotated.jpg"), _frames()[-1])
+
+        source = open_source(f"dir:{directory}", color_conversion=None)
+        assert _levels(source) == LEVELS
+        assert source.read() == (False, None)
+        assert source.frames_read == len(LEVELS)
+        source.close()
+
+        looping = open_source(f"dir:{directory}", color_conversion=None, loop=True)
+        assert [int(round(looping.read()[1].mean() / 40)) * 40 for _ in range(7)] == LEVELS + LEVELS[:2]
+        looping.close()
+
+        assert not open_source(f"dir:{os.path.join(directory, 'missing')}").open()
+
+
+def test_video_and_raw_replay():
+    """Video files and raw dumps replay every frame in order."""
+    with tempfile.TemporaryDirectory() as directory:
+        video = os.path.join(directory, "run.avi")
+        writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"MJPG"), 25, (64, 48))
+        for frame in _frames():
+            writer.write(frame)
+        writer.release()
+        with open_source(f"video:{video}") as source:
+            assert _levels(source) == LEVELS
+            assert source.fps == 25  # Taken from the file
+
+        dump = os.path.join(directory, "frames.npy")
+        write_raw_dump(dump, _frames())
+        with open_source(f"raw:{dump}") as source:
+            assert [int(frame.mean()) for frame in source] == LEVELS
+
+
+def test_raw_frames_can_be_annotated():
+    """Frames read from a raw dump are writable, so checkpoints can draw on them."""
+    with tempfile.TemporaryDirectory() as directory:
+        dump = os.path.join(directory, "frames.npy")
+        write_raw_dump(dump, [render_scene({"Circle": 1, "X": 1}, rng=np.random.default_rng(2))])
+        with open_source(f"raw:{dump}") as source:
+            ok, frame = source.read()
+        assert ok and frame.flags.writeable
+        result = detect_symbols(frame)
+        annotate_frame(frame, result, "Building A")
+        assert result["counts"]["Circle"] == 1 and result["counts"]["X"] == 1
+        assert int(np.load(dump)[0].sum()) != int(frame.sum())  # The dump is untouched
+
+
+def test_pacing():
+    """Realtime pacing holds frames to the frame rate, fast pacing does not."""
+    with tempfile.TemporaryDirectory() as directory:
+        dump = os.path.join(directory, "frames.npy")
+        write_raw_dump(dump, _frames())
+
+        timings = {}
+        for pacing in (REALTIME, AS_FAST_AS_POSSIBLE):
+            with open_source(f"raw:{dump}", pacing=pacing, fps=50) as source:
+                start = time.monotonic()
+                assert len(list(source)) == len(LEVELS)
+                timings[pacing] = time.monotonic() - start
+        # Five frames at 50 FPS: four frame intervals of 20 ms
+        assert timings[REALTIME] >= 0.075
+        assert timings[AS_FAST_AS_POSSIBLE] < 0.05
+
+
+if __name__ == "__main__":
+    print("===== Frame Source Test =====")
+    for test in [test_directory_replay, test_video_and_raw_replay, test_raw_frames_can_be_annotated,
+                 test_pacing]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the simulated hardware layer and the virtual clock.
+Runs whole missions faster than real time - no Raspberry Pi needed.
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+
+from frame_source import SimulatedCamera, open_source
+from hardware import SimulatedGPIO, VirtualClock, load_gpio, render_scene, run_mission
+from mission_runner import MissionRunner
+from motor_controller import MotorController
+from route_planner import RoutePlanner
+from symbol_detection import detect_symbols
+
+
+def test_virtual_clock_skips_idle_waits():
+    """Sleeps on the virtual loop take no real time but advance the clock."""
+    clock = VirtualClock()
+
+    async def wait():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.sleep(30)
+        return loop.time() - started
+
+    started = time.monotonic()
+    elapsed = run_mission(wait(), clock)
+    assert 30 <= elapsed < 30.1
+    assert time.monotonic() - started < 1
+
+
+def test_background_work_takes_simulated_time():
+    """The clock doesn't skip ahead while executor work is still running."""
+    clock = VirtualClock()
+
+    async def overlap():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        work = loop.run_in_executor(None, time.sleep, 0.1)
+        await asyncio.sleep(0.05)   # Shorter than the work: must not jump past it
+        assert not work.done()
+        await work
+        return loop.time() - started
+
+    elapsed = run_mission(overlap(), clock)
+    assert 0.1 <= elapsed < 0.3
+
+
+def test_simulated_mission():
+    """A multi-lap mission reports robot lap times in a fraction of the real time."""
+    clock = VirtualClock()
+    gpio = load_gpio("sim", clock)
+    motors = MotorController(gpio)
+    motors.setup()
+    camera = SimulatedCamera(seed=1, scene_frames=1)
+    plan, estimate = RoutePlanner.from_file("site_graph.json").motion_plan()
+    processed = []
+
+    def capture(location):
+        ok, frame = camera.read()
+        return frame, camera.counts
+
+    def process(location, captured):
+        frame, truth = captured
+        processed.append(detect_symbols(frame)["counts"] == truth)
+
+    runner = MissionRunner(motors, plan, capture, process, laps=3, capture_delay=1.0)
+    started = time.monotonic()
+    report = run_mission(runner.run(), clock)
+    real = time.monotonic() - started
+
+    assert report["laps"] == 3 and report["checkpoints"] == 9
+    stops = 3
+    settle = motors.settle_time * 4  # Each right turn reverses the right motor
+    for lap_time in report["lap_times"]:
+        assert estimate + stops <= lap_time < estimate + stops + settle + 0.5
+    assert real < sum(report["lap_times"]) / 10
+    assert all(processed)
+
+    # The motors were driven forward for every move of the plan
+    forward = frozenset([motors.pins["in1"], motors.pins["in4"]])
+    moves = sum(step["duration"] for step in plan if step["action"] == "move")
+    assert abs(gpio.high_time[forward] - 3 * moves) < 0.1
+
+
+def test_render_scene():
+    """Rendered scenes are detected with the counts they were drawn with."""
+    counts = {"Circle": 2, "Square": 1, "Triangle": 3, "X": 1}
+    assert detect_symbols(render_scene(counts))["counts"] == counts
+
+
+def test_simulated_gpio():
+    """Simulated pins report the level they were set to."""
+    gpio = SimulatedGPIO()
+    gpio.setup(17, gpio.OUT)
+    gpio.output(17, gpio.HIGH)
+    assert gpio.input(17) == 1 and gpio.high_pins() == {17}
+
+
+def test_bot_imports_leave_opencv_unloaded():
+    """The bot's top-level imports don't load OpenCV; its startup phases do."""
+    script = ("import sys, startup, metrics, hardware, motor_controller, mission_runner, route_planner; "
+              "print('cv2' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_open_sim_source():
+    """open_source("sim") gives a seeded SimulatedCamera showing its ground truth."""
+    camera = open_source("sim:3", scene_frames=1)
+    assert isinstance(camera, SimulatedCamera)
+    ok, frame = camera.read()
+    assert ok and detect_symbols(frame)["counts"] == camera.counts
+    camera.close()
+
+
+if __name__ == "__main__":
+    print("===== Simulated Hardware Test =====")
+    for test in [test_virtual_clock_skips_idle_waits, test_background_work_takes_simulated_time,
+                 test_simulated_mission, test_render_scene, test_simulated_gpio,
+                 test_bot_imports_leave_opencv_unloaded, test_open_sim_source]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the background image writer.
+Writes small frames to a temporary directory.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from image_persistence import ImageWriter, POLICY_BLOCK, POLICY_DROP_NEWEST, POLICY_DROP_OLDEST
+
+
+def _frame():
+    return np.zeros((8, 8, 3), np.uint8)
+
+
+def _hold_worker(writer):
+    """Make the writer's workers wait on the returned event before each write."""
+    gate = threading.Event()
+    write = writer._write
+    writer._write = lambda *args: gate.wait() and write(*args)
+    return gate
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+
+def test_flush_on_close():
+    """Every queued frame is written before close() returns."""
+    with tempfile.TemporaryDirectory() as directory:
+        writer = ImageWriter(max_queue=4, workers=2, fsync_every=3)
+        paths = [os.path.join(directory, "sub", f"{i}.jpg") for i in range(10)]
+        for path in paths:
+            assert writer.submit(path, _frame())
+        assert writer.close()
+        assert writer.written == 10 and writer.dropped == 0 and writer.errors == 0
+        assert all(os.path.getsize(path) > 0 for path in paths)
+
+
+def test_drop_policies():
+    """drop_oldest replaces the oldest queued frame, drop_newest rejects the new one."""
+    for policy, kept in [(POLICY_DROP_OLDEST, ["0", "2", "3"]), (POLICY_DROP_NEWEST, ["0", "1", "2"])]:
+        with tempfile.TemporaryDirectory() as directory:
+            writer = ImageWriter(max_queue=2, policy=policy, fsync_every=0)
+            gate = _hold_worker(writer)
+            path = lambda name: os.path.join(directory, f"{name}.jpg")
+
+            assert writer.submit(path("0"), _frame())
+            _wait_until(lambda: writer.pending() == 0)  # Frame 0 is in the worker
+            assert writer.submit(path("1"), _frame())
+            assert writer.submit(path("2"), _frame())
+            assert writer.submit(path("3"), _frame()) == (policy == POLICY_DROP_OLDEST)
+            assert writer.dropped == 1
+
+            gate.set()
+            assert writer.close(timeout=2)
+            assert sorted(name[:-4] for name in os.listdir(directory)) == kept
+
+
+def test_block_policy_waits_for_space():
+    """The block policy holds submit() until a worker frees a slot."""
+    with tempfile.TemporaryDirectory() as directory:
+        writer = ImageWriter(max_queue=1, policy=POLICY_BLOCK, fsync_every=0)
+        gate = _hold_worker(writer)
+        writer.submit(os.path.join(directory, "0.jpg"), _frame())
+        _wait_until(lambda: writer.pending() == 0)
+        writer.submit(os.path.join(directory, "1.jpg"), _frame())
+
+        submitter = threading.Thread(
+            target=writer.submit, args=(os.path.join(directory, "2.jpg"), _frame()))
+        submitter.start()
+        submitter.join(0.1)
+        assert submitter.is_alive()
+
+        gate.set()
+        submitter.join(2)
+        assert not submitter.is_alive()
+        assert writer.close(timeout=2)
+        assert writer.written == 3 and writer.dropped == 0
+
+
+def test_close_times_out_on_stuck_writer():
+    """close() gives up on a stuck worker instead of hanging on a full queue."""
+    with tempfile.TemporaryDirectory() as directory:
+        writer = ImageWriter(max_queue=1, fsync_every=0)
+        gate = _hold_worker(writer)
+        writer.submit(os.path.join(directory, "0.jpg"), _frame())
+        _wait_until(lambda: writer.pending() == 0)
+        writer.submit(os.path.join(directory, "1.jpg"), _frame())
+
+        start = time.monotonic()
+        assert not writer.close(timeout=0.2)
+        assert time.monotonic() - start < 1.0
+        assert writer.dropped == 1  # The queued frame was discarded
+        gate.set()
+
+
+if __name__ == "__main__":
+    print("===== Image Persistence Test =====")
+    for test in [test_flush_on_close, test_drop_policies, test_block_policy_waits_for_space,
+                 test_close_times_out_on_stuck_writer]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
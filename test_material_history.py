@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the material history and its rollups.
+Runs against the in-process database emulator - no credentials are needed.
+"""
+
+import tempfile
+
+from firebase_integration import FirebaseConnector
+from material_history import MaterialHistory
+from rtdb_emulator import RTDBEmulator
+
+# 2025-01-01 09:15 and 10:05 UTC
+NINE = 1735722900000
+TEN = 1735725900000
+
+
+def test_checkpoints_update_rollups():
+    """Each checkpoint writes one raw event and increments every rollup."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = FirebaseConnector(log_dir=log_dir, database=emulator, monitor=False)
+        history = MaterialHistory(run_id="run1")
+        firebase.commit_batch(history.start_run(NINE))
+
+        updates_before = emulator.calls["update"]
+        firebase.commit_batch(history.checkpoint("Building A", {"damaged": 2, "eWaste": 1}, NINE))
+        firebase.commit_batch(history.checkpoint("Building A", {"damaged": 1}, TEN))
+        firebase.commit_batch(history.checkpoint("Building C", {"rawMaterials": 4}, TEN + 1))
+        assert emulator.calls["update"] - updates_before == 3
+
+        event = emulator.snapshot(f"history/events/2025-01-01/run1/Building A/{NINE}")
+        assert event == {"dispatchReady": 0, "damaged": 2, "eWaste": 1, "rawMaterials": 0}
+
+        rollups = emulator.snapshot("history/rollups")
+        building_a = rollups["locations"]["Building A"]
+        assert building_a["damaged"] == 3 and building_a["eWaste"] == 1
+        assert building_a["visits"] == 2 and building_a["lastSeen"] == TEN
+        assert rollups["hourly"]["2025-01-01T09"]["checkpoints"] == 1
+        assert rollups["hourly"]["2025-01-01T10"] == {"checkpoints": 2, "damaged": 1, "rawMaterials": 4}
+        run = rollups["runs"]["run1"]
+        assert run["totals"] == {"damaged": 3, "eWaste": 1, "rawMaterials": 4}
+        assert run["locations"]["Building C"] == {"rawMaterials": 4}
+        firebase.close()
+
+
+def test_only_last_runs_are_kept():
+    """Starting a run prunes the oldest runs beyond max_runs."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = FirebaseConnector(log_dir=log_dir, database=emulator, monitor=False)
+        for i in range(4):
+            recent = firebase.read("history/rollups/recentRuns")
+            history = MaterialHistory(run_id=f"run{i}", max_runs=2, recent_runs=recent)
+            firebase.commit_batch(history.start_run(NINE + i))
+            firebase.commit_batch(history.checkpoint("Building B", {"dispatchReady": 1}, NINE + i))
+
+        rollups = emulator.snapshot("history/rollups")
+        assert sorted(rollups["runs"]) == ["run2", "run3"]
+        assert sorted(rollups["recentRuns"]) == ["run2", "run3"]
+        assert rollups["locations"]["Building B"]["dispatchReady"] == 4
+        firebase.close()
+
+
+if __name__ == "__main__":
+    print("===== Material History Test =====")
+    for test in [test_checkpoints_update_rollups, test_only_last_runs_are_kept]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the pipelined mission runner.
+Uses fake motors and a fake camera - no Raspberry Pi needed.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from mission_runner import MissionRunner, load_mission
+from route_planner import RoutePlanner
+
+
+TURN_DEGREES = {"right": 90, "left": -90, "around": 180}
+
+
+class FakeMotors:
+    """Motion primitives that just wait on the event loop, tracking the heading."""
+
+    def __init__(self, scale=0.02, heading=0):
+        self.scale = scale
+        self.heading = heading
+        self.move_headings = []
+
+    async def move(self, duration):
+        self.move_headings.append(self.heading)
+        await asyncio.sleep(duration * self.scale)
+
+    async def turn(self, direction, duration):
+        self.heading = (self.heading + TURN_DEGREES[direction]) % 360
+        await asyncio.sleep(duration * self.scale)
+
+
+def _plan():
+    return RoutePlanner.from_file("site_graph.json").motion_plan()
+
+
+def test_processing_overlaps_driving():
+    """Lap time is set by driving; processing finishes in the background."""
+    plan, estimate = _plan()
+    motors = FakeMotors(scale=0.02)   # 18 s of driving -> 0.36 s
+    processed = []
+
+    def capture(location):
+        return {"location": location}
+
+    def process(location, captured):
+        time.sleep(0.08)  # Slower than driving to the next stop (3 s -> 0.06 s) plus a turn
+        processed.append((location, captured["location"]))
+        return location
+
+    runner = MissionRunner(motors, plan, capture, process, laps=2, capture_delay=0, max_pending=3)
+    report = asyncio.run(runner.run())
+
+    assert report["laps"] == 2 and report["checkpoints"] == 6 and report["errors"] == 0
+    # Sequential processing would add 3 * 0.08 s per lap
+    for lap_time in report["lap_times"]:
+        assert lap_time < estimate * motors.scale + 0.15
+    # Every result belongs to the stop it was captured at, in visit order
+    assert all(location == captured for location, captured in processed)
+    assert [location for location, _ in processed] == ["Building A", "Building B", "Building C"] * 2
+    # Each lap leaves the start facing start_heading and drives the same rectangle
+    assert motors.move_headings == [0, 90, 180, 270] * 2
+    assert motors.heading == 0
+
+
+def test_backlog_is_bounded():
+    """The bot waits for the worker when too many stops are still being processed."""
+    plan, _ = _plan()
+    active = []
+
+    def process(location, captured):
+        time.sleep(0.05)
+        return location
+
+    async def run(runner):
+        task = asyncio.ensure_future(runner.run())
+        while not task.done():
+            active.append(len([1 for *_, future in runner._pending if not future.done()]))
+            await asyncio.sleep(0.005)
+        return task.result()
+
+    runner = MissionRunner(FakeMotors(scale=0.001), plan, lambda location: None, process,
+                           capture_delay=0, max_pending=1)
+    report = asyncio.run(run(runner))
+    assert max(active) <= 1
+    assert report["backlog_waits"] > 0
+
+
+def test_failed_stop_does_not_abort():
+    """A stop whose processing fails is reported and the mission carries on."""
+    plan, _ = _plan()
+
+    def process(location, captured):
+        if location == "Building B":
+            raise RuntimeError("detection failed")
+        return location
+
+    arrivals = []
+    runner = MissionRunner(FakeMotors(scale=0.001), plan, lambda location: None, process,
+                           capture_delay=0, on_arrive=arrivals.append)
+    report = asyncio.run(runner.run())
+    assert report["checkpoints"] == 2 and report["errors"] == 1
+    assert runner.errors[0][:2] == (1, "Building B")
+    assert arrivals == ["Building A", "Building B", "Building C", "Start"]
+
+
+def test_load_mission():
+    """Missing settings fall back to the defaults."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "mission.json")
+        with open(path, "w") as f:
+            json.dump({"visit": ["Building C"], "laps": 3}, f)
+        mission = load_mission(path)
+        assert mission["visit"] == ["Building C"] and mission["laps"] == 3
+        assert mission["capture_delay"] == 1.0
+        assert load_mission(os.path.join(directory, "missing.json"))["laps"] == 1
+
+
+if __name__ == "__main__":
+    print("===== Mission Runner Test =====")
+    for test in [test_processing_overlaps_driving, test_backlog_is_bounded,
+                 test_failed_stop_does_not_abort, test_load_mission]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the asyncio motor controller.
+Uses a fake GPIO module that records pin writes - no Raspberry Pi needed.
+"""
+
+import asyncio
+
+from motor_controller import MotorController, FORWARD, RIGHT, STOPPED
+
+
+class FakeGPIO:
+    """Records every output() as (loop time, pin, level)."""
+    BCM, OUT, HIGH, LOW = "BCM", "OUT", 1, 0
+
+    def __init__(self):
+        self.levels = {}
+        self.writes = []
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        pass
+
+    def setup(self, pin, mode):
+        pass
+
+    def output(self, pin, level):
+        self.levels[pin] = level
+        try:
+            now = asyncio.get_running_loop().time()
+        except RuntimeError:
+            now = None
+        self.writes.append((now, pin, level))
+
+    def PWM(self, pin, frequency):
+        class _PWM:
+            def start(self, duty):
+                pass
+        return _PWM()
+
+
+def _pattern(gpio, motors):
+    return tuple(gpio.levels[motors.pins[pin]] for pin in ("in1", "in2", "in3", "in4"))
+
+
+def _controller(settle_time=0.05):
+    gpio = FakeGPIO()
+    motors = MotorController(gpio, settle_time=settle_time)
+    motors.setup()
+    return gpio, motors
+
+
+def test_timed_move_stops():
+    """A move drives forward for its duration and then stops the motors."""
+    gpio, motors = _controller()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        task = asyncio.ensure_future(motors.move(0.1))
+        await asyncio.sleep(0.02)
+        assert _pattern(gpio, motors) == FORWARD and motors.busy
+        await task
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+    assert _pattern(gpio, motors) == STOPPED
+    assert 0.09 <= elapsed < 0.2
+    assert motors.motion == "stopped" and not motors.busy
+
+
+def test_cancel_stops_immediately():
+    """Cancelling a motion stops the motors at once."""
+    gpio, motors = _controller()
+
+    async def run():
+        task = asyncio.ensure_future(motors.move(5))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert _pattern(gpio, motors) == STOPPED
+
+        # stop() ends a motion early; the caller resumes normally
+        task = asyncio.ensure_future(motors.turn("left", 5))
+        await asyncio.sleep(0.02)
+        await motors.stop()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(run())
+    assert _pattern(gpio, motors) == STOPPED
+
+
+def test_settle_only_on_reversal():
+    """The rest pause is only taken when a motor changes direction."""
+    gpio, motors = _controller(settle_time=0.05)
+
+    async def run():
+        await motors.move(0.01)
+        await motors.move(0.01)  # Same direction: no pause
+        assert motors.settle_waits == 0
+        await motors.turn("right", 0.01)  # Right motor reverses
+        assert 0 < motors.settle_waits <= 0.05
+        await motors.turn("left", 0.01)  # Right motor was backward, now stopped
+        assert motors.settle_waits <= 0.05
+
+    asyncio.run(run())
+    assert motors.motions == 4
+
+
+def test_work_overlaps_driving():
+    """Other coroutines keep running on the loop while the bot drives."""
+    gpio, motors = _controller()
+    ticks = []
+
+    async def other_work():
+        while True:
+            ticks.append(_pattern(gpio, motors))
+            await asyncio.sleep(0.01)
+
+    async def run():
+        worker = asyncio.ensure_future(other_work())
+        await motors.turn("right", 0.1)
+        worker.cancel()
+
+    asyncio.run(run())
+    assert ticks.count(RIGHT) >= 5
+
+
+if __name__ == "__main__":
+    print("===== Motor Controller Test =====")
+    for test in [test_timed_move_stops, test_cancel_stops_immediately,
+                 test_settle_only_on_reversal, test_work_overlaps_driving]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
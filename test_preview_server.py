@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the headless MJPEG preview server.
+Serves synthetic frames on a free local port.
+"""
+
+import urllib.request
+
+import numpy as np
+
+from preview_server import BOUNDARY, PreviewServer
+
+JPEG_START = b"\xff\xd8"
+
+
+def test_snapshot_and_stream():
+    """The snapshot and the MJPEG stream return JPEG frames; stop() frees the port."""
+    preview = PreviewServer(host="127.0.0.1", port=0)
+    port = preview.start()
+    assert port != 0
+    url = f"http://127.0.0.1:{port}"
+    try:
+        frame = np.zeros((48, 64, 3), np.uint8)
+        frame[10:30, 10:30] = (0, 0, 255)
+        preview.publish(frame)
+
+        with urllib.request.urlopen(f"{url}/snapshot.jpg", timeout=5) as response:
+            assert response.headers["Content-Type"] == "image/jpeg"
+            assert response.read().startswith(JPEG_START)
+
+        with urllib.request.urlopen(f"{url}/stream.mjpg", timeout=5) as response:
+            assert f"boundary={BOUNDARY}" in response.headers["Content-Type"]
+            assert response.readline() == f"--{BOUNDARY}\r\n".encode()
+            assert response.readline() == b"Content-Type: image/jpeg\r\n"
+            length = int(response.readline().split(b":")[1])
+            assert response.readline() == b"\r\n"
+            assert response.read(length).startswith(JPEG_START)
+    finally:
+        preview.stop()
+
+    # The port can be bound again once the server has stopped
+    again = PreviewServer(host="127.0.0.1", port=port)
+    assert again.start() == port
+    again.stop()
+
+
+if __name__ == "__main__":
+    print("===== Preview Server Test =====")
+    for test in [test_snapshot_and_stream]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
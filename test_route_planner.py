@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the graph-based route planner.
+"""
+
+from route_planner import RoutePlanner, EXACT_TOUR_LIMIT
+
+
+def test_full_tour_matches_rectangle():
+    """Visiting every building drives the original Start→A→B→C→Start rectangle."""
+    planner = RoutePlanner.from_file("site_graph.json")
+    steps, total = planner.motion_plan()
+    stops = [step["location"] for step in steps if step["action"] == "arrive" and step["visit"]]
+    assert stops == ["Building A", "Building B", "Building C"]
+    assert steps[-2] == {"action": "arrive", "location": "Start", "visit": False}
+    # Back to the start heading, ready for the next lap
+    assert steps[-1] == {"action": "turn", "direction": "right", "duration": 1.5}
+    assert total == 4 * 3.0 + 4 * 1.5
+    assert sum(step["duration"] for step in steps if "duration" in step) == total
+
+
+def test_subset_visit_is_shorter():
+    """Only the buildings that need a visit are processed, over the cheapest route."""
+    planner = RoutePlanner.from_file("site_graph.json")
+    steps, total = planner.motion_plan(["Building C"])
+    assert total < planner.motion_plan()[1]
+    visits = [step["location"] for step in steps if step["action"] == "arrive" and step["visit"]]
+    assert visits == ["Building C"]
+    assert planner.motion_plan([])[0] == []
+
+
+def test_left_turns_are_used_when_cheaper():
+    """A left turn replaces three right turns when the site graph allows it."""
+    planner = RoutePlanner({
+        "start": "S",
+        "turns": {"right": 1.0, "left": 1.2},
+        "nodes": {"S": {}, "W": {"visit": True}},
+        "edges": [{"from": "S", "to": "W", "heading": 270, "travel": 2.0}],
+    })
+    steps, total = planner.motion_plan()
+    assert steps[0] == {"action": "turn", "direction": "left", "duration": 1.2}
+    assert total == 1.2 + 2.0 + 2 * 1.0 + 2.0 + 1.2
+    assert planner.motion_plan(return_to_start=False)[0][-1]["action"] == "arrive"
+
+
+def test_final_turn_counts_when_choosing_order():
+    """The turn back to the start heading is part of the cost the tour order is chosen by."""
+    planner = RoutePlanner({
+        "start": "S",
+        "turns": {"right": 1.0, "left": 1.5},
+        "nodes": {"S": {}, "A": {"visit": True}, "B": {"visit": True}},
+        "edges": [{"from": "S", "to": "A", "heading": 0, "travel": 1.0},
+                  {"from": "S", "to": "B", "heading": 0, "travel": 1.0},
+                  {"from": "A", "to": "B", "heading": 90, "travel": 1.0},
+                  {"from": "B", "to": "A", "heading": 270, "travel": 1.0},
+                  {"from": "B", "to": "S", "heading": 90, "travel": 1.0},
+                  {"from": "A", "to": "S", "heading": 270, "travel": 0.8}],
+    })
+    # A then B is cheaper up to the start (4.0 s vs 4.3 s), but then needs
+    # a left turn back to heading 0 instead of a right one
+    order, total = planner.plan_tour()
+    assert order == ["B", "A"]
+    assert abs(total - 5.3) < 1e-9
+    steps, plan_total = planner.motion_plan()
+    assert plan_total == total
+    assert abs(sum(step["duration"] for step in steps if "duration" in step) - total) < 1e-9
+    assert steps[-1] == {"action": "turn", "direction": "right", "duration": 1.0}
+
+
+def test_large_tours_use_heuristic():
+    """Tours beyond the exact limit still visit every building."""
+    # 4 x 3 grid of buildings, edges east (90) and south (180)
+    nodes = {f"{r}{c}": {"visit": True} for r in range(3) for c in range(4)}
+    nodes["00"]["visit"] = False
+    edges = []
+    for r in range(3):
+        for c in range(4):
+            if c < 3:
+                edges.append({"from": f"{r}{c}", "to": f"{r}{c + 1}", "heading": 90, "travel": 1.0})
+            if r < 2:
+                edges.append({"from": f"{r}{c}", "to": f"{r + 1}{c}", "heading": 180, "travel": 1.0})
+    planner = RoutePlanner({"start": "00", "turns": {"right": 0.5, "left": 0.5},
+                            "nodes": nodes, "edges": edges})
+    assert len(planner.buildings()) > EXACT_TOUR_LIMIT
+
+    order, total = planner.plan_tour()
+    assert sorted(order) == sorted(planner.buildings())
+    assert total < 40
+
+
+if __name__ == "__main__":
+    print("===== Route Planner Test =====")
+    for test in [test_full_tour_matches_rectangle, test_subset_visit_is_shorter,
+                 test_left_turns_are_used_when_cheaper, test_final_turn_counts_when_choosing_order,
+                 test_large_tours_use_heuristic]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
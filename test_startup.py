@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the startup orchestrator.
+No hardware is needed - the phases are simulated with sleeps.
+"""
+
+import time
+
+from startup import StartupOrchestrator
+
+
+def test_phases_run_concurrently():
+    """Total startup time is close to the slowest phase, not the sum."""
+    startup = StartupOrchestrator()
+    startup.add_phase("camera", lambda: time.sleep(0.2) or "camera")
+    startup.add_phase("firebase", lambda: time.sleep(0.2) or "firebase")
+    startup.add_phase("gpio", lambda: "gpio")
+    results = startup.run()
+
+    assert results == {"camera": "camera", "firebase": "firebase", "gpio": "gpio"}
+    timings = startup.timings()
+    assert timings["camera"] >= 0.2 and timings["total"] < 0.35
+    assert "run one after another" in startup.report()
+
+
+def test_optional_phase_failure_is_tolerated():
+    """Only failures in required phases stop startup."""
+    def fail():
+        raise ConnectionError("offline")
+
+    startup = StartupOrchestrator()
+    startup.add_phase("firebase", fail, required=False)
+    startup.add_phase("gpio", lambda: True)
+    assert startup.run() == {"firebase": None, "gpio": True}
+
+    startup = StartupOrchestrator()
+    startup.add_phase("camera", fail)
+    try:
+        startup.run()
+    except RuntimeError as e:
+        assert "camera" in str(e)
+    else:
+        raise AssertionError("required phase failure was ignored")
+    assert "FAILED" in startup.report()
+
+
+if __name__ == "__main__":
+    print("===== Startup Orchestrator Test =====")
+    for test in [test_phases_run_concurrently, test_optional_phase_failure_is_tolerated]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
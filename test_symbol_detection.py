@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test script for the symbol detection engine.
+Draws synthetic red symbols on a blank frame and checks the detected counts.
+"""
+
+import os
+import tempfile
+
+import cv2
+import numpy as np
+from color_lut import ColorClassifier, label_components
+from symbol_detection import (DEFAULT_ROI, FEATURE_NAMES, RED_RANGES, SHAPES, RoiCache,
+                              classify_features, detect_symbols, detect_symbols_batch,
+                              detect_symbols_burst, detect_symbols_coarse_to_fine,
+                              extract_features, fuse_results, to_material_counts)
+
+RED = (0, 0, 255)
+
+
+def make_scene():
+    """Build a 640x480 frame with one of each symbol inside the default ROI."""
+    frame = np.full((480, 640, 3), 200, np.uint8)
+    cv2.circle(frame, (200, 200), 40, RED, -1)
+    cv2.rectangle(frame, (300, 150), (370, 220), RED, -1)
+    cv2.fillPoly(frame, [np.array([[420, 300], [480, 300], [450, 250]])], RED)
+    cv2.line(frame, (150, 280), (220, 350), RED, 12)
+    cv2.line(frame, (220, 280), (150, 350), RED, 12)
+    return frame
+
+
+def test_detect_symbols():
+    """One of each symbol should be detected with geometry inside the ROI."""
+    result = detect_symbols(make_scene())
+    assert result["counts"] == {"Circle": 1, "Triangle": 1, "Square": 1, "X": 1}
+    for symbol in result["symbols"]:
+        x, y, w, h = symbol["bbox"]
+        assert 100 <= x and x + w <= 540
+        assert 100 <= y and y + h <= 380
+
+
+def test_empty_frame():
+    """A frame without red pixels should produce zero counts."""
+    result = detect_symbols(np.zeros((480, 640, 3), np.uint8))
+    assert sum(result["counts"].values()) == 0
+    assert result["symbols"] == []
+
+
+def test_batch_matches_single():
+    """Batch detection should give the same counts as per-frame detection."""
+    scene = make_scene()
+    frames = np.stack([scene, np.zeros_like(scene), scene])
+    batch = detect_symbols_batch(frames)
+    assert len(batch) == 3
+    for frame, result in zip(frames, batch):
+        assert result["counts"] == detect_symbols(frame)["counts"]
+
+
+def test_feature_classifier():
+    """Rotated X marks are classified from contour features, without Hough lines."""
+    frame = np.zeros((480, 640, 3), np.uint8)
+    for i, angle in enumerate([0, 20, 45]):
+        cx, cy, r = 150 + i * 150, 240, 45
+        for d in (np.radians(angle), np.radians(angle + 90)):
+            dx, dy = int(r * np.cos(d)), int(r * np.sin(d))
+            cv2.line(frame, (cx - dx, cy - dy), (cx + dx, cy + dy), RED, 14)
+
+    mask = cv2.inRange(frame, RED, RED)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    features, kept, approxes = extract_features(contours)
+    assert features.shape == (3, len(FEATURE_NAMES))
+    assert len(kept) == len(approxes) == 3
+    assert [SHAPES[label] for label in classify_features(features)] == ["X", "X", "X"]
+
+
+def test_burst_fusion():
+    """A single bad frame in a burst is outvoted and lowers the confidence."""
+    scene = make_scene()
+    fused, results = detect_symbols_burst([scene, np.zeros_like(scene), scene])
+    assert len(results) == 3
+    assert fused["counts"] == {"Circle": 1, "Triangle": 1, "Square": 1, "X": 1}
+    assert abs(fused["confidence"] - 2 / 3) < 1e-9
+    assert fused["frame_index"] == 0
+
+    assert fuse_results([])["confidence"] == 0.0
+
+
+def test_coarse_to_fine():
+    """Coarse-to-fine detection finds the same symbols as a full-resolution pass."""
+    scene = make_scene()
+    assert detect_symbols_coarse_to_fine(scene)["counts"] == detect_symbols(scene)["counts"]
+    assert sum(detect_symbols_coarse_to_fine(np.zeros_like(scene))["counts"].values()) == 0
+
+
+def test_roi_cache():
+    """ROIs shrink to where symbols were seen and reset after repeated misses."""
+    cache = RoiCache(path=None, margin=10, max_misses=2)
+    assert cache.get("Building A") == DEFAULT_ROI
+
+    cache.update("Building A", detect_symbols(make_scene()))
+    x, y, w, h = cache.get("Building A")
+    assert w * h < DEFAULT_ROI[2] * DEFAULT_ROI[3]
+    assert detect_symbols(make_scene(), (x, y, w, h))["counts"]["X"] == 1
+
+    empty = {"counts": {}, "symbols": []}
+    cache.update("Building A", empty)
+    cache.update("Building A", empty)
+    assert cache.get("Building A") == DEFAULT_ROI
+
+
+def test_roi_cache_finds_new_symbols():
+    """A symbol added outside the learned window is found by the periodic full scan."""
+    cache = RoiCache(path=None, margin=10, rescan_every=3)
+    scene = np.full((480, 640, 3), 200, np.uint8)
+    cv2.circle(scene, (200, 200), 40, RED, -1)
+    cache.update("Building A", detect_symbols(scene))
+
+    # The circle stays in view, a square appears far from it
+    cv2.rectangle(scene, (420, 280), (480, 340), RED, -1)
+    seen = []
+    for _ in range(3):
+        roi = cache.get("Building A")
+        result = detect_symbols(scene, roi)
+        cache.update("Building A", result, roi)
+        seen.append(result["counts"]["Square"])
+    assert seen == [0, 0, 1]
+    x, y, w, h = cache.get("Building A")
+    assert x + w >= 480 and y + h >= 340  # The learned window now covers both
+
+    # A symbol cut off by the learned window makes the next visit search everything
+    cache = RoiCache(path=None, margin=10, rescan_every=10)
+    cache.update("Building B", {"counts": {}, "symbols": [{"bbox": (200, 200, 50, 50)}]})
+    roi = cache.get("Building B")
+    assert roi == (190, 190, 70, 70)
+    cache.update("Building B", {"counts": {}, "symbols": [{"bbox": (230, 200, 30, 50)}]}, roi)
+    assert cache.get("Building B") == DEFAULT_ROI
+
+
+def test_material_mapping():
+    """Symbol counts should map onto the dashboard material categories."""
+    counts = to_material_counts({"Circle": 1, "Triangle": 2, "Square": 3, "X": 4})
+    assert counts == {"dispatchReady": 1, "damaged": 3, "eWaste": 2, "rawMaterials": 4}
+
+
+def test_color_lut_matches_hsv():
+    """The lookup table should agree with cvtColor + inRange on almost every pixel."""
+    image = np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    expected = np.zeros(image.shape[:2], np.uint8)
+    for lower, upper in RED_RANGES["red"]:
+        expected |= cv2.inRange(hsv, lower, upper)
+
+    classifier = ColorClassifier(RED_RANGES, cache_dir=None)
+    assert (classifier.mask(image) == expected).mean() > 0.99
+
+
+def test_color_lut_cache():
+    """Tables are cached per threshold set and rebuilt when thresholds change."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = ColorClassifier(RED_RANGES, cache_dir=cache_dir)
+        assert len(os.listdir(cache_dir)) == 1
+        again = ColorClassifier(RED_RANGES, cache_dir=cache_dir)
+        assert np.array_equal(first.table, again.table)
+        assert len(os.listdir(cache_dir)) == 1
+
+        ColorClassifier({"red": [(0, 50, 50), (10, 255, 255)]}, cache_dir=cache_dir)
+        assert len(os.listdir(cache_dir)) == 2
+
+
+def test_label_components():
+    """Touching blobs of different classes are counted separately, small ones dropped."""
+    labels = np.zeros((100, 200), np.uint8)
+    labels[10:60, 10:60] = 1
+    labels[10:60, 60:110] = 2   # Touches the class 1 blob
+    labels[70:90, 150:190] = 1
+    labels[5:8, 150:153] = 2    # Noise below the area threshold
+
+    counts, blobs = label_components(labels, 2, min_area=100)
+    assert list(counts) == [0, 2, 1]
+    assert sorted(b["label"] for b in blobs) == [1, 1, 2]
+    assert all(b["area"] > 100 for b in blobs)
+
+
+if __name__ == "__main__":
+    print("===== Symbol Detection Test =====")
+    for test in [test_detect_symbols, test_empty_frame, test_batch_matches_single,
+                 test_feature_classifier, test_burst_fusion,
+                 test_coarse_to_fine, test_roi_cache, test_roi_cache_finds_new_symbols,
+                 test_material_mapping, test_color_lut_matches_hsv, test_color_lut_cache,
+                 test_label_components]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-ahead telemetry log.
+Runs entirely on local files - no Firebase credentials are needed.
+"""
+
+import json
+import os
+import tempfile
+
+from telemetry_log import RecordRejected, TelemetryLog
+
+
+def test_records_survive_reopen():
+    """Unacknowledged records are loaded again after a restart."""
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, fsync=False)
+        first = log.append({"currentLocation": "Building A"})
+        log.append({"detectedMaterials": {"damaged": 1}})
+        log.close()
+
+        reopened = TelemetryLog(directory, fsync=False)
+        records = reopened.outstanding()
+        assert [r["seq"] for r in records] == [first, first + 1]
+        assert records[0]["updates"] == {"currentLocation": "Building A"}
+        assert reopened.append({"lastUpdate": 0}) == first + 2
+
+
+def test_replay_acks_and_compacts():
+    """Replayed batches are acknowledged and fully acked segments deleted."""
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, segment_max_records=2, fsync=False)
+        for i in range(5):
+            log.append({"currentLocation": f"L{i}"})
+        assert len([f for f in os.listdir(directory) if f.startswith("segment-")]) == 3
+
+        sent = []
+        assert not log.replay(lambda batch: False)
+        assert log.pending_count() == 5
+        assert log.replay(lambda batch: sent.append(batch) or True, batch_size=2)
+        assert [len(batch) for batch in sent] == [2, 2, 1]
+        assert log.pending_count() == 0
+        # Only the segment still being written to is kept
+        assert len([f for f in os.listdir(directory) if f.startswith("segment-")]) == 1
+
+        log.close()
+        assert TelemetryLog(directory, fsync=False).pending_count() == 0
+
+
+def test_corrupt_records_are_skipped():
+    """Torn or tampered lines fail their checksum and are ignored."""
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, fsync=False)
+        log.append({"currentLocation": "Building A"})
+        log.append({"currentLocation": "Building B"})
+        path = log._file.name
+        log.close()
+
+        with open(path, "r") as f:
+            lines = f.readlines()
+        lines[0] = lines[0].replace("Building A", "Building Z")
+        with open(path, "w") as f:
+            f.writelines(lines)
+            f.write('{"seq": 3, "ts"')  # Torn write
+
+        reopened = TelemetryLog(directory, fsync=False)
+        assert [r["updates"]["currentLocation"] for r in reopened.outstanding()] == ["Building B"]
+        assert reopened.corrupt_records == 2
+
+
+def test_size_is_bounded():
+    """The oldest segments are dropped once max_segments is exceeded."""
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, segment_max_records=1, max_segments=3, fsync=False)
+        for i in range(10):
+            log.append({"lastUpdate": i})
+        assert len([f for f in os.listdir(directory) if f.startswith("segment-")]) <= 3
+        assert [r["updates"]["lastUpdate"] for r in log.outstanding()] == [7, 8, 9]
+
+
+def test_rejected_records_are_quarantined():
+    """A rejected batch is retried record by record; only the bad record is set aside."""
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, fsync=False)
+        for location in ("L0", "bad", "L2", "L3"):
+            log.append({"currentLocation": location})
+
+        sent = []
+
+        def send(batch):
+            locations = [r["updates"]["currentLocation"] for r in batch]
+            if "bad" in locations:
+                raise RecordRejected("invalid key")
+            sent.append(locations)
+            return True
+
+        assert log.replay(send, batch_size=3)
+        assert sent == [["L0"], ["L2"], ["L3"]]
+        assert log.pending_count() == 0 and log.quarantined == [2]
+        with open(os.path.join(directory, "quarantine.jsonl")) as f:
+            entry = json.loads(f.read())
+        assert entry["updates"] == {"currentLocation": "bad"} and entry["reason"] == "invalid key"
+
+
+def test_directory_is_locked():
+    """A log directory can only be open in one TelemetryLog at a time."""
+    with tempfile.TemporaryDirectory() as directory:
+        log = TelemetryLog(directory, fsync=False)
+        try:
+            TelemetryLog(directory, fsync=False)
+            assert False, "Expected RuntimeError"
+        except RuntimeError:
+            pass
+        log.close()
+        TelemetryLog(directory, fsync=False).close()
+
+
+if __name__ == "__main__":
+    print("===== Telemetry Log Test =====")
+    for test in [test_records_survive_reopen, test_replay_acks_and_compacts,
+                 test_corrupt_records_are_skipped, test_size_is_bounded,
+                 test_rejected_records_are_quarantined, test_directory_is_locked]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the coalescing telemetry publisher.
+Runs against the in-process database emulator - no credentials are needed.
+"""
+
+import tempfile
+import time
+
+from firebase_integration import FirebaseConnector
+from rtdb_emulator import RTDBEmulator
+from telemetry_publisher import TelemetryPublisher
+
+
+def test_writes_are_coalesced():
+    """Repeated writes to one path within an interval become a single update."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = FirebaseConnector(log_dir=log_dir, database=emulator, monitor=False)
+        publisher = TelemetryPublisher(firebase, min_interval=0.2)
+        publisher.set("lastUpdate", 0)
+        assert publisher.flush(timeout=2)
+        # The next batch now waits out the interval, gathering everything below
+        updates_before = emulator.calls["update"]
+
+        for location in ("Building A", "Building B", "Building C"):
+            publisher.set("currentLocation", location)
+        publisher.update({"detectedMaterials/damaged": 2, "detectedMaterials/eWaste": 1})
+        publisher.set("detectedMaterials/damaged", 3)
+        assert publisher.pending() == 3
+        assert publisher.flush(timeout=2)
+
+        assert emulator.calls["update"] - updates_before == 1
+        assert publisher.sent == 2 and publisher.coalesced == 3
+        assert emulator.snapshot("currentLocation") == "Building C"
+        assert emulator.snapshot("detectedMaterials/damaged") == 3
+        assert emulator.snapshot("detectedMaterials/eWaste") == 1
+        publisher.close(timeout=2)
+        firebase.close()
+
+
+def test_flush_and_close_deliver_pending_writes():
+    """flush() and close() send what is pending without waiting out the interval."""
+    emulator = RTDBEmulator()
+    with tempfile.TemporaryDirectory() as log_dir:
+        firebase = FirebaseConnector(log_dir=log_dir, database=emulator, monitor=False)
+        publisher = TelemetryPublisher(firebase, min_interval=10)
+
+        publisher.update_location("Building A")
+        start = time.monotonic()
+        assert publisher.flush(timeout=2)
+        assert emulator.snapshot("currentLocation") == "Building A"
+
+        publisher.update_materials({"dispatchReady": 4})
+        assert publisher.close(timeout=2)
+        assert time.monotonic() - start < 2
+        assert emulator.snapshot("detectedMaterials") == {"dispatchReady": 4}
+        assert publisher.sent == 2 and publisher.failed == 0 and publisher.pending() == 0
+        try:
+            publisher.set("currentLocation", "Building B")
+            assert False, "Expected RuntimeError"
+        except RuntimeError:
+            pass
+        firebase.close()
+
+
+if __name__ == "__main__":
+    print("===== Telemetry Publisher Test =====")
+    for test in [test_writes_are_coalesced, test_flush_and_close_deliver_pending_writes]:
+        test()
+        print(f"✓ {test.__name__}")
+    print("\nTests completed!")